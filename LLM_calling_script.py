@@ -1,32 +1,44 @@
+import argparse
+import asyncio
 import json
 import time
-from collections import Counter
-import google.generativeai as genai
-from datetime import datetime
-from pathlib import Path
+from functools import lru_cache
 import getpass
 import os
+import metrics
+from log_util import log
+from batching import BATCH_TOKEN_BUDGET, MAX_BATCH_SIZE, BatchQueue, estimate_tokens, item_cost
+from columnar_store import CLASSIFIED_COLUMNS, ID_TITLE_COLUMNS, ColumnarWriter, is_columnar, iter_columnar
+from gemini_batch import BATCH_JOB_FILE, POLL_INTERVAL, BatchJobRunner, GenaiBatchBackend
+from journal import JOURNAL_FILE, Journal
+from keyword_engine import KeywordCounter, write_keywords
+from lazy_import import LazyModule
+from lead_store import LeadStore
+from key_pool import KEY_USAGE_FILE, KeyPool, parse_keys
+from rate_limiter import backoff_delay, retry_reason
+from response_parser import RESPONSE_SCHEMA, parse_items
+from rule_classifier import DOMAIN_TERMS, EXCLUDE_KEYWORDS_FILE, INCLUDE_KEYWORDS_FILE, RuleClassifier
+import title_index
+from title_index import SIMILARITY_THRESHOLD, TITLE_INDEX_FILE, TitleIndex
+from title_cache import CACHE_DB_FILE, TitleCache, group_by_title, prompt_fingerprint
+
+# Imported when the first Gemini model is built, so stages that never call Gemini start fast
+genai = LazyModule("google.generativeai")
 
 # === CONFIGURATION ===
 CLASSIFIED_OUTPUT_FILE = "classified_titles.json"
-BATCH_SIZE = 3
+MODEL_NAME = "gemini-1.5-flash"
 MAX_RPD = 1500
 MAX_RPM = 15  # Free-tier max RPM
-SLEEP_TIME = 60 / MAX_RPM  # 4 seconds
-RETRY_ATTEMPTS = 2
-
-# === GET API KEY ===
-API_KEY = getpass.getpass("🔐 Enter your Gemini API Key: ").strip()
-genai.configure(api_key=API_KEY)
-model = genai.GenerativeModel("gemini-1.5-flash")
-
-# === LOG FUNCTION ===
-def log(msg):
-    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
+RETRY_ATTEMPTS = 5
+CONCURRENCY = 4  # Requests kept in flight in async mode
+USE_RULE_PRECLASSIFIER = True  # Resolve clear-cut titles locally before calling Gemini
+USE_STRUCTURED_OUTPUT = True  # Ask for JSON constrained to RESPONSE_SCHEMA where the SDK supports it
+USE_NEIGHBOR_REUSE = True  # Inherit Gemini verdicts of near-identical titles from the title cache
 
 # === LIST JSON FILES ===
 def list_json_files():
-    files = [f for f in os.listdir('.') if f.endswith('.json')]
+    files = [f for f in os.listdir('.') if f.endswith(('.json', '.parquet', '.arrow'))]
     if not files:
         print("❌ No JSON files found in this directory.")
         exit()
@@ -47,19 +59,21 @@ def select_file():
         exit()
 
 # === LOAD INPUT ===
-input_file = select_file()
-try:
-    with open(input_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    assert isinstance(data, list), "Input must be a list of dicts with 'id' and 'title'"
+@metrics.staged("load_entries")
+def load_entries(input_file):
+    if is_columnar(input_file):
+        # Parquet / Arrow inputs: only the id and title columns are read
+        data = list(iter_columnar(input_file, ID_TITLE_COLUMNS))
+    else:
+        with open(input_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError("Input must be a list of dicts with 'id' and 'title'")
     log(f"📊 Loaded {len(data)} entries from {input_file}")
-except Exception as e:
-    log(f"🛑 Failed to load JSON: {e}")
-    raise SystemExit
+    return data
 
-# === GEMINI CLASSIFICATION ===
-def classify_batch(titles, retry_attempts=RETRY_ATTEMPTS):
-    prompt = f"""
+# === PROMPT TEMPLATE ===
+PROMPT_TEMPLATE = """
 You are an assistant working for a Vision AI startup that builds AI agents to monitor equipment, materials, and processes in large manufacturing industries such as cement, steel, and metal production.
 
 We want to classify each of the job titles provided below as either **RELEVANT** or **NOT RELEVANT** for outreach purposes.
@@ -85,9 +99,12 @@ We want to classify each of the job titles provided below as either **RELEVANT**
 
 5. If the title is in a non-English language, translate it into English.
 
+6. Each title is given as an object with an `index` and a `title`. Return exactly one item per title and copy its `index` unchanged.
+
 Return your response as a JSON list in the following format:
 [
   {{
+    "index": <the same index as the input title>,
     "original_title": "...",
     "translated_title": "...",
     "verdict": "RELEVANT" or "NOT RELEVANT"
@@ -96,92 +113,489 @@ Return your response as a JSON list in the following format:
 ]
 
 Here are the titles:
-{json.dumps(titles, ensure_ascii=False)}
+{titles}
 """
-    for attempt in range(retry_attempts):
+
+# === GEMINI CLASSIFICATION ===
+def build_prompt(items, prompt_template=PROMPT_TEMPLATE):
+    return prompt_template.format(titles=json.dumps(items, ensure_ascii=False))
+
+def parse_response(raw):
+    # Every complete item in the reply, even when the JSON around it is noisy or cut off;
+    # whatever is missing is re-queued by BatchQueue.settle instead of failing the batch
+    items, parser = parse_items(raw)
+    if parser.malformed:
+        metrics.inc("gemini_parse_failures_total", parser.malformed, kind="malformed_item")
+    if parser.truncated:
+        metrics.inc("gemini_parse_failures_total", kind="truncated")
+    return items
+
+@lru_cache(maxsize=None)
+def structured_output_config():
+    # JSON-schema constrained output; None on SDK versions without response_schema
+    try:
+        return genai.GenerationConfig(response_mime_type="application/json", response_schema=RESPONSE_SCHEMA)
+    except (AttributeError, TypeError, ValueError):
+        log("⚠️ This google-generativeai version has no response_schema; relying on the prompt for JSON output.")
+        return None
+
+def response_text(response):
+    # .text raises when the reply has no usable candidate (e.g. blocked); treat it as an empty answer
+    try:
+        return response.text or ""
+    except ValueError:
+        return ""
+
+def error_results(items):
+    return [{"index": item["index"], "original_title": item["title"], "translated_title": "", "verdict": "ERROR"} for item in items]
+
+def retry_delay(error, attempt, retry_attempts):
+    # Returns seconds to back off before the next attempt, or None to give up
+    reason = retry_reason(error)
+    if reason is None:
+        log(f"❌ Gemini API error: {error}")
+        return None
+    if attempt + 1 >= retry_attempts:
+        log(f"❌ Gemini API error after {retry_attempts} attempts: {error}")
+        return None
+    delay = backoff_delay(attempt, reason)
+    if reason == "429":
+        log(f"🚨 429 Rate limit hit. Backing off {delay:.1f}s... (Attempt {attempt+1}/{retry_attempts})")
+    else:
+        log(f"⚠️ 504 Timeout. Retrying in {delay:.1f}s... (Attempt {attempt+1}/{retry_attempts})")
+    return delay
+
+# === PER-KEY MODEL ===
+class KeyedModel:
+    # genai.configure() is process-wide, but a GenerativeModel creates and keeps its
+    # client on its first call; configuring right before that call pins it to one key.
+    # The SDK import and the model itself wait for the first request.
+    def __init__(self, api_key, model_name, structured_output=False):
+        self.api_key = api_key
+        self.model_name = model_name
+        self.structured_output = structured_output
+        self.model = None
+        self.pinned = set()
+
+    def _pin(self, kind):
+        if self.model is None:
+            generation_config = structured_output_config() if self.structured_output else None
+            self.model = genai.GenerativeModel(self.model_name, generation_config=generation_config)
+        if kind not in self.pinned:
+            genai.configure(api_key=self.api_key)
+            self.pinned.add(kind)
+        return self.model
+
+    def generate_content(self, prompt, **kwargs):
+        return self._pin("sync").generate_content(prompt, **kwargs)
+
+    async def generate_content_async(self, prompt, **kwargs):
+        return await self._pin("async").generate_content_async(prompt, **kwargs)
+
+# === CLASSIFIER ===
+class GeminiTitleClassifier:
+    # One instance owns the model, the rate limiter and the title cache, so several
+    # classify() calls (e.g. one per company in a manifest) share quota and verdicts
+    def __init__(self, api_key, prompt_template=PROMPT_TEMPLATE, model_name=MODEL_NAME, max_rpm=MAX_RPM,
+                 max_rpd=MAX_RPD, concurrency=CONCURRENCY, token_budget=BATCH_TOKEN_BUDGET,
+                 max_batch_size=MAX_BATCH_SIZE, retry_attempts=RETRY_ATTEMPTS, cache_file=CACHE_DB_FILE,
+                 use_rules=USE_RULE_PRECLASSIFIER, include_file=INCLUDE_KEYWORDS_FILE, exclude_file=EXCLUDE_KEYWORDS_FILE,
+                 use_neighbors=USE_NEIGHBOR_REUSE, index_file=TITLE_INDEX_FILE,
+                 similarity_threshold=SIMILARITY_THRESHOLD, model=None, usage_file=KEY_USAGE_FILE,
+                 batch_backend=None, poll_interval=POLL_INTERVAL, structured_output=USE_STRUCTURED_OUTPUT,
+                 lead_store=None, rule_domains=None):
+        # api_key: one key, a comma-separated string or a list; each key gets max_rpm / max_rpd.
+        # model: anything with generate_content / generate_content_async (e.g. mock_services.MockGeminiModel),
+        # shared by every key instead of one Gemini model per key.
+        # batch_backend: used by bulk mode (e.g. mock_services.MockBatchBackend); defaults to the Gemini Batch API.
+        # lead_store: an optional lead_store.LeadStore every verdict is upserted into.
+        # rule_domains: the in-scope departments of prompt_template for the local rule pass. Known for
+        # PROMPT_TEMPLATE; any other prompt runs without rules unless its list is passed in.
+        self.lead_store = lead_store
+        self.api_keys = parse_keys(api_key)
+        self.model_name = model_name
+        self.batch_backend = batch_backend
+        self.poll_interval = poll_interval
+        self.key_pool = KeyPool(parse_keys(api_key), max_rpm, max_rpd, usage_file)
+        self.structured_output = structured_output
+        if model is None and not genai.available():
+            raise ImportError("Gemini calls need the google-generativeai SDK: pip install google-generativeai")
+        self.models = {slot.key_id: model or KeyedModel(slot.api_key, model_name, structured_output)
+                       for slot in self.key_pool.slots}
+        if len(self.key_pool.slots) > 1:
+            log(f"🔑 {len(self.key_pool.slots)} Gemini keys pooled: {self.key_pool.remaining_today()} requests left today")
+        self.prompt_template = prompt_template
+        self.concurrency = concurrency
+        self.token_budget = token_budget
+        self.max_batch_size = max_batch_size
+        self.retry_attempts = retry_attempts
+        self.title_cache = TitleCache(prompt_fingerprint(prompt_template, model_name), cache_file)
+        if rule_domains is None and prompt_template == PROMPT_TEMPLATE:
+            rule_domains = DOMAIN_TERMS
+        if use_rules and rule_domains is None:
+            log("⚠️ No rule domain list for this prompt; local rules are off and every title goes to Gemini.")
+            use_rules = False
+        # Seeded from the keyword files an earlier run left behind, when present
+        self.rule_classifier = (RuleClassifier.from_keyword_files(include_file, exclude_file, rule_domains)
+                                if use_rules else None)
+        self.similarity_threshold = similarity_threshold
+        self.index_file = index_file
+        self.title_index = None
+        if use_neighbors and not title_index.available():
+            log("⚠️ NumPy is not installed; nearest-neighbor verdict reuse is off.")
+        elif use_neighbors:
+            self.title_index = TitleIndex.from_title_cache(self.title_cache, index_file)
+
+    # === REQUEST METRICS ===
+    def _record_batch(self, items, prompt):
+        cost = sum(item_cost(item["title"]) for item in items)
+        metrics.observe("gemini_batch_titles", len(items), buckets=metrics.COUNT_BUCKETS)
+        metrics.observe("gemini_batch_fill_ratio", min(cost / self.token_budget, 1.0), buckets=metrics.RATIO_BUCKETS)
+        metrics.observe("gemini_prompt_tokens_estimated", estimate_tokens(prompt), buckets=metrics.TOKEN_BUCKETS)
+
+    def _parsed(self, response, start):
+        results = parse_response(response_text(response))
+        metrics.observe("gemini_request_seconds", time.perf_counter() - start, outcome="ok")
+        metrics.inc("gemini_requests_total", outcome="ok")
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            metrics.inc("gemini_tokens_total", getattr(usage, "prompt_token_count", 0) or 0, kind="prompt")
+            metrics.inc("gemini_tokens_total", getattr(usage, "candidates_token_count", 0) or 0, kind="output")
+        return results
+
+    def _back_off(self, slot, error, attempt, start):
+        # A 429 benches only the key that hit it; when another key has headroom the
+        # retry goes out on that key straight away instead of sleeping
+        outcome = retry_reason(error) or ("parse_error" if isinstance(error, ValueError) else "error")
+        metrics.observe("gemini_request_seconds", time.perf_counter() - start, outcome=outcome)
+        metrics.inc("gemini_requests_total", outcome=outcome)
+        delay = retry_delay(error, attempt, self.retry_attempts)
+        if delay is None:
+            return None
+        metrics.inc("gemini_retries_total", reason=outcome)
+        if outcome == "429" and self.key_pool.throttle(slot, delay):
+            log(f"🔀 Gemini {slot.label} throttled. Failing over to another key.")
+            metrics.inc("gemini_key_failovers_total")
+            return 0
+        metrics.inc("gemini_backoff_seconds_total", delay, reason=outcome)
+        return delay
+
+    def classify_batch(self, items):
+        # Returns None when every key's daily quota runs out before the batch could be sent
+        prompt = build_prompt(items, self.prompt_template)
+        self._record_batch(items, prompt)
+        for attempt in range(self.retry_attempts):
+            slot = self.key_pool.wait()
+            if slot is None:
+                return None
+            start = time.perf_counter()
+            try:
+                response = self.models[slot.key_id].generate_content(prompt)
+                return self._parsed(response, start)
+            except Exception as e:
+                delay = self._back_off(slot, e, attempt, start)
+                if delay is None:
+                    break
+                time.sleep(delay)
+        return error_results(items)
+
+    async def classify_batch_async(self, items):
+        prompt = build_prompt(items, self.prompt_template)
+        self._record_batch(items, prompt)
+        for attempt in range(self.retry_attempts):
+            slot = await self.key_pool.acquire()
+            if slot is None:
+                return None
+            start = time.perf_counter()
+            try:
+                response = await self.models[slot.key_id].generate_content_async(prompt)
+                return self._parsed(response, start)
+            except Exception as e:
+                delay = self._back_off(slot, e, attempt, start)
+                if delay is None:
+                    break
+                await asyncio.sleep(delay)
+        return error_results(items)
+
+    # === PROCESSING ===
+    @metrics.staged("classify")
+    def classify(self, data, journal_file=JOURNAL_FILE, resume=False, use_async=False, bulk=False,
+                 batch_job_file=BATCH_JOB_FILE, journal=None):
+        # journal: an open Journal shared across calls (e.g. the pipelined runner's chunks); left open
+        classified_results = []
+        entry_count = 0
+        request_count = 0
+
+        def record_result(id_, title, result):
+            nonlocal entry_count
+            entry_count += 1
+            translated = result.get("translated_title", "")
+            verdict = result.get("verdict", "ERROR")
+            record = {
+                "id": id_,
+                "title": title,
+                "translated_title": translated,
+                "classification": verdict
+            }
+            classified_results.append(record)
+            journal.append(record)
+            log(f"✅ {entry_count}/{len(data)} | {verdict} | {title}")
+
+        cache_stamp = self.title_cache.stamp() if self.title_index is not None else None
+
+        # === CHECKPOINT JOURNAL ===
+        own_journal = journal is None
+        if own_journal:
+            journal = Journal(journal_file, resume=resume)
+        to_classify = data
+        if resume:
+            to_classify = [entry for entry in data if entry['id'] not in journal.completed]
+            for entry in data:
+                if entry['id'] in journal.completed:
+                    entry_count += 1
+                    classified_results.append(journal.completed[entry['id']])
+            log(f"⏯️ Resuming: {entry_count} entries already classified, {len(to_classify)} left (including earlier ERRORs)")
+
+        # === DEDUPLICATE TITLES ===
+        title_groups = group_by_title(to_classify)
+        log(f"🧮 Collapsed {len(to_classify)} entries into {len(title_groups)} unique titles")
+
+        # === TITLE CACHE LOOKUP ===
+        pending = []
+        for key, entries in title_groups.items():
+            cached = self.title_cache.get(entries[0]['title'])
+            if cached is None:
+                pending.append(key)
+                continue
+            for entry in entries:
+                record_result(entry['id'], entry['title'], cached)
+        journal.flush()
+        metrics.inc("titles_resolved_total", len(title_groups) - len(pending), source="cache")
+        log(self.title_cache.summary(self.max_batch_size))
+
+        # === LOCAL RULES ===
+        if self.rule_classifier is not None and pending:
+            resolved, ambiguous = self.rule_classifier.split([title_groups[key][0]['title'] for key in pending])
+            for pos, verdict in resolved.items():
+                entries = title_groups[pending[pos]]
+                # No translation happens here, so translated_title stays empty, as on the error path
+                result = {"translated_title": "", "verdict": verdict}
+                for entry in entries:
+                    record_result(entry['id'], entry['title'], result)
+            journal.flush()
+            metrics.inc("titles_resolved_total", len(resolved), source="rules")
+            relevant = sum(1 for verdict in resolved.values() if verdict == "RELEVANT")
+            log(f"🧭 Local rules resolved {len(resolved)}/{len(pending)} uncached titles "
+                f"({relevant} RELEVANT / {len(resolved) - relevant} NOT RELEVANT); {len(ambiguous)} ambiguous go to Gemini")
+            pending = [pending[pos] for pos in ambiguous]
+
+        # === NEAREST-NEIGHBOR REUSE ===
+        if self.title_index is not None and pending:
+            matches = self.title_index.query([title_groups[key][0]['title'] for key in pending], self.similarity_threshold)
+            novel = []
+            for key, (pos, score) in zip(pending, matches):
+                if pos is None:
+                    novel.append(key)
+                    continue
+                result = self.title_index.neighbor_result(pos)
+                for entry in title_groups[key]:
+                    record_result(entry['id'], entry['title'], result)
+            journal.flush()
+            metrics.inc("titles_resolved_total", len(pending) - len(novel), source="neighbors")
+            log(f"🧲 Reused verdicts of similar known titles for {len(pending) - len(novel)}/{len(pending)} titles "
+                f"(similarity >= {self.similarity_threshold}); {len(novel)} novel titles go to Gemini")
+            pending = novel
+
+        pending_titles = [title_groups[key][0]['title'] for key in pending]
+        batch_queue = BatchQueue(pending_titles, self.token_budget, self.max_batch_size)
+
+        def settle_batch(batch, results):
+            nonlocal request_count
+            if results is None:
+                batch_queue.restore(batch)
+                return
+            request_count += 1
+            log(f"📡 Gemini API request #{request_count} ({len(batch)} titles)")
+
+            # Match verdicts back by explicit index; only missing or malformed items are re-asked
+            matched, failed = batch_queue.settle(batch, results)
+            requeued = [item for item in batch if item["index"] not in matched and item["index"] not in failed]
+            metrics.inc("titles_resolved_total", len(matched), source="gemini")
+            if requeued:
+                metrics.inc("gemini_requeued_items_total", len(requeued))
+                shown = ", ".join(f"#{item['index']} '{item['title']}'" for item in requeued[:5])
+                more = f" and {len(requeued) - 5} more" if len(requeued) > 5 else ""
+                log(f"🔁 Re-asking {len(requeued)}/{len(batch)} items the response missed or garbled: {shown}{more}")
+            for idx in failed:
+                log(f"❌ Giving up on '{pending_titles[idx]}' after repeated malformed responses")
+                matched[idx] = {"translated_title": "", "verdict": "ERROR"}
+
+            self.title_cache.put_many((pending_titles[idx], result) for idx, result in matched.items())
+            for idx, result in matched.items():
+                # Fan the verdict back out to every id sharing this title
+                for entry in title_groups[pending[idx]]:
+                    record_result(entry['id'], entry['title'], result)
+            journal.flush()
+
+        # === SERIAL MODE ===
+        def run_serial():
+            while batch_queue and self.key_pool.remaining_today():
+                batch = batch_queue.next_batch()
+                settle_batch(batch, self.classify_batch(batch))
+
+        # === ASYNC MODE ===
+        async def run_async():
+            # Keep up to concurrency batches in flight; the shared rate limiter paces the actual calls
+            in_flight = {}
+            while batch_queue or in_flight:
+                while batch_queue and len(in_flight) < self.concurrency and self.key_pool.remaining_today():
+                    batch = batch_queue.next_batch()
+                    in_flight[asyncio.create_task(self.classify_batch_async(batch))] = batch
+                if not in_flight:
+                    break
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    settle_batch(in_flight.pop(task), task.result())
+
+        # === BULK MODE ===
+        def run_bulk():
+            # Every pending title goes out in one Batch API job; items it drops or garbles
+            # are re-queued and go out in a follow-up job, up to the usual re-queue limit
+            if self.batch_backend is None:
+                self.batch_backend = GenaiBatchBackend(self.api_keys[0], self.model_name)
+            runner = BatchJobRunner(self.batch_backend, lambda batch: build_prompt(batch, self.prompt_template),
+                                    batch_job_file, self.poll_interval,
+                                    response_schema=RESPONSE_SCHEMA if self.structured_output else None)
+            while batch_queue:
+                batches = []
+                while batch_queue:
+                    batches.append(batch_queue.next_batch())
+                try:
+                    pairs, unsent = runner.run(batches)
+                except (RuntimeError, TimeoutError) as e:
+                    log(f"❌ {e}")
+                    for batch in batches:
+                        batch_queue.restore(batch)
+                    return
+                batch_queue.restore(unsent)
+                for batch, text in pairs:
+                    self._record_batch(batch, build_prompt(batch, self.prompt_template))
+                    settle_batch(batch, parse_response(text) if text is not None else [])
+
         try:
-            response = model.generate_content(prompt)
-            raw = response.text.strip()
-            if not raw:
-                raise ValueError("Empty response from Gemini.")
-            first_bracket = raw.find("[")
-            last_bracket = raw.rfind("]") + 1
-            if first_bracket == -1 or last_bracket == -1:
-                raise ValueError("No JSON structure found in response.")
-            json_text = raw[first_bracket:last_bracket]
-            return json.loads(json_text)
-        except Exception as e:
-            err = str(e)
-            if "429" in err:
-                log("🚨 429 Rate limit hit. Sleeping 15s...")
-                time.sleep(15)
-            elif "504" in err or "Deadline Exceeded" in err:
-                log(f"⚠️ 504 Timeout. Retrying in 10s... (Attempt {attempt+1}/{retry_attempts})")
-                time.sleep(10)
+            if bulk:
+                log(f"📦 Classifying {len(pending)} uncached unique titles as a Gemini batch job (up to {self.max_batch_size} per request)...")
+                run_bulk()
+            elif use_async:
+                log(f"🔍 Classifying {len(pending)} uncached unique titles with {self.concurrency} concurrent requests (up to {self.max_batch_size} titles each)...")
+                asyncio.run(run_async())
             else:
-                log(f"❌ Gemini API error: {e}")
-                break
-    return [{"original_title": t, "translated_title": "", "verdict": "ERROR"} for t in titles]
-
-# === PROCESSING ===
-classified_results = []
-request_count = 0
-entry_count = 0
-
-log(f"🔍 Starting classification in batches of {BATCH_SIZE}...")
-
-for i in range(0, len(data), BATCH_SIZE):
-    if request_count >= MAX_RPD:
-        log("🛑 Max daily request limit (1500) reached. Stopping.")
-        break
-
-    batch = data[i:i+BATCH_SIZE]
-    titles = [entry['title'] for entry in batch]
-    ids = [entry['id'] for entry in batch]
-
-    time.sleep(SLEEP_TIME)  # Prevent 429
-    results = classify_batch(titles)
-    request_count += 1
-    log(f"📡 Gemini API request #{request_count}")
-
-    for j, result in enumerate(results):
-        entry_count += 1
-        id_ = ids[j]
-        title = titles[j]
-        translated = result.get("translated_title", "")
-        verdict = result.get("verdict", "ERROR")
-        classified_results.append({
-            "id": id_,
-            "title": title,
-            "translated_title": translated,
-            "classification": verdict
-        })
-        log(f"✅ {entry_count}/{len(data)} | {verdict} | {title}")
+                log(f"🔍 Classifying {len(pending)} uncached unique titles (up to {self.max_batch_size} per request)...")
+                run_serial()
+        finally:
+            if own_journal:
+                journal.close()
+
+        # A classifier shared across a manifest lets later companies reuse this call's Gemini verdicts
+        if cache_stamp is not None and self.title_cache.stamp() != cache_stamp:
+            self.title_index = TitleIndex.from_title_cache(self.title_cache, self.index_file)
+        if self.lead_store is not None:
+            self.lead_store.upsert_classifications(classified_results)
+        if batch_queue and bulk:
+            log(f"🛑 {len(batch_queue)} titles left unclassified; rerun to retry them.")
+        elif batch_queue:
+            log(f"🛑 Max daily request limit ({self.key_pool.daily_capacity}) reached. {len(batch_queue)} titles left unclassified.")
+        if not bulk:
+            log(f"📊 {self.key_pool.day_count} Gemini API calls used so far ({self.key_pool.summary()})")
+        # Results arrive journal, cache, rules, neighbors, then batch by batch; hand them back in input order
+        by_id = {record["id"]: record for record in classified_results}
+        return [by_id[entry["id"]] for entry in data if entry["id"] in by_id]
+
+    def close(self):
+        self.title_cache.close()
+        self.key_pool.close()
 
 # === SAVE CLASSIFIED DATA ===
-with open(CLASSIFIED_OUTPUT_FILE, "w", encoding="utf-8") as f:
-    json.dump(classified_results, f, indent=2, ensure_ascii=False)
+@metrics.staged("save_classified")
+def save_classified(classified_results, output_file=CLASSIFIED_OUTPUT_FILE):
+    if is_columnar(output_file):
+        writer = ColumnarWriter(output_file, CLASSIFIED_COLUMNS)
+        writer.write_many(classified_results)
+        writer.close()
+        return
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(classified_results, f, indent=2, ensure_ascii=False)
 
 # === KEYWORD EXTRACTION ===
-def extract_keywords(results, label):
-    counter = Counter()
-    for item in results:
-        if item["classification"] == label:
-            tokens = item["title"].lower().replace("/", " ").replace("-", " ").split()
-            counter.update(tokens)
-    top_keywords = counter.most_common(20)
-    print(f"\n🔑 Top 20 {label} Keywords:")
-    for word, count in top_keywords:
-        print(f"{word} ({count})")
-    return [word for word, _ in top_keywords]
-
-include_keywords = extract_keywords(classified_results, "RELEVANT")
-exclude_keywords = extract_keywords(classified_results, "NOT RELEVANT")
-
-with open("include_keywords.txt", "w", encoding="utf-8") as f:
-    f.write("\n".join(include_keywords))
-
-with open("exclude_keywords.txt", "w", encoding="utf-8") as f:
-    f.write("\n".join(exclude_keywords))
-
-log("🏁 Done. Unified classification and keywords saved.")
+@metrics.staged("keywords")
+def save_keywords(classified_results, include_file=INCLUDE_KEYWORDS_FILE, exclude_file=EXCLUDE_KEYWORDS_FILE):
+    # One pass counts both classes; terms are ranked by how well they separate them
+    return write_keywords(KeywordCounter().update(classified_results), include_file, exclude_file)
+
+# === LIBRARY ENTRY POINT ===
+def run_classification(input_file, api_key=None, output_file=CLASSIFIED_OUTPUT_FILE, journal_file=JOURNAL_FILE,
+                       include_file=INCLUDE_KEYWORDS_FILE, exclude_file=EXCLUDE_KEYWORDS_FILE, resume=False,
+                       use_async=False, classifier=None, bulk=False, batch_job_file=BATCH_JOB_FILE, entries=None,
+                       **classifier_options):
+    # Pass an existing classifier to share its quota and cache across calls, and entries
+    # (id/title dicts, e.g. from LeadStore.id_titles) to classify those instead of input_file
+    data = entries if entries is not None else load_entries(input_file)
+    own_classifier = classifier is None
+    if own_classifier:
+        classifier = GeminiTitleClassifier(api_key, **classifier_options)
+    try:
+        classified_results = classifier.classify(data, journal_file=journal_file, resume=resume, use_async=use_async,
+                                                 bulk=bulk, batch_job_file=batch_job_file)
+    finally:
+        if own_classifier:
+            classifier.close()
+    save_classified(classified_results, output_file)
+    save_keywords(classified_results, include_file, exclude_file)
+    return classified_results
+
+# === INTERACTIVE ENTRY POINT ===
+def build_arg_parser(description="Classify job titles as RELEVANT / NOT RELEVANT with Gemini."):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--resume", action="store_true",
+                        help=f"Continue from {JOURNAL_FILE}: skip classified ids and retry only ERROR entries")
+    parser.add_argument("--input", help="People id/title JSON file (prompted for when omitted)")
+    parser.add_argument("--async", dest="use_async", action="store_true", default=None,
+                        help="Keep several Gemini requests in flight (prompted for when omitted)")
+    parser.add_argument("--no-rules", dest="use_rules", action="store_false",
+                        help="Send every uncached title to Gemini instead of resolving clear-cut ones locally")
+    parser.add_argument("--no-neighbors", dest="use_neighbors", action="store_false",
+                        help=f"Do not reuse verdicts of near-identical titles from {CLASSIFIED_OUTPUT_FILE}")
+    parser.add_argument("--bulk", action="store_true",
+                        help=f"Submit every pending title as one Gemini batch job and poll it (job kept in {BATCH_JOB_FILE})")
+    return parser
+
+def main(prompt_template=PROMPT_TEMPLATE, max_rpm=MAX_RPM, rule_domains=None):
+    args = build_arg_parser().parse_args()
+    metrics.enable_from_env()
+    api_key = os.environ.get("GEMINI_API_KEY") or getpass.getpass("🔐 Enter your Gemini API Key (comma-separated to pool several): ").strip()
+    input_file = args.input or select_file()
+    try:
+        data = load_entries(input_file)
+    except Exception as e:
+        log(f"🛑 Failed to load JSON: {e}")
+        raise SystemExit
+
+    use_async = args.use_async
+    if use_async is None and not args.bulk:
+        use_async = input("⚡ Keep several Gemini requests in flight with asyncio? (y/n): ").strip().lower() == 'y'
+
+    lead_store = LeadStore()
+    classifier = GeminiTitleClassifier(api_key, prompt_template=prompt_template, max_rpm=max_rpm, use_rules=args.use_rules,
+                                       use_neighbors=args.use_neighbors, lead_store=lead_store, rule_domains=rule_domains)
+    try:
+        classified_results = classifier.classify(data, resume=args.resume, use_async=use_async, bulk=args.bulk)
+    finally:
+        classifier.close()
+        lead_store.close()
+
+    save_classified(classified_results)
+    save_keywords(classified_results)
+    log("🏁 Done. Unified classification and keywords saved.")
+
+if __name__ == "__main__":
+    main()
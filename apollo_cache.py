@@ -0,0 +1,141 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+# === CONFIGURATION ===
+APOLLO_CACHE_FILE = "apollo_cache.sqlite3"
+RESPONSE_CACHE_TTL = 7 * 24 * 3600  # Seconds a cached Apollo response stays valid
+
+# === CACHE KEY ===
+def request_key(endpoint, payload):
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(f"{endpoint}\n{canonical}".encode("utf-8")).hexdigest()
+
+# === SHARED CONNECTION ===
+def _connect(path):
+    # Fetch workers run in threads, so one connection is shared behind a lock
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+# === ON-DISK RESPONSE CACHE ===
+class ResponseCache:
+    def __init__(self, path=APOLLO_CACHE_FILE, ttl=RESPONSE_CACHE_TTL):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = _connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                request_key TEXT PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                body TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def get(self, endpoint, payload):
+        # Returns (body, age in seconds), or None when missing or older than ttl
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT body, fetched_at FROM responses WHERE request_key = ? AND fetched_at >= ?",
+                (request_key(endpoint, payload), time.time() - self.ttl),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0]), time.time() - row[1]
+
+    def put(self, endpoint, payload, body):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (request_key(endpoint, payload), endpoint, json.dumps(payload, sort_keys=True),
+                 json.dumps(body, ensure_ascii=False), time.time()),
+            )
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+# === PAGE-1 FINGERPRINT ===
+def page_digest(people):
+    # Order-independent digest of the person ids on a page
+    ids = sorted(str(p.get("id")) for p in people if p.get("id"))
+    return hashlib.sha256("\n".join(ids).encode("utf-8")).hexdigest()
+
+# === LOCAL STORE OF PEOPLE ALREADY PULLED ===
+class PeopleStore:
+    def __init__(self, path=APOLLO_CACHE_FILE):
+        self.conn = _connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS synced_people (
+                person_id TEXT NOT NULL,
+                org_id TEXT NOT NULL,
+                country TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                PRIMARY KEY (org_id, country, person_id)
+            )
+        """)
+        # What Apollo reported the last time every page of an org was pulled
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS org_snapshots (
+                org_id TEXT NOT NULL,
+                country TEXT NOT NULL,
+                total_entries INTEGER NOT NULL,
+                page1_digest TEXT NOT NULL,
+                synced_at REAL NOT NULL,
+                PRIMARY KEY (org_id, country)
+            )
+        """)
+        self.conn.commit()
+
+    def snapshots(self, org_ids, country):
+        # org_id -> (total_entries, page1_digest) from the last complete page-through
+        found = {}
+        for org_id in org_ids:
+            row = self.conn.execute(
+                "SELECT total_entries, page1_digest FROM org_snapshots WHERE org_id = ? AND country = ?",
+                (org_id, country),
+            ).fetchone()
+            if row is not None:
+                found[org_id] = tuple(row)
+        return found
+
+    def save_snapshot(self, org_id, country, total_entries, digest):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO org_snapshots VALUES (?, ?, ?, ?, ?)",
+            (org_id, country, total_entries, digest, time.time()),
+        )
+        self.conn.commit()
+
+    def filter_new(self, org_id, country, people):
+        ids = [p.get("id") for p in people if p.get("id")]
+        if not ids:
+            return list(people)
+        known = set()
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT person_id FROM synced_people WHERE org_id = ? AND country = ? AND person_id IN ({','.join('?' * len(chunk))})",
+                (org_id, country, *chunk),
+            )
+            known.update(row[0] for row in rows)
+        return [p for p in people if p.get("id") not in known]
+
+    def add_many(self, org_id, country, people):
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO synced_people VALUES (?, ?, ?, ?)",
+            [(p.get("id"), org_id, country, now) for p in people if p.get("id")],
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
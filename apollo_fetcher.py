@@ -0,0 +1,192 @@
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import metrics
+from lazy_import import LazyModule
+from rate_limiter import backoff_delay
+
+requests = LazyModule("requests")  # Imported when the first fetcher opens its session
+
+# === CONFIGURATION ===
+APOLLO_BASE_URL = "https://api.apollo.io/v1"
+ORG_SEARCH_PATH = "/organizations/search"
+PEOPLE_SEARCH_PATH = "/mixed_people/search"
+PER_PAGE = 100
+CONCURRENCY = 8  # Parallel Apollo requests across orgs and pages
+MAX_RETRIES = 5
+REQUEST_TIMEOUT = 60
+LOW_QUOTA_THRESHOLD = 2  # Pause when Apollo reports this few requests left in the minute
+
+# === POOLED, CONCURRENT APOLLO CLIENT ===
+class ApolloFetcher:
+    def __init__(self, api_key, concurrency=CONCURRENCY, base_url=APOLLO_BASE_URL, cache=None):
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache
+        self.concurrency = concurrency
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Cache-Control": "no-cache",
+            "Content-Type": "application/json",
+            "X-Api-Key": api_key
+        })
+        self.lock = threading.Lock()
+        self.api_hit_count = 0
+        self.latencies = []
+        self.throttled = 0
+        self.pause_until = 0.0  # Shared cool-down so every worker backs off together
+
+    # === LOW-LEVEL POST WITH RATE-LIMIT HANDLING ===
+    def post(self, path, payload, label="", use_cache=True):
+        # use_cache=False always asks Apollo, but still stores the fresh response
+        if self.cache is not None and use_cache:
+            cached = self.cache.get(path, payload)
+            if cached is not None:
+                body, age = cached
+                metrics.inc("apollo_cache_hits_total", endpoint=path)
+                print(f"🗃️ Served from cache: {label or path} (fetched {age / 3600:.1f} h ago; --refresh to re-fetch)")
+                return body
+        for attempt in range(MAX_RETRIES):
+            self._wait_for_cooldown()
+            start = time.perf_counter()
+            try:
+                response = self.session.post(self.base_url + path, data=json.dumps(payload), timeout=REQUEST_TIMEOUT)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._back_off(path, attempt, "connection", backoff_delay(attempt), type(e).__name__)
+                continue
+            latency = time.perf_counter() - start
+            with self.lock:
+                self.api_hit_count += 1
+                hit = self.api_hit_count
+                self.latencies.append(latency)
+            metrics.observe("apollo_request_seconds", latency, endpoint=path)
+            metrics.inc("apollo_requests_total", endpoint=path, status=response.status_code)
+            print(f"📡 API HIT #{hit}: {label or path} | HTTP {response.status_code} | {latency * 1000:.0f} ms")
+
+            if response.status_code == 429 or response.status_code >= 500:
+                reason = "429" if response.status_code == 429 else "504"
+                with self.lock:
+                    self.throttled += 1
+                delay = _retry_after(response.headers) or backoff_delay(attempt, reason)
+                self._back_off(path, attempt, reason, delay, f"HTTP {response.status_code}")
+                continue
+
+            self._track_rate_headers(response.headers)
+            try:
+                body = response.json()
+            except ValueError:
+                # An HTML error page or an empty body from a proxy in front of Apollo
+                self._back_off(path, attempt, "bad_body", backoff_delay(attempt), f"Unreadable HTTP {response.status_code} body")
+                continue
+            if self.cache is not None and response.status_code == 200:
+                self.cache.put(path, payload, body)
+            return body
+        raise RuntimeError(f"Apollo request failed after {MAX_RETRIES} attempts: {label or path}")
+
+    def _back_off(self, path, attempt, reason, delay, problem):
+        metrics.inc("apollo_retries_total", endpoint=path, reason=reason)
+        metrics.inc("apollo_backoff_seconds_total", delay, reason=reason)
+        self._pause(delay)
+        print(f"🚨 {problem} from Apollo. Backing off {delay:.1f}s... (Attempt {attempt+1}/{MAX_RETRIES})")
+
+    def _wait_for_cooldown(self):
+        while True:
+            with self.lock:
+                remaining = self.pause_until - time.monotonic()
+            if remaining <= 0:
+                return
+            metrics.inc("apollo_cooldown_wait_seconds_total", remaining)
+            time.sleep(remaining)
+
+    def _pause(self, seconds):
+        with self.lock:
+            self.pause_until = max(self.pause_until, time.monotonic() + seconds)
+
+    def _track_rate_headers(self, headers):
+        left = headers.get("x-minute-requests-left")
+        if left is not None and left.isdigit() and int(left) <= LOW_QUOTA_THRESHOLD:
+            print(f"⏳ Apollo reports {left} requests left this minute. Pausing until the window resets...")
+            self._pause(60)
+
+    # === ORGANIZATION SEARCH ===
+    def search_organizations(self, company_name, per_page=10):
+        payload = {"q_organization_name": company_name, "page": 1, "per_page": per_page}
+        data = self.post(ORG_SEARCH_PATH, payload, f"Searching organizations matching '{company_name}'")
+        return data.get("organizations", [])
+
+    # === PEOPLE SEARCH ===
+    def fetch_people_page(self, org_id, country, page, per_page=PER_PAGE, use_cache=True):
+        payload = {
+            "organization_ids": [org_id],
+            "per_page": per_page,
+            "page": page
+        }
+        if country:
+            payload["person_locations"] = [country]  # No country: people in every location
+        data = self.post(PEOPLE_SEARCH_PATH, payload, f"org {org_id} page {page}", use_cache)
+        total_entries = data.get("pagination", {}).get("total_entries", 0)
+        return data.get("people", []), total_entries
+
+    def iter_people_pages(self, org_ids, country, only_one_page=False, per_page=PER_PAGE, unchanged=None,
+                          on_synced=None):
+        # Yields (org_id, page, people) as pages complete. Page 1 of every org is
+        # requested up front; the remaining pages are queued once its total is known.
+        # unchanged(org_id, total_entries, first_page) -> True stops an org after page 1.
+        # With unchanged, every page goes to Apollo, since a cached copy cannot show a change.
+        # on_synced(org_id, total_entries, first_page) runs once every page of an org
+        # has been handed on, so a run that stops part-way records nothing.
+        use_cache = unchanged is None
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = {}
+            for org_id in org_ids:
+                futures[executor.submit(self.fetch_people_page, org_id, country, 1, per_page, use_cache)] = (org_id, 1)
+            first_pages = {}
+            remaining = {}
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    org_id, page = futures.pop(future)
+                    people, total_entries = future.result()
+                    if page == 1:
+                        up_to_date = unchanged is not None and unchanged(org_id, total_entries, people)
+                        if up_to_date:
+                            print(f"♻️ org {org_id}: {total_entries} people, same as the last full sync. Skipping remaining pages.")
+                        last_page = 1
+                        if people and not only_one_page and not up_to_date:
+                            last_page = -(-total_entries // per_page)
+                            for next_page in range(2, last_page + 1):
+                                next_future = executor.submit(self.fetch_people_page, org_id, country, next_page, per_page,
+                                                              use_cache)
+                                futures[next_future] = (org_id, next_page)
+                        first_pages[org_id] = (total_entries, people)
+                        remaining[org_id] = max(last_page, 1)
+                    yield org_id, page, people
+                    remaining[org_id] -= 1
+                    if remaining[org_id] == 0 and on_synced is not None and not only_one_page:
+                        on_synced(org_id, *first_pages.pop(org_id))
+
+    # === LATENCY REPORT ===
+    def latency_summary(self):
+        if not self.latencies:
+            return "⏱️ No Apollo requests made."
+        ordered = sorted(self.latencies)
+        p50 = ordered[len(ordered) // 2]
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return (f"⏱️ Apollo latency over {len(ordered)} requests: "
+                f"p50 {p50 * 1000:.0f} ms | p95 {p95 * 1000:.0f} ms | max {ordered[-1] * 1000:.0f} ms | "
+                f"{self.throttled} throttled")
+
+    def close(self):
+        self.session.close()
+
+# === RETRY-AFTER HEADER ===
+def _retry_after(headers):
+    value = headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
@@ -1,123 +1,214 @@
-import requests
 import json
+import os
+import metrics
+from apollo_cache import APOLLO_CACHE_FILE, RESPONSE_CACHE_TTL, PeopleStore, ResponseCache, page_digest
+from apollo_fetcher import APOLLO_BASE_URL, CONCURRENCY, ApolloFetcher
+from columnar_store import ID_TITLE_COLUMNS, PEOPLE_COLUMNS, PEOPLE_DERIVED, PEOPLE_JSON_COLUMNS, ColumnarWriter
+from columnar_store import available as columnar_available
+from lead_store import LeadStore
+from stream_io import JSONArrayWriter, NDJSONWriter
+
+# === CONFIGURATION ===
+PEOPLE_JSON_FILE = "full_people_data.json"
+PEOPLE_NDJSON_FILE = "full_people_data.ndjson"
+ID_TITLE_FILE = "people_id_title.json"
+PEOPLE_PARQUET_FILE = "full_people_data.parquet"  # Columnar output, needs pyarrow
+ID_TITLE_PARQUET_FILE = "people_id_title.parquet"
+
+def id_title(person):
+    return {"id": person.get("id"), "title": person.get("title")}
+
+# === ORG SELECTION ===
+def select_org_ids(orgs, selected_idx=""):
+    # selected_idx: comma-separated indices into orgs, blank for all
+    if isinstance(selected_idx, (list, tuple)):
+        indices = [int(i) for i in selected_idx]
+    elif str(selected_idx).strip() == "":
+        return [org.get("id") for org in orgs]
+    else:
+        indices = [int(i.strip()) for i in str(selected_idx).split(",") if i.strip().isdigit()]
+    return [orgs[i].get("id") for i in indices]
+
+# === APOLLO SYNC SESSION ===
+class ApolloSync:
+    # Bundles the pooled fetcher, the response cache and the people store so a
+    # manifest of many companies reuses one connection pool and one cache.
+    # lead_store: an optional lead_store.LeadStore every org and page is upserted into
+    def __init__(self, api_key, concurrency=CONCURRENCY, cache_file=APOLLO_CACHE_FILE,
+                 ttl=RESPONSE_CACHE_TTL, base_url=APOLLO_BASE_URL, lead_store=None):
+        self.lead_store = lead_store
+        self.response_cache = ResponseCache(cache_file, ttl=ttl)
+        self.people_store = PeopleStore(cache_file)
+        self.fetcher = ApolloFetcher(api_key, concurrency=concurrency, base_url=base_url, cache=self.response_cache)
+
+    @metrics.staged("search_organizations")
+    def search_organizations(self, company_name):
+        print(f"\n🔎 Searching for organizations matching '{company_name}'")
+        orgs = self.fetcher.search_organizations(company_name)
+        if self.lead_store is not None:
+            self.lead_store.upsert_orgs(orgs)
+        return orgs
+
+    # === PEOPLE SEARCH ===
+    def people_pages(self, org_ids, country, only_one_page=False, incremental=False):
+        # Every org's first page is fetched in parallel; later pages are queued as soon as
+        # the org's total is known, all over one pooled session. Every page is recorded
+        # in the local people store; in incremental mode only people not seen before
+        # for this org and country are passed on. An org is only left at page 1 when both
+        # its total and the ids on its first page match the last full sync, since people
+        # leaving and joining can keep the total unchanged.
+        unchanged = None
+        if incremental:
+            snapshots = self.people_store.snapshots(org_ids, country)
+            unchanged = lambda org_id, total, first_page: snapshots.get(org_id) == (total, page_digest(first_page))
+        on_synced = lambda org_id, total, first_page: self.people_store.save_snapshot(
+            org_id, country, total, page_digest(first_page))
+        for org_id, page, people in self.fetcher.iter_people_pages(org_ids, country, only_one_page,
+                                                                   unchanged=unchanged, on_synced=on_synced):
+            # Everyone on the page is still there, so last_seen moves before the new-only filter
+            if self.lead_store is not None:
+                self.lead_store.upsert_people(people, org_id)
+            if incremental:
+                people = self.people_store.filter_new(org_id, country, people)
+            self.people_store.add_many(org_id, country, people)
+            yield org_id, page, people
+
+    @metrics.staged("fetch_people")
+    def save_people(self, org_ids, country, org_names=None, only_one_page=False, stream_output=False,
+                    incremental=False, output_dir=".", columnar=False):
+        org_names = org_names or {}
+        id_title_file = os.path.join(output_dir, ID_TITLE_PARQUET_FILE if columnar else ID_TITLE_FILE)
+        pages = self.people_pages(org_ids, country, only_one_page, incremental)
+
+        if stream_output or columnar:
+            # Raw people and the id/title projection are written in the same pass; nothing is kept in memory
+            if columnar:
+                people_file = os.path.join(output_dir, PEOPLE_PARQUET_FILE)
+                people_writer = ColumnarWriter(people_file, PEOPLE_COLUMNS, PEOPLE_JSON_COLUMNS, PEOPLE_DERIVED)
+                id_title_writer = ColumnarWriter(id_title_file, ID_TITLE_COLUMNS)
+            else:
+                people_file = os.path.join(output_dir, PEOPLE_NDJSON_FILE)
+                people_writer = NDJSONWriter(people_file)
+                id_title_writer = JSONArrayWriter(id_title_file)
+            org_counts = {org_id: [0, 0] for org_id in org_ids}
+
+            for org_id, page, people in pages:
+                people_writer.write_many(people)
+                id_title_writer.write_many(id_title(p) for p in people)
+                org_counts[org_id][0] += len(people)
+                org_counts[org_id][1] += 1
+
+            people_writer.close()
+            id_title_writer.close()
+            total_people = people_writer.count
+            for org_id, (found, page_count) in org_counts.items():
+                print(f"🔍 Org: {org_names.get(org_id, 'Unknown Org')} | ID: {org_id} | Found: {found} people across {page_count} pages")
+        else:
+            people_file = os.path.join(output_dir, PEOPLE_JSON_FILE)
+            pages_by_org = {org_id: {} for org_id in org_ids}
+
+            for org_id, page, people in pages:
+                pages_by_org[org_id][page] = people
+
+            all_people = []
+            for org_id in org_ids:
+                org_pages = pages_by_org[org_id]
+                for page in sorted(org_pages):
+                    all_people.extend(org_pages[page])
+                print(f"🔍 Org: {org_names.get(org_id, 'Unknown Org')} | ID: {org_id} | Found: {sum(len(p) for p in org_pages.values())} people across {len(org_pages)} pages")
+            total_people = len(all_people)
+
+            with open(people_file, "w", encoding="utf-8") as f:
+                json.dump(all_people, f, indent=2, ensure_ascii=False)
+
+            # === Extract Only 'id' and 'title' (from memory, no re-read) ===
+            with open(id_title_file, "w", encoding="utf-8") as f:
+                json.dump([id_title(p) for p in all_people], f, indent=2, ensure_ascii=False)
+
+        metrics.inc("people_fetched_total", total_people)
+        print(f"\n👥 Total {'new ' if incremental else ''}people fetched: {total_people}")
+        print(f"💾 Data saved to '{people_file}'")
+        print(f"✅ Filtered file with 'id' and 'title' saved as '{id_title_file}'")
+        return {"people_file": people_file, "id_title_file": id_title_file, "total_people": total_people}
+
+    def report(self):
+        print(f"📊 Total API hits made (including org search): {self.fetcher.api_hit_count}")
+        print(self.fetcher.latency_summary())
+        print(f"🗃️ Response cache: {self.response_cache.hits} hits / {self.response_cache.misses} misses")
+
+    def close(self):
+        self.fetcher.close()
+        self.response_cache.close()
+        self.people_store.close()
+
+# === LIBRARY ENTRY POINT ===
+def run_fetch(api_key, country, company_name, org_indices="", only_one_page=False, stream_output=False,
+              incremental=False, output_dir=".", sync=None, columnar=False, **sync_options):
+    # Pass an existing ApolloSync to share its connection pool and caches across calls
+    own_sync = sync is None
+    if own_sync:
+        sync = ApolloSync(api_key, **sync_options)
+    try:
+        orgs = sync.search_organizations(company_name)
+        if not orgs:
+            raise LookupError(f"No organizations found for '{company_name}'")
+        org_ids = select_org_ids(orgs, org_indices)
+        org_names = {org.get("id"): org.get("name", "Unknown Org") for org in orgs}
+        summary = sync.save_people(org_ids, country, org_names, only_one_page, stream_output, incremental, output_dir,
+                                   columnar)
+        summary["org_ids"] = org_ids
+        return summary
+    finally:
+        if own_sync:
+            sync.report()
+            sync.close()
+
+# === INTERACTIVE ENTRY POINT ===
+def main():
+    # === 1. API Key and Setup ===
+    metrics.enable_from_env()
+    api_key = os.environ.get("APOLLO_API_KEY") or input("🔐 Enter your Apollo API Key: ").strip()
+    lead_store = LeadStore()
+    sync = ApolloSync(api_key, lead_store=lead_store)
+
+    # === 2. Input: Country and Company Name ===
+    country = input("🌍 Enter Country (e.g., USA): ").strip()
+    company_name = input("🏢 Enter Company Name (e.g., Cemex): ").strip()
+
+    # === 3. Search for Matching Organizations ===
+    orgs = sync.search_organizations(company_name)
+    if not orgs:
+        print("⚠️ No organizations found.")
+        exit()
+
+    print(f"\n✅ Found {len(orgs)} matching organizations:\n")
+    for idx, org in enumerate(orgs):
+        print(f"{idx:02d}. 🏢 {org.get('name')} | 🌐 {org.get('website_url')} | 🌍 {org.get('location_country')}")
+        print(f"     🔑 ID: {org.get('id')}\n")
 
-# === 1. API Key and Setup ===
-API_KEY = input("🔐 Enter your Apollo API Key: ").strip()
-HEADERS = {
-    "Cache-Control": "no-cache",
-    "Content-Type": "application/json",
-    "X-Api-Key": API_KEY
-}
-
-# === 2. Input: Country and Company Name ===
-country = input("🌍 Enter Country (e.g., USA): ").strip()
-company_name = input("🏢 Enter Company Name (e.g., Cemex): ").strip()
-
-# === 3. Search for Matching Organizations ===
-print(f"\n📡 API HIT #1: Searching for organizations matching '{company_name}'")
-org_search_url = "https://api.apollo.io/v1/organizations/search"
-org_payload = {
-    "q_organization_name": company_name,
-    "page": 1,
-    "per_page": 10
-}
-
-org_response = requests.post(org_search_url, headers=HEADERS, data=json.dumps(org_payload))
-api_hit_count = 1
-
-orgs = org_response.json().get("organizations", [])
-if not orgs:
-    print("⚠️ No organizations found.")
-    exit()
-
-print(f"\n✅ Found {len(orgs)} matching organizations:\n")
-for idx, org in enumerate(orgs):
-    print(f"{idx:02d}. 🏢 {org.get('name')} | 🌐 {org.get('website_url')} | 🌍 {org.get('location_country')}")
-    print(f"     🔑 ID: {org.get('id')}\n")
-
-# # === 4. Org Selection ===
-# selected_idx = input("🔢 Enter org index (leave blank for all): ").strip()
-# if selected_idx == "":
-#     selected_org_ids = [org.get("id") for org in orgs]
-#     org_label = f"ALL matched '{company_name}' orgs"
-# else:
-#     selected_org_ids = [orgs[int(selected_idx)].get("id")]
-#     org_label = orgs[int(selected_idx)].get("name")
-
-selected_idx = input("🔢 Enter org index (comma-separated for multiple, leave blank for all): ").strip()
-
-if selected_idx == "":
-    selected_org_ids = [org.get("id") for org in orgs]
-    org_label = f"ALL matched '{company_name}' orgs"
-else:
+    # === 4. Org Selection ===
+    selected_idx = input("🔢 Enter org index (comma-separated for multiple, leave blank for all): ").strip()
     try:
-        indices = [int(i.strip()) for i in selected_idx.split(",") if i.strip().isdigit()]
-        selected_org_ids = [orgs[i].get("id") for i in indices]
-        org_label = ", ".join([orgs[i].get("name") for i in indices])
+        selected_org_ids = select_org_ids(orgs, selected_idx)
     except Exception as e:
         print(f"❌ Invalid input. Please enter valid index numbers. Error: {e}")
         exit()
 
-# === 5. Choose API Call Depth ===
-only_one_page = input("📄 Fetch ONLY ONE PAGE per org? (y/n): ").strip().lower() == 'y'
-
-# === 6. People Search ===
-people_url = "https://api.apollo.io/v1/mixed_people/search"
-all_people = []
-
-for org_id in selected_org_ids:
-    org_info = next((o for o in orgs if o.get("id") == org_id), {})
-    org_name = org_info.get("name", "Unknown Org")
-
-    page = 1
-    per_page = 100
-
-    while True:
-        print(f"📡 API HIT #{api_hit_count + 1}: Fetching page {page} for org '{org_name}'...")
-        people_payload = {
-            "organization_ids": [org_id],
-            "person_locations": [country],
-            "per_page": per_page,
-            "page": page
-        }
-
-        response = requests.post(people_url, headers=HEADERS, data=json.dumps(people_payload))
-        api_hit_count += 1
-
-        data = response.json()
-        people = data.get("people", [])
-        pagination = data.get("pagination", {})
-        total_entries = pagination.get("total_entries", 0)
-
-        if not people:
-            break
-
-        # Append full raw person data
-        all_people.extend(people)
-
-        if only_one_page or page * per_page >= total_entries:
-            break
-        page += 1
-
-    print(f"🔍 Org: {org_name} | ID: {org_id} | Found: {len(people)} people on page {page}")
-
-# === 7. Save Results and Final API Hit Count ===
-print(f"\n👥 Total people fetched: {len(all_people)}")
-print(f"📊 Total API hits made (including org search): {api_hit_count}")
-with open("full_people_data.json", "w", encoding="utf-8") as f:
-    json.dump(all_people, f, indent=2, ensure_ascii=False)
-print("💾 Data saved to 'full_people_data.json'")
-
-# === 8. Extract Only 'id' and 'title' from Saved Data ===
-filtered_filename = "people_id_title.json"
-
-with open("full_people_data.json", "r", encoding="utf-8") as f:
-    raw_people = json.load(f)
-
-filtered_people = [{"id": p.get("id"), "title": p.get("title")} for p in raw_people]
-
-with open(filtered_filename, "w", encoding="utf-8") as f:
-    json.dump(filtered_people, f, indent=2, ensure_ascii=False)
-
-print(f"✅ Filtered file with 'id' and 'title' saved as '{filtered_filename}'")
+    # === 5. Choose API Call Depth and Output Mode ===
+    only_one_page = input("📄 Fetch ONLY ONE PAGE per org? (y/n): ").strip().lower() == 'y'
+    stream_output = input("💧 Stream people to NDJSON as pages arrive (flat memory)? (y/n): ").strip().lower() == 'y'
+    incremental = input("♻️ Incremental sync: keep only people not already pulled for this org and country? (y/n): ").strip().lower() == 'y'
+    columnar = columnar_available() and input("🗜️ Save compressed Parquet files instead of JSON? (y/n): ").strip().lower() == 'y'
 
+    # === 6. People Search and 7. Final API Hit Count ===
+    org_names = {org.get("id"): org.get("name", "Unknown Org") for org in orgs}
+    try:
+        sync.save_people(selected_org_ids, country, org_names, only_one_page, stream_output, incremental, columnar=columnar)
+    finally:
+        sync.report()
+        sync.close()
+        print(lead_store.summary())
+        lead_store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+from collections import deque
+
+# === CONFIGURATION ===
+BATCH_TOKEN_BUDGET = 6000  # Input + expected output tokens spent on titles per request
+MAX_BATCH_SIZE = 200
+MIN_BATCH_SIZE = 1
+CHARS_PER_TOKEN = 4
+ITEM_OVERHEAD_TOKENS = 25  # JSON keys, index and verdict per returned item
+MAX_REQUEUES = 2
+VALID_VERDICTS = {"RELEVANT", "NOT RELEVANT"}
+
+# === TOKEN ESTIMATE ===
+def estimate_tokens(text):
+    return len(text or "") // CHARS_PER_TOKEN + 1
+
+def item_cost(title):
+    # Title is sent once and echoed back twice (original + translated)
+    return 3 * estimate_tokens(title) + ITEM_OVERHEAD_TOKENS
+
+# === BATCH QUEUE ===
+class BatchQueue:
+    def __init__(self, titles, token_budget=BATCH_TOKEN_BUDGET, max_batch_size=MAX_BATCH_SIZE,
+                 max_requeues=MAX_REQUEUES):
+        # titles: list of strings; a title's position is its explicit index in the prompt
+        self.titles = titles
+        self.token_budget = token_budget
+        self.max_batch_size = max_batch_size
+        self.max_requeues = max_requeues
+        self.queue = deque(range(len(titles)))
+        self.requeues = {}
+
+    def __bool__(self):
+        return bool(self.queue)
+
+    def __len__(self):
+        return len(self.queue)
+
+    def next_batch(self):
+        batch = []
+        spent = 0
+        while self.queue and len(batch) < self.max_batch_size:
+            cost = item_cost(self.titles[self.queue[0]])
+            if len(batch) >= MIN_BATCH_SIZE and spent + cost > self.token_budget:
+                break
+            batch.append(self.queue.popleft())
+            spent += cost
+        return [{"index": idx, "title": self.titles[idx]} for idx in batch]
+
+    def restore(self, batch):
+        # Put an unsent batch back at the front without counting it as a re-queue
+        self.queue.extendleft(reversed([item["index"] for item in batch]))
+
+    def settle(self, batch, results):
+        # Returns (matched, failed): matched maps index -> result, failed lists
+        # indices that ran out of re-queues. Everything else goes back in the queue.
+        expected = {item["index"] for item in batch}
+        matched = {}
+        for result in results if isinstance(results, list) else []:
+            if not isinstance(result, dict):
+                continue
+            idx = result.get("index")
+            if isinstance(idx, str) and idx.strip().isdigit():
+                idx = int(idx)
+            if idx not in expected or idx in matched:
+                continue
+            if result.get("verdict") not in VALID_VERDICTS and result.get("verdict") != "ERROR":
+                continue
+            matched[idx] = result
+
+        failed = []
+        for idx in sorted(expected - matched.keys()):
+            self.requeues[idx] = self.requeues.get(idx, 0) + 1
+            if self.requeues[idx] > self.max_requeues:
+                failed.append(idx)
+            else:
+                self.queue.append(idx)
+        return matched, failed
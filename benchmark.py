@@ -0,0 +1,307 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import metrics
+from log_util import log
+from LLM_calling_script import GeminiTitleClassifier, run_classification
+from apollo_cache import APOLLO_CACHE_FILE
+from apollo_lead_gen_automation import ApolloSync, run_fetch
+from final_filteration_mapping import filter_relevant
+from gemini_batch import BATCH_JOB_FILE
+from journal import JOURNAL_FILE
+from json_to_csv_convertor import convert
+from key_pool import KEY_USAGE_FILE
+from lead_store import LEAD_STORE_FILE, LeadStore
+from pipeline import run_pipelined
+from mock_services import MockApolloServer, MockBatchBackend, MockGeminiModel
+from title_cache import CACHE_DB_FILE
+from title_index import TITLE_INDEX_FILE
+
+# === CONFIGURATION ===
+RESULTS_FILE = "benchmarks.jsonl"
+COMPARED_METRICS = ["seconds", "import_ms", "people_per_sec", "titles_per_sec", "calls_per_1k_titles", "peak_mb"]
+
+# --startup: the module each entry point loads before doing any work, timed in a fresh interpreter
+STARTUP_TARGETS = {
+    "cli": "leadgen_cli",
+    "filter": "final_filteration_mapping",
+    "export": "json_to_csv_convertor",
+    "fetch": "apollo_lead_gen_automation",
+    "classify": "LLM_calling_script",
+}
+HEAVY_MODULES = ["google.generativeai", "google.genai", "pyarrow", "numpy", "requests", "asyncio"]
+STARTUP_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"import_ms": (time.perf_counter() - start) * 1000,
+                  "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+# === MEASUREMENT ===
+def measure(fn, trace_memory=True, quiet=True):
+    # Returns (result, seconds, peak traced MB); stage output is swallowed unless quiet=False
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+            result = fn()
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20 if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    return result, seconds, peak
+
+def rate(count, seconds):
+    return round(count / seconds, 1) if seconds else None
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+# === PIPELINE BENCHMARK ===
+def run_benchmark(workdir, orgs=5, people_per_org=500, apollo_latency=0.05, apollo_429=0.0, apollo_504=0.0,
+                  gemini_latency=0.2, gemini_429=0.0, gemini_504=0.0, gemini_truncate=0.0, concurrency=8, gemini_concurrency=4,
+                  use_async=True, token_budget=None, max_batch_size=None, max_rpm=10_000, use_rules=True,
+                  use_neighbors=True, columnar=False, bulk=False, pipelined=False, store=False, seed=0, trace_memory=True, quiet=True):
+    # fetch -> classify -> filter -> export against the local stand-ins; returns per-stage metrics,
+    # or a single "pipeline" entry when the stages run concurrently
+    os.makedirs(workdir, exist_ok=True)
+    path = lambda name: os.path.join(workdir, name)
+    ext = ".parquet" if columnar else ".json"
+    stages = {}
+
+    model = MockGeminiModel(gemini_latency, rate_429=gemini_429, rate_504=gemini_504, seed=seed,
+                            rate_truncate=gemini_truncate)
+    batch_backend = MockBatchBackend(rate_error=gemini_504, seed=seed) if bulk else None
+    options = {"max_batch_size": max_batch_size, "token_budget": token_budget}
+    lead_store = LeadStore(path(LEAD_STORE_FILE)) if store else None
+    classifier = GeminiTitleClassifier(
+        "mock-key", model=model, max_rpm=max_rpm, concurrency=gemini_concurrency, cache_file=path(CACHE_DB_FILE),
+        use_rules=use_rules, include_file=path("include_keywords.txt"), exclude_file=path("exclude_keywords.txt"),
+        use_neighbors=use_neighbors, index_file=path(TITLE_INDEX_FILE),
+        usage_file=path(KEY_USAGE_FILE), batch_backend=batch_backend, poll_interval=0.05, lead_store=lead_store,
+        **{k: v for k, v in options.items() if v is not None})
+
+    with MockApolloServer(orgs, people_per_org, apollo_latency, rate_429=apollo_429, rate_504=apollo_504,
+                          retry_after=0.5, seed=seed) as apollo:
+        sync = ApolloSync("mock-key", concurrency=concurrency, cache_file=path(APOLLO_CACHE_FILE), base_url=apollo.url,
+                           lead_store=lead_store)
+        if pipelined:
+            try:
+                result, seconds, peak = measure(
+                    lambda: run_pipelined("Benchmark Co", "India", workdir, sync, classifier, use_async=use_async,
+                                          columnar=columnar),
+                    trace_memory, quiet)
+            finally:
+                sync.close()
+                classifier.close()
+            stages["pipeline"] = {"seconds": round(seconds, 3), "people": result["people"],
+                                  "people_per_sec": rate(result["people"], seconds), "titles": result["classified"],
+                                  "titles_per_sec": rate(result["classified"], seconds),
+                                  "calls_per_1k_titles": round(1000 * model.calls / result["classified"], 2) if result["classified"] else None,
+                                  "relevant": result["relevant"], "rows": result["exported_rows"],
+                                  "api_calls": apollo.calls + model.calls, "peak_mb": peak and round(peak, 1)}
+            if lead_store is not None:
+                stages["leads"] = query_leads(lead_store, trace_memory, quiet)
+            return stages
+        try:
+            fetched, seconds, peak = measure(
+                lambda: run_fetch(None, "India", "Benchmark Co", "", False, True, False, workdir, sync=sync,
+                                  columnar=columnar),
+                trace_memory, quiet)
+        finally:
+            sync.close()
+        stages["fetch"] = {"seconds": round(seconds, 3), "people": fetched["total_people"],
+                           "people_per_sec": rate(fetched["total_people"], seconds), "api_calls": apollo.calls,
+                           "injected_faults": dict(apollo.faults.injected), "peak_mb": peak and round(peak, 1)}
+
+    try:
+        classified, seconds, peak = measure(
+            lambda: run_classification(fetched["id_title_file"], output_file=path("classified_titles" + ext),
+                                       journal_file=path(JOURNAL_FILE),
+                                       include_file=path("include_keywords.txt"), exclude_file=path("exclude_keywords.txt"),
+                                       use_async=use_async, classifier=classifier, bulk=bulk,
+                                       batch_job_file=path(BATCH_JOB_FILE)),
+            trace_memory, quiet)
+    finally:
+        classifier.close()
+    titles = len(classified)
+    if bulk:
+        model = batch_backend.model
+    stages["classify"] = {"seconds": round(seconds, 3), "titles": titles, "titles_per_sec": rate(titles, seconds),
+                          "api_calls": model.calls, "titles_sent": model.titles_seen,
+                          "calls_per_1k_titles": round(1000 * model.calls / titles, 2) if titles else None,
+                          "injected_faults": dict(model.faults.injected, truncated=model.truncated), "peak_mb": peak and round(peak, 1)}
+
+    relevant, seconds, peak = measure(
+        lambda: filter_relevant(path("classified_titles" + ext), fetched["people_file"],
+                                path("filtered_relevant_entries" + ext), path("filtered_relevant_entries.csv")),
+        trace_memory, quiet)
+    stages["filter"] = {"seconds": round(seconds, 3), "people": fetched["total_people"], "relevant": relevant,
+                        "people_per_sec": rate(fetched["total_people"], seconds), "peak_mb": peak and round(peak, 1)}
+
+    rows, seconds, peak = measure(lambda: convert(fetched["people_file"], path("output.csv")), trace_memory, quiet)
+    stages["export"] = {"seconds": round(seconds, 3), "people": fetched["total_people"], "rows": rows,
+                        "people_per_sec": rate(fetched["total_people"], seconds), "peak_mb": peak and round(peak, 1)}
+    if lead_store is not None:
+        stages["leads"] = query_leads(lead_store, trace_memory, quiet)
+    return stages
+
+def query_leads(lead_store, trace_memory=True, quiet=True):
+    # The indexed RELEVANT-by-country query the lead store replaces the filter stage's reparse with
+    try:
+        leads, seconds, peak = measure(lambda: sum(1 for _ in lead_store.relevant_leads(country="India")),
+                                       trace_memory, quiet)
+    finally:
+        lead_store.close()
+    return {"seconds": round(seconds, 3), "relevant": leads, "peak_mb": peak and round(peak, 1)}
+
+# === STARTUP BENCHMARK ===
+def startup_benchmark(runs=9):
+    # Median wall time of a fresh interpreter importing each entry point (what a scheduler
+    # pays per small job before any work starts) and which heavy dependencies it pulled in
+    here = os.path.dirname(os.path.abspath(__file__))
+    baseline = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True, cwd=here)
+        baseline.append(time.perf_counter() - start)
+    stages = {"python": {"seconds": round(statistics.median(baseline), 4)}}
+    for name, module in STARTUP_TARGETS.items():
+        walls, imports, heavy = [], [], []
+        for _ in range(runs):
+            start = time.perf_counter()
+            probe = subprocess.run([sys.executable, "-c", STARTUP_PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                                   capture_output=True, text=True, check=True, cwd=here)
+            walls.append(time.perf_counter() - start)
+            result = json.loads(probe.stdout.strip().splitlines()[-1])
+            imports.append(result["import_ms"])
+            heavy = result["heavy"]
+        stages[f"start_{name}"] = {"seconds": round(statistics.median(walls), 4),
+                                   "import_ms": round(statistics.median(imports), 1), "heavy_modules": heavy}
+    return stages
+
+# === RESULTS LOG ===
+def load_results(results_file):
+    if not os.path.exists(results_file):
+        return []
+    with open(results_file, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def previous_run(results, config, label=None):
+    # Latest earlier run with the same label, or else with identical settings
+    for record in reversed(results):
+        if (label and record.get("label") == label) or (not label and record.get("config") == config):
+            return record
+    return None
+
+def print_report(record, baseline=None):
+    label = f" '{record['label']}'" if record["label"] else ""
+    print(f"\n🏁 Benchmark{label} @ {record['commit'] or 'uncommitted'}"
+          + (f" vs {baseline['commit'] or '?'} ({baseline['timestamp']})" if baseline else ""))
+    for stage, stage_metrics in record["stages"].items():
+        parts = []
+        for name in COMPARED_METRICS:
+            value = stage_metrics.get(name)
+            if value is None:
+                continue
+            text = f"{name}={value}"
+            old = (baseline or {}).get("stages", {}).get(stage, {}).get(name)
+            if old:
+                text += f" ({(value - old) / old * 100:+.1f}%)"
+            parts.append(text)
+        if stage_metrics.get("heavy_modules"):
+            parts.append("loads " + ", ".join(stage_metrics["heavy_modules"]))
+        print(f"  {stage:<9} " + " | ".join(parts))
+    print(f"  peak RSS {record['peak_rss_mb']} MB | total {record['total_seconds']} s")
+
+# === COMMAND-LINE INTERFACE ===
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage against local Apollo and Gemini stand-ins.")
+    parser.add_argument("--label", help="Name for this run; compared with the previous run of the same label")
+    parser.add_argument("--results", default=RESULTS_FILE, help=f"JSON-lines file results are appended to (default: {RESULTS_FILE})")
+    parser.add_argument("--workdir", help="Keep the run's files here instead of a temporary directory")
+    parser.add_argument("--orgs", type=int, default=5)
+    parser.add_argument("--people-per-org", type=int, default=500)
+    parser.add_argument("--apollo-latency", type=float, default=0.05, help="Seconds per Apollo request")
+    parser.add_argument("--apollo-429", type=float, default=0.0, help="Share of Apollo requests answered with 429")
+    parser.add_argument("--apollo-504", type=float, default=0.0, help="Share of Apollo requests answered with 504")
+    parser.add_argument("--gemini-latency", type=float, default=0.2, help="Seconds per Gemini call")
+    parser.add_argument("--gemini-429", type=float, default=0.0)
+    parser.add_argument("--gemini-504", type=float, default=0.0)
+    parser.add_argument("--gemini-truncate", type=float, default=0.0, help="Share of Gemini replies cut off mid-item")
+    parser.add_argument("--concurrency", type=int, default=8, help="Parallel Apollo requests")
+    parser.add_argument("--gemini-concurrency", type=int, default=4)
+    parser.add_argument("--serial", dest="use_async", action="store_false", help="Classify one batch at a time")
+    parser.add_argument("--token-budget", type=int)
+    parser.add_argument("--max-batch-size", type=int)
+    parser.add_argument("--max-rpm", type=int, default=10_000)
+    parser.add_argument("--no-rules", dest="use_rules", action="store_false")
+    parser.add_argument("--no-neighbors", dest="use_neighbors", action="store_false")
+    parser.add_argument("--columnar", action="store_true")
+    parser.add_argument("--bulk", action="store_true", help="Classify through a stand-in Gemini batch job")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="Run fetch, classify, filter and export concurrently and time them end to end")
+    parser.add_argument("--store", action="store_true", help="Also upsert into a lead store and time the RELEVANT query")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", dest="trace_memory", action="store_false",
+                        help="Skip tracemalloc (faster, but no per-stage peak memory)")
+    parser.add_argument("--verbose", dest="quiet", action="store_false", help="Show each stage's own output")
+    parser.add_argument("--metrics-file", help="Also write the run's detailed metrics (.prom or JSON lines)")
+    parser.add_argument("--startup", action="store_true",
+                        help="Only time interpreter startup and imports for each entry point")
+    parser.add_argument("--startup-runs", type=int, default=9, help="Fresh interpreters per entry point with --startup")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    config = {k: v for k, v in vars(args).items() if k not in ("label", "results", "workdir", "quiet", "metrics_file")}
+    metrics.enable(args.metrics_file)
+    start = time.perf_counter()
+    if args.startup:
+        config = {"startup_runs": args.startup_runs}
+        log(f"⏱️ Timing startup of {len(STARTUP_TARGETS)} entry points, {args.startup_runs} runs each")
+        stages = startup_benchmark(args.startup_runs)
+    else:
+        config = {k: v for k, v in config.items() if k not in ("startup", "startup_runs")}
+        with tempfile.TemporaryDirectory(prefix="leadgen_bench_") as tmp:
+            workdir = args.workdir or tmp
+            log(f"⏱️ Benchmarking {args.orgs} orgs x {args.people_per_org} people in {workdir}")
+            stages = run_benchmark(workdir, **config, quiet=args.quiet)
+
+    record = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "label": args.label,
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "config": config,
+        "stages": stages,
+        "total_seconds": round(time.perf_counter() - start, 3),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    baseline = previous_run(load_results(args.results), config, args.label)
+    with open(args.results, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+    print_report(record, baseline)
+    log(f"💾 Result appended to {args.results}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+import json
+
+from lazy_import import LazyModule
+
+# Optional: without pyarrow every stage keeps using JSON / NDJSON. Imported on first use,
+# so JSON-only runs never pay for loading it.
+pa = LazyModule("pyarrow")
+ipc = LazyModule("pyarrow.ipc")
+pq = LazyModule("pyarrow.parquet")
+
+# === CONFIGURATION ===
+PARQUET_EXTENSIONS = (".parquet",)
+ARROW_EXTENSIONS = (".arrow", ".feather")
+COMPRESSION = "zstd"
+ARROW_COMPRESSION = "lz4"
+ROW_GROUP_SIZE = 50_000  # Rows buffered per row group / record batch
+READ_BATCH_SIZE = 10_000
+RECORD_COLUMN = "record"  # Fields without a column of their own, as JSON; read only when no columns are requested
+JSON_COLUMNS_KEY = b"json_columns"
+SPLIT_COLUMNS_KEY = b"split_columns"  # Columns the record column leaves out; absent in files holding whole records
+
+# Columns kept for people files: what filter/export/classify read, plus the rest of the record.
+# organization_name is derived at write time so the filter never has to decode employment_history.
+PEOPLE_COLUMNS = ["id", "first_name", "last_name", "name", "title", "linkedin_url", "city", "state",
+                  "country", "organization_id", "organization_name", "employment_history", RECORD_COLUMN]
+PEOPLE_JSON_COLUMNS = ["employment_history", RECORD_COLUMN]
+ID_TITLE_COLUMNS = ["id", "title"]
+CLASSIFIED_COLUMNS = ["id", "title", "translated_title", "classification"]
+
+def available():
+    return pa.available()
+
+def require():
+    if not pa.available():
+        raise ImportError("Columnar storage needs pyarrow: pip install pyarrow")
+
+def is_columnar(path):
+    return str(path).endswith(PARQUET_EXTENSIONS + ARROW_EXTENSIONS)
+
+def first_organization_name(person):
+    history = person.get("employment_history")
+    if isinstance(history, list) and history:
+        return history[0].get("organization_name")
+    return None
+
+PEOPLE_DERIVED = {"organization_name": first_organization_name}
+
+# === WRITER ===
+def _cell(value, as_json):
+    if value is None:
+        return None
+    if as_json:
+        return json.dumps(value, ensure_ascii=False)
+    return value if isinstance(value, str) else str(value)
+
+class ColumnarWriter:
+    # Same write / write_many / count / close surface as the stream_io writers.
+    # Every column is a string; nested values go in JSON-encoded columns that are
+    # listed in the file metadata so readers decode them transparently. With a record
+    # column, a field lands there only when its own column cannot hold it exactly, so
+    # nothing is stored twice and readers rebuild the original from both.
+    def __init__(self, path, columns, json_columns=(), derived=None, row_group_size=ROW_GROUP_SIZE):
+        # derived: column -> function(record) for values computed at write time
+        require()
+        self.path = path
+        self.columns = list(columns)
+        self.json_columns = set(json_columns)
+        self.derived = derived or {}
+        self.row_group_size = row_group_size
+        self.count = 0
+        self.buffer = {column: [] for column in self.columns}
+        self.split_columns = set()
+        if RECORD_COLUMN in self.columns:
+            self.split_columns = {c for c in self.columns if c != RECORD_COLUMN and c not in self.derived}
+        metadata = {JSON_COLUMNS_KEY: json.dumps(sorted(self.json_columns)).encode("utf-8"),
+                    SPLIT_COLUMNS_KEY: json.dumps(sorted(self.split_columns)).encode("utf-8")}
+        self.schema = pa.schema([(column, pa.string()) for column in self.columns], metadata=metadata)
+        if str(path).endswith(PARQUET_EXTENSIONS):
+            self.writer = pq.ParquetWriter(path, self.schema, compression=COMPRESSION)
+        else:
+            options = ipc.IpcWriteOptions(compression=ARROW_COMPRESSION)
+            self.writer = ipc.new_file(path, self.schema, options=options)
+
+    def write(self, record):
+        for column in self.columns:
+            if column == RECORD_COLUMN:
+                value = {key: v for key, v in record.items() if not self._in_column(key, v)}
+            elif column in self.derived:
+                value = self.derived[column](record)
+            else:
+                value = record.get(column)
+            self.buffer[column].append(_cell(value, column in self.json_columns))
+        self.count += 1
+        if len(self.buffer[self.columns[0]]) >= self.row_group_size:
+            self._flush()
+
+    def _in_column(self, key, value):
+        # Plain columns hold strings only; None stays in the record so null and missing differ
+        if key not in self.split_columns or value is None:
+            return False
+        return key in self.json_columns or isinstance(value, str)
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def _flush(self):
+        if not self.buffer[self.columns[0]]:
+            return
+        batch = pa.RecordBatch.from_arrays([pa.array(self.buffer[c], pa.string()) for c in self.columns],
+                                           schema=self.schema)
+        self.writer.write_batch(batch)
+        self.buffer = {column: [] for column in self.columns}
+
+    def close(self):
+        self._flush()
+        self.writer.close()
+
+# === READERS ===
+def _json_columns(schema):
+    raw = (schema.metadata or {}).get(JSON_COLUMNS_KEY)
+    return set(json.loads(raw)) if raw else set()
+
+def _split_columns(schema):
+    raw = (schema.metadata or {}).get(SPLIT_COLUMNS_KEY)
+    return [c for c in json.loads(raw) if c in schema.names] if raw else []
+
+def _open(path):
+    # Both formats are memory-mapped: only the pages of the requested columns are touched
+    require()
+    if str(path).endswith(PARQUET_EXTENSIONS):
+        parquet_file = pq.ParquetFile(path, memory_map=True)
+        return parquet_file.schema_arrow, lambda columns: parquet_file.iter_batches(READ_BATCH_SIZE, columns=columns)
+    reader = ipc.open_file(pa.memory_map(path, "r"))
+
+    def batches(columns):
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i).select(columns)
+    return reader.schema, batches
+
+def read_table(path, columns=None):
+    # Whole (projected) table, for callers that want Arrow / pandas directly
+    require()
+    if str(path).endswith(PARQUET_EXTENSIONS):
+        return pq.read_table(path, columns=columns, memory_map=True)
+    table = ipc.open_file(pa.memory_map(path, "r")).read_all()
+    return table.select(columns) if columns else table
+
+def iter_columnar(path, columns=None):
+    # Yields dicts holding only the requested columns (missing ones come back as None).
+    # With no columns, the original records are rebuilt when the file has a record column.
+    schema, batches = _open(path)
+    json_columns = _json_columns(schema)
+    if columns is None:
+        if RECORD_COLUMN in schema.names:
+            split = _split_columns(schema)
+            for batch in batches(split + [RECORD_COLUMN]):
+                for row in batch.to_pylist():
+                    record = {}
+                    for column in split:
+                        value = row[column]
+                        if value is not None:
+                            record[column] = json.loads(value) if column in json_columns else value
+                    record.update(json.loads(row[RECORD_COLUMN]))
+                    yield record
+            return
+        columns = [name for name in schema.names if name != RECORD_COLUMN]
+    present = [c for c in columns if c in schema.names]
+    missing = [c for c in columns if c not in schema.names]
+    decode = [c for c in present if c in json_columns]
+    for batch in batches(present):
+        for row in batch.to_pylist():
+            for column in decode:
+                if row[column] is not None:
+                    row[column] = json.loads(row[column])
+            for column in missing:
+                row[column] = None
+            yield row
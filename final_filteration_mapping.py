@@ -1,10 +1,17 @@
-import json
 import csv
 import os
+import metrics
+from columnar_store import first_organization_name
+from stream_io import iter_records, open_writer
+
+CSV_FIELDS = ["id", "first_name", "last_name", "linkedin_url", "organization_name"]
+# Only these are read from columnar inputs
+CLASSIFICATION_COLUMNS = ["id", "classification"]
+PEOPLE_COLUMNS = ["id", "first_name", "last_name", "linkedin_url", "organization_name"]
 
 # === List and Choose JSON File from Directory ===
 def choose_file_from_dir(prompt_text):
-    files = [f for f in os.listdir() if f.endswith('.json')]
+    files = [f for f in os.listdir() if f.endswith(('.json', '.ndjson', '.jsonl', '.parquet', '.arrow'))]
     if not files:
         raise Exception("❌ No JSON files found in the current directory.")
 
@@ -23,55 +30,88 @@ def choose_file_from_dir(prompt_text):
         except ValueError:
             print("⚠️ Please enter a valid number.")
 
-# === Load JSON ===
-def load_json(filepath):
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return json.load(f)
+# === Compact RELEVANT id set ===
+def compact_id(person_id):
+    # Apollo ids are 24-char hex ObjectIds: 12 raw bytes instead of a 73-byte str
+    person_id = str(person_id)
+    if len(person_id) == 24:
+        try:
+            return bytes.fromhex(person_id)
+        except ValueError:
+            pass
+    return person_id
 
-# === Save JSON ===
-def save_json(data, filename):
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def load_relevant_ids(classification_file):
+    # Streams classified_titles.json or the classification journal; a later
+    # journal line for the same id (e.g. a retried ERROR) overrides the earlier one
+    relevant_ids = set()
+    for entry in iter_records(classification_file, CLASSIFICATION_COLUMNS):
+        key = compact_id(entry["id"])
+        if entry.get("classification") == "RELEVANT":
+            relevant_ids.add(key)
+        else:
+            relevant_ids.discard(key)
+    return relevant_ids
 
-# === Save CSV ===
-def save_csv(data, filename):
-    with open(filename, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=["id", "first_name", "last_name", "linkedin_url", "organization_name"])
-        writer.writeheader()
-        writer.writerows(data)
+def relevant_row(person):
+    # JSON inputs carry employment_history; columnar people files store its first
+    # organization_name as a column of its own
+    org_name = first_organization_name(person) if "employment_history" in person else person.get("organization_name")
+    return {
+        "id": person.get("id", ""),
+        "first_name": person.get("first_name", ""),
+        "last_name": person.get("last_name", ""),
+        "linkedin_url": person.get("linkedin_url", ""),
+        "organization_name": org_name or ""
+    }
 
-# === Main Workflow ===
-def main():
-    # Step 1: Load Classification File
-    classification_file = choose_file_from_dir("Classification")
-    classification_data = load_json(classification_file)
+# === Filter Relevant People (library entry point) ===
+@metrics.staged("filter")
+def filter_relevant(classification_file, people_files, output_json="filtered_relevant_entries.json",
+                    output_csv="filtered_relevant_entries.csv"):
+    # people_files: one path or a list of paths, all joined against the same classification set.
+    # Both sides are streamed and rows are written as they match, so memory grows with
+    # the number of RELEVANT ids only. Returns the number of rows written.
+    if isinstance(people_files, str):
+        people_files = [people_files]
 
-    # Step 2: Filter for RELEVANT IDs
-    relevant_ids = {entry["id"] for entry in classification_data if entry["classification"] == "RELEVANT"}
+    # Step 1: Stream the classification file into a compact set of RELEVANT ids
+    relevant_ids = load_relevant_ids(classification_file)
+    print(f"🔎 {len(relevant_ids)} RELEVANT ids loaded from {classification_file}")
 
-    # Step 3: Load People Data File
-    people_file = choose_file_from_dir("People")
-    people_data = load_json(people_file)
+    # Step 2: Stream every people file, writing matches to JSON and CSV as they are found
+    json_writer = open_writer(output_json, CSV_FIELDS)
+    with open(output_csv, 'w', newline='', encoding='utf-8') as f:
+        csv_writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        csv_writer.writeheader()
+        written = set()  # A person present in several files is written once
+        try:
+            for people_file in people_files:
+                scanned = 0
+                for person in iter_records(people_file, PEOPLE_COLUMNS):
+                    scanned += 1
+                    key = compact_id(person.get("id", ""))
+                    if key not in relevant_ids or key in written:
+                        continue
+                    written.add(key)
+                    row = relevant_row(person)
+                    json_writer.write(row)
+                    csv_writer.writerow(row)
+                metrics.inc("filter_people_scanned_total", scanned)
+                print(f"📄 {people_file}: {scanned} people scanned, {len(written)} relevant so far")
+        finally:
+            json_writer.close()
 
-    # Step 4: Filter and extract required fields
-    final_data = []
-    for person in people_data:
-        if person["id"] in relevant_ids:
-            org_name = None
-            if isinstance(person.get("employment_history"), list) and person["employment_history"]:
-                org_name = person["employment_history"][0].get("organization_name")
-            final_data.append({
-                "id": person.get("id", ""),
-                "first_name": person.get("first_name", ""),
-                "last_name": person.get("last_name", ""),
-                "linkedin_url": person.get("linkedin_url", ""),
-                "organization_name": org_name or ""
-            })
+    metrics.inc("filter_rows_written_total", len(written))
+    print(f"\n🎉 Files saved as '{output_json}' and '{output_csv}'")
+    return len(written)
 
-    # Step 5: Export JSON and CSV
-    save_json(final_data, "filtered_relevant_entries.json")
-    save_csv(final_data, "filtered_relevant_entries.csv")
-    print("\n🎉 Files saved as 'filtered_relevant_entries.json' and 'filtered_relevant_entries.csv'")
+# === Main Workflow ===
+def main():
+    metrics.enable_from_env()
+    classification_file = choose_file_from_dir("Classification")
+    people_file = choose_file_from_dir("People")
+    filter_relevant(classification_file, people_file)
 
 if __name__ == "__main__":
     main()
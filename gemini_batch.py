@@ -0,0 +1,200 @@
+import json
+import os
+import time
+from datetime import datetime
+
+import metrics
+from log_util import log
+from lazy_import import LazyModule
+from response_parser import parse_items
+from title_cache import normalize_title
+
+# The newer google-genai SDK is the one with the Batch API. Optional: only bulk mode needs it.
+genai_sdk = LazyModule("google.genai")
+
+# === CONFIGURATION ===
+BATCH_JOB_FILE = "gemini_batch_job.json"  # Submitted job + what was in it, so a restart resumes polling
+POLL_INTERVAL = 60  # Seconds between job status checks
+MAX_WAIT = 48 * 3600  # Batch jobs target a 24 h turnaround; give up on polling after two days
+SUCCEEDED = "JOB_STATE_SUCCEEDED"
+FINISHED_STATES = {SUCCEEDED, "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"}
+
+def available():
+    return genai_sdk.available()
+
+# === REQUEST / RESULT FILES ===
+def request_key(n):
+    return f"batch-{n:05d}"
+
+def write_requests(batches, build_prompt, path, response_schema=None):
+    # One JSONL line per prompt in the Batch API's {"key", "request"} format
+    with open(path, "w", encoding="utf-8") as f:
+        for n, batch in enumerate(batches):
+            request = {"contents": [{"role": "user", "parts": [{"text": build_prompt(batch)}]}]}
+            if response_schema:
+                request["generationConfig"] = {"responseMimeType": "application/json", "responseSchema": response_schema}
+            f.write(json.dumps({"key": request_key(n), "request": request}, ensure_ascii=False) + "\n")
+    return {request_key(n): batch for n, batch in enumerate(batches)}
+
+def response_text(response):
+    candidates = (response or {}).get("candidates") or []
+    if not candidates:
+        return None
+    parts = (candidates[0].get("content") or {}).get("parts") or []
+    return "".join(part.get("text", "") for part in parts)
+
+def read_results(path):
+    # key -> (response text or None, usage metadata or None); failed requests come back as None
+    results = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get("response")
+            if record.get("error") or response is None:
+                results[record.get("key")] = (None, None)
+            else:
+                results[record.get("key")] = (response_text(response), response.get("usageMetadata"))
+    return results
+
+# === GEMINI BATCH API BACKEND ===
+class GenaiBatchBackend:
+    # submit / state / download over the Gemini Batch API. mock_services.MockBatchBackend
+    # has the same surface for local runs.
+    def __init__(self, api_key, model_name):
+        if not genai_sdk.available():
+            raise ImportError("Bulk mode needs the google-genai SDK: pip install google-genai")
+        self.client = genai_sdk.Client(api_key=api_key)
+        self.model_name = model_name
+
+    def submit(self, requests_file, display_name):
+        uploaded = self.client.files.upload(file=requests_file,
+                                            config={"display_name": display_name, "mime_type": "jsonl"})
+        job = self.client.batches.create(model=self.model_name, src=uploaded.name,
+                                         config={"display_name": display_name})
+        return job.name
+
+    def state(self, job_name):
+        state = self.client.batches.get(name=job_name).state
+        return getattr(state, "name", str(state))
+
+    def download(self, job_name, results_file):
+        job = self.client.batches.get(name=job_name)
+        data = self.client.files.download(file=job.dest.file_name)
+        with open(results_file, "wb") as f:
+            f.write(data)
+
+# === JOB RUNNER ===
+class BatchJobRunner:
+    # Packs every batch into one request file, submits it as a single job, polls until
+    # it finishes and hands back (batch, response text) pairs. The job is recorded in
+    # job_file as soon as it is submitted, so an interrupted run picks the same job
+    # back up instead of paying for it twice.
+    def __init__(self, backend, build_prompt, job_file=BATCH_JOB_FILE, poll_interval=POLL_INTERVAL, max_wait=MAX_WAIT,
+                 response_schema=None):
+        self.backend = backend
+        self.build_prompt = build_prompt
+        self.response_schema = response_schema
+        self.job_file = job_file
+        self.poll_interval = poll_interval
+        self.max_wait = max_wait
+
+    def _paths(self):
+        stem = os.path.splitext(self.job_file)[0]
+        return f"{stem}.requests.jsonl", f"{stem}.results.jsonl"
+
+    def _load_job(self):
+        if not os.path.exists(self.job_file):
+            return None
+        with open(self.job_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_job(self, job):
+        tmp = f"{self.job_file}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(job, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.job_file)
+
+    def submit(self, batches):
+        requests_file, _ = self._paths()
+        submitted = write_requests(batches, self.build_prompt, requests_file, self.response_schema)
+        name = self.backend.submit(requests_file, os.path.basename(os.path.splitext(self.job_file)[0]))
+        job = {"job": name, "submitted_at": datetime.now().isoformat(timespec="seconds"),
+               "requests": len(batches), "titles": sum(len(b) for b in batches), "batches": submitted}
+        self._save_job(job)
+        metrics.inc("gemini_batch_jobs_total", state="submitted")
+        log(f"📦 Submitted Gemini batch job {name}: {job['titles']} titles in {len(batches)} requests")
+        return job
+
+    def wait(self, job):
+        start = time.monotonic()
+        while True:
+            state = self.backend.state(job["job"])
+            if state in FINISHED_STATES:
+                metrics.inc("gemini_batch_jobs_total", state=state)
+                metrics.observe("gemini_batch_poll_seconds", time.monotonic() - start)
+                return state
+            if time.monotonic() - start > self.max_wait:
+                raise TimeoutError(f"Gemini batch job {job['job']} still {state} after {self.max_wait}s; "
+                                   f"rerun to keep polling it")
+            log(f"⏳ Batch job {job['job']} is {state}; checking again in {self.poll_interval}s")
+            time.sleep(self.poll_interval)
+
+    def run(self, batches):
+        # Returns ((batch, text) pairs, unsent items); text is None for requests that failed.
+        # When a job from an earlier run is still on record its items are remapped onto this
+        # run's indices by title, and whatever it did not cover comes back as unsent.
+        job = self._load_job()
+        if job is None:
+            job = self.submit(batches)
+            current = None
+        else:
+            log(f"⏯️ Resuming Gemini batch job {job['job']} submitted at {job['submitted_at']}")
+            current = {normalize_title(item["title"]): item["index"] for batch in batches for item in batch}
+
+        state = self.wait(job)
+        if state != SUCCEEDED:
+            os.remove(self.job_file)
+            raise RuntimeError(f"Gemini batch job {job['job']} ended as {state}")
+        _, results_file = self._paths()
+        self.backend.download(job["job"], results_file)
+        results = read_results(results_file)
+
+        pairs, covered = [], set()
+        for key, batch in job["batches"].items():
+            text, usage = results.get(key, (None, None))
+            if usage:
+                metrics.inc("gemini_tokens_total", usage.get("promptTokenCount", 0), kind="prompt")
+                metrics.inc("gemini_tokens_total", usage.get("candidatesTokenCount", 0), kind="output")
+            if current is not None:
+                batch, text = _remap(batch, text, current)
+            covered.update(item["index"] for item in batch)
+            pairs.append((batch, text))
+        unsent = [item for b in batches for item in b if item["index"] not in covered] if current is not None else []
+        os.remove(self.job_file)
+        return pairs, unsent
+
+def _remap(batch, text, current):
+    # Rewrites a resumed job's submitted indices to this run's; titles no longer pending are dropped
+    mapping = {item["index"]: current.get(normalize_title(item["title"])) for item in batch}
+    remapped = [{"index": mapping[item["index"]], "title": item["title"]} for item in batch
+                if mapping[item["index"]] is not None]
+    if text is None:
+        return remapped, None
+    # The model may echo an index as a string; anything that does not map back is dropped
+    # rather than left holding an index from the old run
+    items, _ = parse_items(text)
+    kept = []
+    for item in items:
+        index = mapping.get(_as_index(item.get("index")))
+        if index is not None:
+            kept.append(dict(item, index=index))
+    return remapped, json.dumps(kept, ensure_ascii=False)
+
+def _as_index(value):
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    return None
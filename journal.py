@@ -0,0 +1,62 @@
+import json
+import os
+from datetime import datetime
+
+import metrics
+
+# === CONFIGURATION ===
+JOURNAL_FILE = "classified_titles.journal.jsonl"
+
+# === APPEND-ONLY CLASSIFICATION JOURNAL ===
+class Journal:
+    def __init__(self, path=JOURNAL_FILE, resume=False):
+        # completed maps id -> last journaled record; ERROR records are kept out so they get retried
+        self.path = path
+        self.completed = {}
+        self.rotated = None
+        if not resume and os.path.exists(path) and os.path.getsize(path):
+            # A fresh run never overwrites an earlier run's progress; it is moved aside instead
+            root, ext = os.path.splitext(path)
+            self.rotated = f"{root}.{datetime.now().strftime('%Y%m%d-%H%M%S')}{ext}"
+            os.replace(path, self.rotated)
+            print(f"📦 Moved the existing journal to '{self.rotated}'. Rename it back and pass --resume to continue it.")
+        if resume and os.path.exists(path):
+            for record in read_journal(path):
+                if record.get("classification") == "ERROR":
+                    self.completed.pop(record.get("id"), None)
+                else:
+                    self.completed[record.get("id")] = record
+        self.file = open(path, "a" if resume else "w", encoding="utf-8")
+        if resume and self.file.tell() and not _ends_with_newline(path):
+            self.file.write("\n")
+
+    def append(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def flush(self):
+        # Called once per completed batch so a crash loses at most the batch in flight
+        with metrics.timer("journal_fsync_seconds"):
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+# === READ JOURNAL ===
+def read_journal(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # A torn last line from a crash mid-write; everything before it is intact
+                continue
+
+def _ends_with_newline(path):
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
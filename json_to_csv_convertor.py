@@ -1,46 +1,163 @@
-import json
 import csv
+import gzip
 import os
+import metrics
+from operator import itemgetter
+from stream_io import iter_records
 
-# === Ask for JSON filename ===
-json_filename = input("📄 Enter the JSON filename (e.g., data.json): ").strip()
+# === CSV SCHEMA ===
+# Column name -> key on the Apollo person / employment_history entry
+PERSON_COLUMNS = {
+    "id": "id",
+    "first_name": "first_name",
+    "last_name": "last_name",
+    "title": "title",
+    "linkedin_url": "linkedin_url",
+    "city": "city",
+    "state": "state",
+    "country": "country",
+}
+JOB_COLUMNS = {
+    "employment_title": "title",
+    "employment_org": "organization_name",
+    "start_date": "start_date",
+    "end_date": "end_date",
+    "is_current": "current",
+}
+SUMMARY_COLUMNS = ["employment_count", "employment_orgs"]
 
-# Check if file exists in the same folder
-if not os.path.exists(json_filename):
-    print(f"❌ File '{json_filename}' not found in current directory.")
-    exit()
+# job: one row per employment_history entry (the original layout)
+# current: one row per person with their current job
+# person: one row per person with a summary of their history
+FLATTEN_MODES = ("job", "current", "person")
+DEFAULT_MODE = "job"
 
-# === Load JSON data ===
-with open(json_filename, 'r', encoding='utf-8') as f:
-    data = json.load(f)
+def available_columns(mode=DEFAULT_MODE):
+    if mode not in FLATTEN_MODES:
+        raise ValueError(f"Unknown flatten mode '{mode}'. Choose one of: {', '.join(FLATTEN_MODES)}")
+    if mode == "person":
+        return list(PERSON_COLUMNS) + SUMMARY_COLUMNS
+    return list(PERSON_COLUMNS) + list(JOB_COLUMNS)
+
+def resolve_columns(mode=DEFAULT_MODE, columns=None):
+    available = available_columns(mode)
+    if not columns:
+        return available
+    unknown = [c for c in columns if c not in available]
+    if unknown:
+        raise ValueError(f"Unknown column(s) for mode '{mode}': {', '.join(unknown)}. Available: {', '.join(available)}")
+    return list(columns)
 
 # === Flatten into rows for CSV ===
-rows = []
-for person in data:
-    employment_history = person.get("employment_history", [])
-    for job in employment_history:
-        row = {
-            "id": person.get("id"),
-            "first_name": person.get("first_name"),
-            "last_name": person.get("last_name"),
-            "title": person.get("title"),
-            "linkedin_url": person.get("linkedin_url"),
-            "city": person.get("city"),
-            "state": person.get("state"),
-            "country": person.get("country"),
-            "employment_title": job.get("title"),
-            "employment_org": job.get("organization_name"),
-            "start_date": job.get("start_date"),
-            "end_date": job.get("end_date"),
-            "is_current": job.get("current")
-        }
-        rows.append(row)
-
-# === Write to CSV ===
-output_file = "output.csv"
-with open(output_file, "w", newline="", encoding="utf-8") as f:
-    writer = csv.DictWriter(f, fieldnames=rows[0].keys())
-    writer.writeheader()
-    writer.writerows(rows)
-
-print(f"✅ Conversion complete! CSV saved as: {output_file}")
+def _jobs(person):
+    history = person.get("employment_history")
+    return history if isinstance(history, list) else []
+
+def _current_job(jobs):
+    for job in jobs:
+        if job.get("current"):
+            return job
+    return {}
+
+def _summary(jobs):
+    orgs = [job.get("organization_name") for job in jobs if job.get("organization_name")]
+    return {"employment_count": len(jobs), "employment_orgs": "; ".join(dict.fromkeys(orgs))}
+
+def row_builder(mode=DEFAULT_MODE, columns=None):
+    # Returns person -> list of CSV rows, each aligned with resolve_columns(mode, columns).
+    # A person without employment history still gets a row, with the job columns empty.
+    fieldnames = resolve_columns(mode, columns)
+    full = available_columns(mode)
+    indexes = [full.index(c) for c in fieldnames]
+    if fieldnames == full:
+        project = None
+    elif len(indexes) > 1:
+        project = itemgetter(*indexes)
+    else:
+        project = lambda row, i=indexes[0]: (row[i],)  # itemgetter(i) would return a bare value
+    person_keys = list(PERSON_COLUMNS.values())
+    job_keys = list(JOB_COLUMNS.values())
+    wants_summary = mode == "person" and any(c in SUMMARY_COLUMNS for c in fieldnames)
+
+    def rows_for(person):
+        head = [person.get(key) for key in person_keys]
+        jobs = _jobs(person)
+        if mode == "person":
+            rows = [head + (list(_summary(jobs).values()) if wants_summary else [None, None])]
+        elif mode == "job":
+            rows = [head + [job.get(key) for key in job_keys] for job in jobs] or [head + [None] * len(job_keys)]
+        else:
+            job = _current_job(jobs)
+            rows = [head + [job.get(key) for key in job_keys]]
+        return rows if project is None else list(map(project, rows))
+    return rows_for
+
+def flatten_people(data, mode=DEFAULT_MODE, columns=None):
+    # Yields one list per CSV row, aligned with resolve_columns(mode, columns)
+    rows_for = row_builder(mode, columns)
+    for person in data:
+        yield from rows_for(person)
+
+# === Convert JSON / NDJSON to CSV (library entry point) ===
+def open_output(output_file, compress=None):
+    # Gzip when asked, or when the file name ends in .gz
+    if compress is None:
+        compress = output_file.endswith(".gz")
+    if compress:
+        return gzip.open(output_file, "wt", newline="", encoding="utf-8", compresslevel=6)
+    return open(output_file, "w", newline="", encoding="utf-8")
+
+@metrics.staged("export")
+def convert(json_filename, output_file="output.csv", mode=DEFAULT_MODE, columns=None, compress=None):
+    # Streams people in and rows out, so memory stays flat whatever the file size.
+    # Returns the number of data rows written.
+    if not os.path.exists(json_filename):
+        raise FileNotFoundError(f"File '{json_filename}' not found.")
+    fieldnames = resolve_columns(mode, columns)
+
+    source_columns = list(PERSON_COLUMNS.values()) + ["employment_history"]
+    counted = _Counted(flatten_people(iter_records(json_filename, source_columns), mode, fieldnames))
+    with open_output(output_file, compress) as f:
+        writer = csv.writer(f)
+        writer.writerow(fieldnames)
+        writer.writerows(counted)
+    metrics.inc("export_rows_written_total", counted.count, mode=mode)
+    return counted.count
+
+class _Counted:
+    # Lets csv.writerows drain the row generator in C while we still learn the row count
+    def __init__(self, rows):
+        self.rows = rows
+        self.count = 0
+
+    def __iter__(self):
+        for row in self.rows:
+            self.count += 1
+            yield row
+
+# === Main Workflow ===
+def main():
+    metrics.enable_from_env()
+    # === Ask for JSON filename ===
+    json_filename = input("📄 Enter the JSON or NDJSON filename, or a glob for several (e.g., runs/*/full_people_data.ndjson): ").strip()
+
+    mode_prompt = f"🧩 Rows per {' / '.join(FLATTEN_MODES)}? (default {DEFAULT_MODE}): "
+    if any(ch in json_filename for ch in "*?["):
+        # Several files: parsed in parallel worker processes and merged with person ids deduplicated
+        from parallel_export import export_parallel
+        mode = input(mode_prompt).strip().lower() or DEFAULT_MODE
+        export_parallel(json_filename, "output.csv", mode=mode)
+        return
+
+    # Check if file exists in the same folder
+    if not os.path.exists(json_filename):
+        print(f"❌ File '{json_filename}' not found in current directory.")
+        exit()
+
+    mode = input(mode_prompt).strip().lower() or DEFAULT_MODE
+    output_file = "output.csv"
+    rows = convert(json_filename, output_file, mode)
+    print(f"✅ Conversion complete! {rows} rows saved as: {output_file}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+import metrics
+from rate_limiter import RateLimiter
+
+try:
+    from zoneinfo import ZoneInfo
+    QUOTA_TZ = ZoneInfo("America/Los_Angeles")  # Gemini daily quotas reset at midnight Pacific
+except Exception:  # No tz database on this machine: fall back to UTC days
+    QUOTA_TZ = timezone.utc
+
+# === CONFIGURATION ===
+KEY_USAGE_FILE = "gemini_key_usage.sqlite3"
+
+def parse_keys(api_keys):
+    # One key, a comma-separated string of keys, or a list; duplicates are dropped
+    if isinstance(api_keys, str):
+        api_keys = api_keys.split(",")
+    return list(dict.fromkeys(k.strip() for k in api_keys or [] if k and k.strip()))
+
+def key_id(api_key):
+    # Only a digest of each key is ever written to disk
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+
+def quota_day():
+    return datetime.now(QUOTA_TZ).strftime("%Y-%m-%d")
+
+# === ONE KEY ===
+class KeySlot:
+    def __init__(self, api_key, max_rpm, max_rpd, used_today=0, throttled=0, recent=(), day=None, label="key-1"):
+        self.api_key = api_key
+        self.key_id = key_id(api_key)
+        self.label = label  # Logs and metrics name keys by position, never by any part of the key
+        self.day = day or quota_day()
+        self.throttled = throttled
+        self.cooldown_until = 0.0
+        self.limiter = RateLimiter(max_rpm, max_rpd, used_today=used_today, recent=recent)
+
+    def roll_day(self, today):
+        if today != self.day:
+            self.day = today
+            self.throttled = 0
+            self.limiter.reset_day()
+
+    def cooling_down(self, now):
+        return self.cooldown_until > now
+
+# === KEY POOL ===
+class KeyPool:
+    # Drop-in for RateLimiter over several keys. Each key keeps its own RPM/RPD
+    # budget, persisted per quota day so usage carries across runs. A request goes to
+    # the key with the most daily headroom that can send right now; a throttled key
+    # sits out its back-off while the others carry on.
+    def __init__(self, api_keys, max_rpm, max_rpd, usage_file=KEY_USAGE_FILE):
+        self.max_rpd = max_rpd
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(usage_file, check_same_thread=False) if usage_file else None
+        if self.conn is not None:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS key_usage (
+                    key_id TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    requests INTEGER NOT NULL,
+                    throttled INTEGER NOT NULL,
+                    recent TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (key_id, day)
+                )
+            """)
+            self.conn.commit()
+        today = quota_day()
+        self.slots = []
+        for position, api_key in enumerate(parse_keys(api_keys), 1):
+            requests, throttled, recent = self._load(key_id(api_key), today)
+            self.slots.append(KeySlot(api_key, max_rpm, max_rpd, requests, throttled, recent, today, f"key-{position}"))
+        if not self.slots:
+            raise ValueError("At least one Gemini API key is required")
+
+    # === PERSISTENCE ===
+    def _load(self, slot_key_id, day):
+        if self.conn is None:
+            return 0, 0, []
+        row = self.conn.execute("SELECT requests, throttled, recent FROM key_usage WHERE key_id = ? AND day = ?",
+                                (slot_key_id, day)).fetchone()
+        return (row[0], row[1], json.loads(row[2])) if row else (0, 0, [])
+
+    def _save(self, slot):
+        if self.conn is None:
+            return
+        self.conn.execute(
+            "INSERT OR REPLACE INTO key_usage (key_id, day, requests, throttled, recent, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (slot.key_id, slot.day, slot.limiter.day_count, slot.throttled, json.dumps(slot.limiter.recent()),
+             datetime.now().isoformat(timespec="seconds")),
+        )
+        self.conn.commit()
+
+    # === RATE-LIMITER SURFACE ===
+    @property
+    def day_count(self):
+        return sum(slot.limiter.day_count for slot in self.slots)
+
+    @property
+    def daily_capacity(self):
+        return self.max_rpd * len(self.slots)
+
+    def remaining_today(self):
+        return sum(slot.limiter.remaining_today() for slot in self.slots)
+
+    def reserve(self):
+        # Returns (slot, 0) when a key was picked, (None, seconds) to wait, or (None, None) when every key is spent
+        with self.lock:
+            today = quota_day()
+            now = time.monotonic()
+            waits = []
+            for slot in sorted(self.slots, key=lambda s: s.limiter.remaining_today(), reverse=True):
+                slot.roll_day(today)
+                if not slot.limiter.remaining_today():
+                    continue
+                if slot.cooling_down(now):
+                    waits.append(slot.cooldown_until - now)
+                    continue
+                delay = slot.limiter.reserve()
+                if delay == 0:
+                    self._save(slot)
+                    return slot, 0
+                if delay is not None:
+                    waits.append(delay)
+            return None, (min(waits) if waits else None)
+
+    def wait(self):
+        while True:
+            slot, delay = self.reserve()
+            if slot is not None or delay is None:
+                return slot
+            metrics.inc("gemini_rate_wait_seconds_total", delay)
+            time.sleep(delay)
+
+    async def acquire(self):
+        while True:
+            slot, delay = self.reserve()
+            if slot is not None or delay is None:
+                return slot
+            metrics.inc("gemini_rate_wait_seconds_total", delay)
+            await asyncio.sleep(delay)
+
+    # === THROTTLING ===
+    def throttle(self, slot, seconds):
+        # Benches the key for its back-off; True when another key can take over meanwhile
+        with self.lock:
+            now = time.monotonic()
+            slot.cooldown_until = max(slot.cooldown_until, now + seconds)
+            slot.throttled += 1
+            metrics.inc("gemini_key_throttled_total", key=slot.label)
+            self._save(slot)
+            return any(other is not slot and other.limiter.remaining_today() and not other.cooling_down(now)
+                       for other in self.slots)
+
+    def summary(self):
+        return " | ".join(f"{slot.label}: {slot.limiter.day_count}/{self.max_rpd} today, {slot.throttled} throttled"
+                          for slot in self.slots)
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
@@ -0,0 +1,108 @@
+import math
+import re
+import unicodedata
+from collections import Counter
+
+from journal import read_journal
+from stream_io import iter_records
+
+# === CONFIGURATION ===
+TOP_K = 20
+MAX_NGRAM = 2
+MIN_COUNT = 2  # Terms seen fewer times overall are too rare to rank
+POSITIVE_LABEL = "RELEVANT"
+NEGATIVE_LABEL = "NOT RELEVANT"
+
+# Letters/digits in any script, allowing inner dots and apostrophes ("sr.mgr", "o'neil")
+TOKEN_RE = re.compile(r"[^\W_]+(?:['’.][^\W_]+)*")
+
+# === TOKENIZER ===
+def tokenize(title):
+    text = unicodedata.normalize("NFKC", title or "").casefold()
+    return TOKEN_RE.findall(text)
+
+def terms(title, max_n=MAX_NGRAM):
+    tokens = tokenize(title)
+    for n in range(1, max_n + 1):
+        for i in range(len(tokens) - n + 1):
+            yield " ".join(tokens[i:i + n])
+
+# === STREAMING COUNTS ===
+class KeywordCounter:
+    # Both classes are counted in the same pass over the records
+    def __init__(self, max_n=MAX_NGRAM):
+        self.max_n = max_n
+        self.counts = {POSITIVE_LABEL: Counter(), NEGATIVE_LABEL: Counter()}
+        self.records = 0
+
+    def add(self, title, label):
+        counter = self.counts.get(label)
+        if counter is None:
+            return
+        counter.update(terms(title, self.max_n))
+        self.records += 1
+
+    def update(self, records):
+        for record in records:
+            self.add(record.get("title"), record.get("classification"))
+        return self
+
+    # === DISCRIMINATIVE SCORING ===
+    def log_odds(self, min_count=MIN_COUNT):
+        # Weighted log-odds ratio with an informative Dirichlet prior (Monroe et al.):
+        # z > 0 leans RELEVANT, z < 0 leans NOT RELEVANT, |z| is how reliably it separates them
+        pos, neg = self.counts[POSITIVE_LABEL], self.counts[NEGATIVE_LABEL]
+        background = pos + neg
+        n_pos, n_neg = sum(pos.values()), sum(neg.values())
+        n_all = n_pos + n_neg
+        if not n_pos or not n_neg:
+            return {}
+        alpha_0 = float(n_all)
+        scores = {}
+        for term, total in background.items():
+            if total < min_count:
+                continue
+            alpha = alpha_0 * total / n_all
+            y_pos, y_neg = pos[term], neg[term]
+            delta = (math.log((y_pos + alpha) / (n_pos + alpha_0 - y_pos - alpha))
+                     - math.log((y_neg + alpha) / (n_neg + alpha_0 - y_neg - alpha)))
+            variance = 1.0 / (y_pos + alpha) + 1.0 / (y_neg + alpha)
+            scores[term] = delta / math.sqrt(variance)
+        return scores
+
+    def ranked(self, top_k=TOP_K, min_count=MIN_COUNT):
+        # Returns (include, exclude): lists of (term, z, relevant_count, not_relevant_count)
+        scores = self.log_odds(min_count)
+        pos, neg = self.counts[POSITIVE_LABEL], self.counts[NEGATIVE_LABEL]
+        ordered = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        include = [(t, z, pos[t], neg[t]) for t, z in ordered if z > 0][:top_k]
+        exclude = [(t, z, pos[t], neg[t]) for t, z in reversed(ordered) if z < 0][:top_k]
+        return include, exclude
+
+# === SOURCES ===
+def iter_classified(path):
+    # Journals are read line by line; a torn last line from a crash is skipped
+    if path.endswith((".jsonl", ".ndjson")):
+        return read_journal(path)
+    return iter_records(path, ["title", "classification"])
+
+def count_file(path, max_n=MAX_NGRAM):
+    return KeywordCounter(max_n).update(iter_classified(path))
+
+# === REPORT AND SAVE ===
+def print_ranked(label, ranked_terms):
+    print(f"\n🔑 Top {len(ranked_terms)} {label} Keywords (log-odds z | RELEVANT / NOT RELEVANT counts):")
+    for term, z, pos_count, neg_count in ranked_terms:
+        print(f"{term} (z={z:+.2f} | {pos_count}/{neg_count})")
+
+def write_keywords(counter, include_file, exclude_file, top_k=TOP_K):
+    include, exclude = counter.ranked(top_k)
+    print_ranked(POSITIVE_LABEL, include)
+    print_ranked(NEGATIVE_LABEL, exclude)
+
+    with open(include_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(term for term, *_ in include))
+
+    with open(exclude_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(term for term, *_ in exclude))
+    return [term for term, *_ in include], [term for term, *_ in exclude]
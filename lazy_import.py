@@ -0,0 +1,31 @@
+import importlib
+import importlib.util
+
+# === LAZY MODULES ===
+class LazyModule:
+    # Stands in for a heavy optional dependency (pyarrow, numpy, the Gemini SDKs) and
+    # imports it on first attribute access, so stages that never touch it start fast
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def available(self):
+        # Looks the module up without importing it (only its parent packages)
+        if self._module is not None:
+            return True
+        try:
+            return importlib.util.find_spec(self._name) is not None
+        except (ImportError, ValueError):
+            return False
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
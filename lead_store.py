@@ -0,0 +1,183 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+from columnar_store import first_organization_name
+from title_cache import normalize_title
+
+# === CONFIGURATION ===
+LEAD_STORE_FILE = "leads.sqlite3"
+LEAD_FIELDS = ["id", "first_name", "last_name", "linkedin_url", "organization_name", "org_id", "country", "title",
+               "last_seen", "classified_at"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orgs (
+    org_id TEXT PRIMARY KEY,
+    name TEXT,
+    website_url TEXT,
+    country TEXT COLLATE NOCASE,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS people (
+    person_id TEXT PRIMARY KEY,
+    org_id TEXT,
+    first_name TEXT,
+    last_name TEXT,
+    title TEXT,
+    title_key TEXT,
+    linkedin_url TEXT,
+    city TEXT,
+    state TEXT,
+    country TEXT COLLATE NOCASE,
+    organization_name TEXT,
+    record TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS people_org ON people (org_id, last_seen);
+CREATE INDEX IF NOT EXISTS people_country ON people (country, last_seen);
+CREATE INDEX IF NOT EXISTS people_title ON people (title_key);
+CREATE INDEX IF NOT EXISTS people_last_seen ON people (last_seen);
+CREATE TABLE IF NOT EXISTS classifications (
+    person_id TEXT PRIMARY KEY,
+    title TEXT,
+    translated_title TEXT,
+    classification TEXT NOT NULL,
+    classified_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS classifications_verdict ON classifications (classification, person_id);
+"""
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+# === LEAD STORE ===
+class LeadStore:
+    # One indexed SQLite file that fetch and classify upsert into, so leads from all runs
+    # can be queried together instead of re-parsing the JSON files each run leaves behind.
+    # Fetch workers and the pipelined runner write from other threads, hence the lock.
+    def __init__(self, path=LEAD_STORE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    # === BULK UPSERTS ===
+    def upsert_orgs(self, orgs):
+        now = _now()
+        rows = [(o.get("id"), o.get("name"), o.get("website_url"), o.get("location_country"), now)
+                for o in orgs if o.get("id")]
+        with self.lock:
+            self.conn.executemany("""
+                INSERT INTO orgs (org_id, name, website_url, country, updated_at) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (org_id) DO UPDATE SET name = excluded.name, website_url = excluded.website_url,
+                    country = excluded.country, updated_at = excluded.updated_at
+            """, rows)
+            self.conn.commit()
+        return len(rows)
+
+    def upsert_people(self, people, org_id=None):
+        # first_seen is kept from the first run that pulled a person; everything else is refreshed
+        now = _now()
+        rows = [(p.get("id"), p.get("organization_id") or org_id, p.get("first_name"), p.get("last_name"),
+                 p.get("title"), normalize_title(p.get("title")), p.get("linkedin_url"), p.get("city"), p.get("state"),
+                 p.get("country"), first_organization_name(p) or p.get("organization_name"),
+                 json.dumps(p, ensure_ascii=False), now, now)
+                for p in people if p.get("id")]
+        with self.lock:
+            self.conn.executemany("""
+                INSERT INTO people (person_id, org_id, first_name, last_name, title, title_key, linkedin_url, city,
+                                    state, country, organization_name, record, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (person_id) DO UPDATE SET org_id = excluded.org_id, first_name = excluded.first_name,
+                    last_name = excluded.last_name, title = excluded.title, title_key = excluded.title_key,
+                    linkedin_url = excluded.linkedin_url, city = excluded.city, state = excluded.state,
+                    country = excluded.country, organization_name = excluded.organization_name,
+                    record = excluded.record, last_seen = excluded.last_seen
+            """, rows)
+            self.conn.commit()
+        return len(rows)
+
+    def upsert_classifications(self, records):
+        # ERROR verdicts never overwrite a real one from an earlier run
+        now = _now()
+        rows = [(r.get("id"), r.get("title"), r.get("translated_title"), r.get("classification"), now)
+                for r in records if r.get("id") and r.get("classification")]
+        with self.lock:
+            self.conn.executemany("""
+                INSERT INTO classifications (person_id, title, translated_title, classification, classified_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (person_id) DO UPDATE SET title = excluded.title,
+                    translated_title = excluded.translated_title, classification = excluded.classification,
+                    classified_at = excluded.classified_at
+                WHERE excluded.classification != 'ERROR' OR classifications.classification = 'ERROR'
+            """, rows)
+            self.conn.commit()
+        return len(rows)
+
+    # === INDEXED QUERIES ===
+    def _people_filter(self, org_ids=None, company=None, country=None, since=None, until=None):
+        clauses, params = [], []
+        if org_ids:
+            clauses.append(f"p.org_id IN ({','.join('?' * len(org_ids))})")
+            params.extend(org_ids)
+        if company:
+            clauses.append("p.org_id IN (SELECT org_id FROM orgs WHERE name LIKE ?)")
+            params.append(f"%{company}%")
+        if country:
+            clauses.append("p.country = ?")
+            params.append(country)
+        if since:
+            clauses.append("p.last_seen >= ?")
+            params.append(since)
+        if until:
+            clauses.append("p.last_seen < ?")
+            params.append(until)
+        return clauses, params
+
+    def relevant_leads(self, org_ids=None, company=None, country=None, since=None, until=None):
+        # RELEVANT people, optionally narrowed by org ids, org name, country and the date
+        # they were last fetched (ISO dates compare as text). Rows are dicts keyed by LEAD_FIELDS.
+        clauses, params = self._people_filter(org_ids, company, country, since, until)
+        where = " AND ".join(["c.classification = 'RELEVANT'"] + clauses)
+        with self.lock:
+            rows = self.conn.execute(f"""
+                SELECT p.person_id, p.first_name, p.last_name, p.linkedin_url, p.organization_name, p.org_id,
+                       p.country, p.title, p.last_seen, c.classified_at
+                FROM classifications c JOIN people p ON p.person_id = c.person_id
+                WHERE {where}
+                ORDER BY p.org_id, p.person_id
+            """, params).fetchall()
+        for row in rows:
+            yield dict(zip(LEAD_FIELDS, row))
+
+    def id_titles(self, org_ids=None, company=None, country=None, since=None, until=None, unclassified=True):
+        # Classifier input straight from the store; by default only people with no verdict (or an ERROR) yet
+        clauses, params = self._people_filter(org_ids, company, country, since, until)
+        if unclassified:
+            clauses.append("NOT EXISTS (SELECT 1 FROM classifications c WHERE c.person_id = p.person_id "
+                           "AND c.classification != 'ERROR')")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.lock:
+            rows = self.conn.execute(f"SELECT p.person_id, p.title FROM people p {where} ORDER BY p.person_id",
+                                     params).fetchall()
+        return [{"id": person_id, "title": title} for person_id, title in rows]
+
+    def summary(self):
+        with self.lock:
+            people = self.conn.execute("SELECT COUNT(*) FROM people").fetchone()[0]
+            orgs = self.conn.execute("SELECT COUNT(*) FROM orgs").fetchone()[0]
+            verdicts = dict(self.conn.execute(
+                "SELECT classification, COUNT(*) FROM classifications GROUP BY classification").fetchall())
+        breakdown = ", ".join(f"{count} {verdict}" for verdict, count in sorted(verdicts.items()))
+        return f"🗄️ Lead store {self.path}: {people} people across {orgs} orgs; {breakdown or 'no verdicts yet'}"
+
+    def close(self):
+        # Refreshes the planner's index statistics once the run's upserts are in
+        with self.lock:
+            self.conn.execute("PRAGMA optimize")
+            self.conn.close()
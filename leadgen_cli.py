@@ -0,0 +1,400 @@
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import metrics
+from log_util import log
+from apollo_cache import APOLLO_CACHE_FILE, RESPONSE_CACHE_TTL
+from final_filteration_mapping import filter_relevant
+from gemini_batch import BATCH_JOB_FILE, POLL_INTERVAL
+from journal import JOURNAL_FILE
+from json_to_csv_convertor import DEFAULT_MODE, FLATTEN_MODES, convert
+from parallel_export import expand_inputs, export_parallel
+from keyword_engine import TOP_K, count_file, write_keywords
+from lead_store import LEAD_FIELDS, LEAD_STORE_FILE, LeadStore
+from stream_io import open_writer
+from title_cache import CACHE_DB_FILE
+
+# === CONFIGURATION ===
+DEFAULT_CONFIG_FILE = "leadgen_config.json"
+DEFAULT_WORKDIR = "runs"
+RUN_SUMMARY_FILE = "run_summary.json"
+TRUE_VALUES = {"1", "true", "yes", "y", "on"}
+STORE_COMMANDS = {"fetch", "classify", "leads", "run"}  # filter, export and keywords never open the lead store
+
+# Settings resolve in this order: command-line flag > environment variable >
+# config file > default. Environment names are LEADGEN_<NAME> unless listed here.
+ENV_OVERRIDES = {
+    "apollo_api_key": "APOLLO_API_KEY",
+    "gemini_api_key": "GEMINI_API_KEY",
+}
+
+# The Apollo and Gemini stages (and the asyncio / HTTP stacks behind them) are imported
+# by the commands that run them, so filter, export, keywords and leads start fast.
+
+# === CONFIG FILE ===
+def load_config(path):
+    if not path or not os.path.exists(path):
+        return {}
+    if path.endswith(".toml"):
+        import tomllib
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _coerce(value, default):
+    if isinstance(default, bool):
+        return str(value).strip().lower() in TRUE_VALUES
+    if isinstance(default, int):
+        return int(value)
+    if isinstance(default, float):
+        return float(value)
+    return value
+
+def setting(args, config, name, default=None):
+    value = getattr(args, name, None)
+    if value is not None:
+        return value
+    env_name = ENV_OVERRIDES.get(name, f"LEADGEN_{name.upper()}")
+    if env_name in os.environ:
+        return _coerce(os.environ[env_name], default)
+    if name in config:
+        return _coerce(config[name], default)
+    return default
+
+def cache_ttl(args, config):
+    # Seconds a cached Apollo response is reused; --refresh asks Apollo for every page again
+    if setting(args, config, "refresh", False):
+        return 0
+    return setting(args, config, "cache_ttl", RESPONSE_CACHE_TTL)
+
+def require(value, name):
+    if not value:
+        env_name = ENV_OVERRIDES.get(name, f"LEADGEN_{name.upper()}")
+        raise SystemExit(f"❌ Missing '{name}': pass --{name.replace('_', '-')}, set {env_name}, or add it to the config file.")
+    return value
+
+# === MANIFEST ===
+def load_manifest(path):
+    # CSV with a header row, or a JSON list of objects; each entry needs at least "company"
+    if path.endswith(".csv"):
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            entries = [dict(row) for row in csv.DictReader(f)]
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    return [entry for entry in entries if (entry.get("company") or "").strip()]
+
+def company_slug(company, country):
+    return re.sub(r"[^a-z0-9]+", "_", f"{company}_{country}".lower()).strip("_")
+
+# === PIPELINE STAGES ===
+def run_company(company, country, output_dir, sync, classifier, org_indices="", only_one_page=False,
+                stream_output=True, incremental=False, resume=False, use_async=False, columnar=False, bulk=False):
+    # fetch -> classify -> filter -> export for one company, every file inside output_dir.
+    # columnar keeps every intermediate file as Parquet, so each stage reads only its columns.
+    from LLM_calling_script import run_classification
+    from apollo_lead_gen_automation import run_fetch
+    os.makedirs(output_dir, exist_ok=True)
+    ext = ".parquet" if columnar else ".json"
+    fetched = run_fetch(None, country, company, org_indices, only_one_page, stream_output, incremental,
+                        output_dir, sync=sync, columnar=columnar)
+    classified_file = os.path.join(output_dir, "classified_titles" + ext)
+    classified = run_classification(
+        fetched["id_title_file"], output_file=classified_file,
+        journal_file=os.path.join(output_dir, JOURNAL_FILE),
+        include_file=os.path.join(output_dir, "include_keywords.txt"),
+        exclude_file=os.path.join(output_dir, "exclude_keywords.txt"),
+        resume=resume, use_async=use_async, classifier=classifier,
+        bulk=bulk, batch_job_file=os.path.join(output_dir, BATCH_JOB_FILE),
+    )
+    relevant = filter_relevant(
+        classified_file, fetched["people_file"],
+        output_json=os.path.join(output_dir, "filtered_relevant_entries" + ext),
+        output_csv=os.path.join(output_dir, "filtered_relevant_entries.csv"),
+    )
+    exported_rows = convert(fetched["people_file"], os.path.join(output_dir, "output.csv"))
+    return {
+        "company": company,
+        "country": country,
+        "people": fetched["total_people"],
+        "classified": len(classified),
+        "relevant": relevant,
+        "exported_rows": exported_rows,
+    }
+
+def run_manifest(manifest_file, apollo_api_key, gemini_api_key, workdir=DEFAULT_WORKDIR, default_country="",
+                 only_one_page=False, stream_output=True, incremental=False, resume=False, use_async=False,
+                 concurrency=None, stop_on_error=False, use_rules=True, use_neighbors=True, columnar=False, bulk=False,
+                 poll_interval=POLL_INTERVAL, pipelined=False, lead_store=None, ttl=RESPONSE_CACHE_TTL):
+    from LLM_calling_script import GeminiTitleClassifier
+    from apollo_lead_gen_automation import ApolloSync
+    from pipeline import run_pipelined
+    entries = load_manifest(manifest_file)
+    os.makedirs(workdir, exist_ok=True)
+    if pipelined and bulk:
+        raise SystemExit("❌ --pipelined and --bulk do not mix: a batch job takes hours, so bulk runs stage by stage.")
+    log(f"📋 Manifest {manifest_file}: {len(entries)} companies -> {workdir}")
+
+    # One Apollo session and one classifier for the whole manifest: shared pools, caches and quota
+    sync_options = {"cache_file": os.path.join(workdir, APOLLO_CACHE_FILE), "ttl": ttl}
+    if concurrency:
+        sync_options["concurrency"] = concurrency
+    sync = ApolloSync(apollo_api_key, lead_store=lead_store, **sync_options)
+    classifier = GeminiTitleClassifier(gemini_api_key, cache_file=os.path.join(workdir, CACHE_DB_FILE),
+                                       use_rules=use_rules, use_neighbors=use_neighbors, poll_interval=poll_interval,
+                                       lead_store=lead_store)
+    summary = []
+    try:
+        for n, entry in enumerate(entries, start=1):
+            company = entry["company"].strip()
+            country = (entry.get("country") or default_country).strip()
+            output_dir = os.path.join(workdir, company_slug(company, country))
+            log(f"🏢 [{n}/{len(entries)}] {company} ({country or 'any country'})")
+            try:
+                options = {
+                    "org_indices": entry.get("org_indices", ""),
+                    "only_one_page": _coerce(entry.get("only_one_page", only_one_page), False),
+                    "incremental": incremental, "resume": resume, "use_async": use_async, "columnar": columnar,
+                }
+                if pipelined:
+                    result = run_pipelined(company, country, output_dir, sync, classifier, **options)
+                else:
+                    result = run_company(company, country, output_dir, sync, classifier,
+                                         stream_output=stream_output, bulk=bulk, **options)
+                result["status"] = "ok"
+            except Exception as e:
+                if stop_on_error:
+                    raise
+                log(f"❌ {company}: {e}")
+                result = {"company": company, "country": country, "status": "error", "error": str(e)}
+            result["output_dir"] = output_dir
+            summary.append(result)
+            with open(os.path.join(workdir, RUN_SUMMARY_FILE), "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=2, ensure_ascii=False)
+    finally:
+        sync.report()
+        sync.close()
+        classifier.close()
+    log(f"🏁 Done. {sum(r['status'] == 'ok' for r in summary)}/{len(summary)} companies succeeded. Summary in {os.path.join(workdir, RUN_SUMMARY_FILE)}")
+    return summary
+
+# === LEAD STORE QUERIES ===
+def export_leads(store, output_json=None, output_csv=None, **filters):
+    # RELEVANT leads straight from the store's indexes; no JSON file is reparsed
+    count = 0
+    writer = open_writer(output_json, LEAD_FIELDS) if output_json else None
+    csv_file = open(output_csv, "w", newline="", encoding="utf-8") if output_csv else None
+    try:
+        rows = csv.DictWriter(csv_file, fieldnames=LEAD_FIELDS) if csv_file else None
+        if rows:
+            rows.writeheader()
+        for lead in store.relevant_leads(**filters):
+            if writer:
+                writer.write(lead)
+            if rows:
+                rows.writerow(lead)
+            count += 1
+    finally:
+        if writer:
+            writer.close()
+        if csv_file:
+            csv_file.close()
+    return count
+
+# === COMMAND-LINE INTERFACE ===
+def build_parser():
+    parser = argparse.ArgumentParser(description="Non-interactive Apollo lead generation and title classification pipeline.")
+    parser.add_argument("--config", default=None, help=f"JSON or TOML config file (default: {DEFAULT_CONFIG_FILE} if present)")
+    parser.add_argument("--apollo-api-key", dest="apollo_api_key")
+    parser.add_argument("--gemini-api-key", dest="gemini_api_key",
+                        help="One key, or several comma-separated keys whose daily quotas are pooled")
+    parser.add_argument("--metrics-file", dest="metrics_file",
+                        help="Write run metrics on exit: .prom/.txt for Prometheus text, anything else for JSON lines")
+    parser.add_argument("--store", help=f"SQLite lead store fetch, classify and run upsert into (default: {LEAD_STORE_FILE}; "
+                                        f"empty to disable)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    fetch = sub.add_parser("fetch", help="Search an organization and pull its people from Apollo")
+    fetch.add_argument("--company", required=True)
+    fetch.add_argument("--country")
+    fetch.add_argument("--org-index", dest="org_indices", default="", help="Comma-separated org indices (default: all)")
+    fetch.add_argument("--one-page", dest="only_one_page", action="store_true", default=None)
+    fetch.add_argument("--stream", dest="stream_output", action="store_true", default=None)
+    fetch.add_argument("--incremental", action="store_true", default=None)
+    fetch.add_argument("--columnar", action="store_true", default=None, help="Write Parquet instead of JSON (needs pyarrow)")
+    fetch.add_argument("--cache-ttl", dest="cache_ttl", type=int,
+                       help=f"Seconds a cached Apollo response is reused (default: {RESPONSE_CACHE_TTL})")
+    fetch.add_argument("--refresh", action="store_true", default=None, help="Ignore cached Apollo responses")
+    fetch.add_argument("--output-dir", default=".")
+
+    classify = sub.add_parser("classify", help="Classify an id/title JSON file with Gemini")
+    classify.add_argument("--input", help="id/title JSON or Parquet file (or use --from-store)")
+    classify.add_argument("--from-store", action="store_true", default=None,
+                          help="Classify the people in the lead store that have no verdict yet")
+    classify.add_argument("--company", help="With --from-store: only orgs whose name contains this")
+    classify.add_argument("--country", help="With --from-store: only people in this country")
+    classify.add_argument("--output", default="classified_titles.json")
+    classify.add_argument("--journal", default=JOURNAL_FILE)
+    classify.add_argument("--resume", action="store_true", default=None)
+    classify.add_argument("--async", dest="use_async", action="store_true", default=None)
+    classify.add_argument("--no-rules", dest="use_rules", action="store_false", default=None,
+                          help="Skip the local rule pre-classifier")
+    classify.add_argument("--bulk", action="store_true", default=None,
+                          help="Submit every pending title as one Gemini batch job and poll until it finishes")
+    classify.add_argument("--batch-job", dest="batch_job_file", default="gemini_batch_job.json",
+                          help="Where the submitted job is recorded so a rerun resumes polling it")
+    classify.add_argument("--no-neighbors", dest="use_neighbors", action="store_false", default=None,
+                          help="Skip nearest-neighbor verdict reuse")
+
+    filt = sub.add_parser("filter", help="Join RELEVANT classifications with the people file")
+    filt.add_argument("--classification", required=True)
+    filt.add_argument("--people", required=True, nargs="+", help="One or more people JSON/NDJSON/Parquet files (globs allowed)")
+    filt.add_argument("--output-json", default="filtered_relevant_entries.json", help="A .parquet name writes Parquet")
+    filt.add_argument("--output-csv", default="filtered_relevant_entries.csv")
+
+    export = sub.add_parser("export", help="Flatten people JSON/NDJSON/Parquet files into CSV rows")
+    export.add_argument("--input", required=True, nargs="+",
+                        help="One or more people files (globs allowed); several are exported in parallel and merged")
+    export.add_argument("--output", default="output.csv", help="A name ending in .gz is gzip-compressed")
+    export.add_argument("--mode", choices=FLATTEN_MODES, default=DEFAULT_MODE,
+                        help="One row per employment entry (job), per person with their current job (current), or per person (person)")
+    export.add_argument("--columns", help="Comma-separated columns to keep, in order (default: all for the mode)")
+    export.add_argument("--gzip", dest="compress", action="store_true", default=None)
+    export.add_argument("--output-json", help="Also merge the people into one JSON/NDJSON/Parquet file (ids deduplicated)")
+    export.add_argument("--classification", help="Only export people classified RELEVANT in this file")
+    export.add_argument("--workers", type=int, help="Worker processes for several inputs (default: one per core)")
+
+    keywords = sub.add_parser("keywords", help="Rank include/exclude keywords from a classification journal or JSON file")
+    keywords.add_argument("--input", default=JOURNAL_FILE,
+                          help="Journal (.jsonl, streamed) or classified_titles.json")
+    keywords.add_argument("--include-file", default="include_keywords.txt")
+    keywords.add_argument("--exclude-file", default="exclude_keywords.txt")
+    keywords.add_argument("--top", type=int, default=TOP_K)
+
+    leads = sub.add_parser("leads", help="Query RELEVANT leads from the lead store by org, country or date")
+    leads.add_argument("--org", dest="org_ids", nargs="+", help="Apollo organization ids")
+    leads.add_argument("--company", help="Only orgs whose name contains this")
+    leads.add_argument("--country")
+    leads.add_argument("--since", help="Last fetched on or after this ISO date")
+    leads.add_argument("--until", help="Last fetched before this ISO date")
+    leads.add_argument("--output-json", default="relevant_leads.json", help="A .ndjson or .parquet name changes the format")
+    leads.add_argument("--output-csv", default="relevant_leads.csv")
+
+    run = sub.add_parser("run", help="Run fetch, classify, filter and export for every company in a manifest")
+    run.add_argument("--manifest", required=True, help="CSV or JSON list with company[, country, org_indices, only_one_page]")
+    run.add_argument("--workdir")
+    run.add_argument("--country", help="Default country for manifest rows without one")
+    run.add_argument("--one-page", dest="only_one_page", action="store_true", default=None)
+    run.add_argument("--incremental", action="store_true", default=None)
+    run.add_argument("--resume", action="store_true", default=None)
+    run.add_argument("--async", dest="use_async", action="store_true", default=None)
+    run.add_argument("--no-rules", dest="use_rules", action="store_false", default=None,
+                     help="Skip the local rule pre-classifier")
+    run.add_argument("--no-neighbors", dest="use_neighbors", action="store_false", default=None,
+                     help="Skip nearest-neighbor verdict reuse")
+    run.add_argument("--bulk", action="store_true", default=None, help="Classify through Gemini batch jobs")
+    run.add_argument("--pipelined", action="store_true", default=None,
+                     help="Classify, filter and export each company while its pages are still being fetched")
+    run.add_argument("--columnar", action="store_true", default=None, help="Keep intermediate files as Parquet (needs pyarrow)")
+    run.add_argument("--concurrency", type=int)
+    run.add_argument("--cache-ttl", dest="cache_ttl", type=int,
+                     help=f"Seconds a cached Apollo response is reused (default: {RESPONSE_CACHE_TTL})")
+    run.add_argument("--refresh", action="store_true", default=None, help="Ignore cached Apollo responses")
+    run.add_argument("--stop-on-error", action="store_true", default=None)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    config = load_config(args.config or DEFAULT_CONFIG_FILE)
+    metrics.enable(setting(args, config, "metrics_file"))
+    store_file = setting(args, config, "store", LEAD_STORE_FILE) if args.command in STORE_COMMANDS else None
+    store = LeadStore(store_file) if store_file else None
+    try:
+        return run_command(args, config, store)
+    finally:
+        if store is not None:
+            store.close()
+
+def run_command(args, config, store):
+    if args.command == "fetch":
+        from apollo_lead_gen_automation import run_fetch
+        run_fetch(
+            require(setting(args, config, "apollo_api_key"), "apollo_api_key"),
+            setting(args, config, "country", ""), args.company, args.org_indices,
+            setting(args, config, "only_one_page", False), setting(args, config, "stream_output", False),
+            setting(args, config, "incremental", False), args.output_dir,
+            columnar=setting(args, config, "columnar", False), lead_store=store, ttl=cache_ttl(args, config),
+        )
+    elif args.command == "classify":
+        from LLM_calling_script import run_classification
+        entries = None
+        if setting(args, config, "from_store", False):
+            if store is None:
+                raise SystemExit("❌ --from-store needs a lead store; pass --store or set LEADGEN_STORE.")
+            entries = store.id_titles(company=args.company, country=args.country)
+            log(f"🗄️ {len(entries)} unclassified people in {store.path}")
+        elif not args.input:
+            raise SystemExit("❌ classify needs --input or --from-store.")
+        run_classification(
+            args.input, require(setting(args, config, "gemini_api_key"), "gemini_api_key"),
+            output_file=args.output, journal_file=args.journal,
+            resume=setting(args, config, "resume", False), use_async=setting(args, config, "use_async", False),
+            use_rules=setting(args, config, "use_rules", True),
+            use_neighbors=setting(args, config, "use_neighbors", True),
+            bulk=setting(args, config, "bulk", False), batch_job_file=args.batch_job_file,
+            poll_interval=setting(args, config, "poll_interval", POLL_INTERVAL),
+            entries=entries, lead_store=store,
+        )
+    elif args.command == "filter":
+        filter_relevant(args.classification, expand_inputs(args.people), args.output_json, args.output_csv)
+    elif args.command == "export":
+        columns = [c.strip() for c in args.columns.split(",") if c.strip()] if args.columns else None
+        inputs = expand_inputs(args.input)
+        if len(inputs) == 1 and not args.output_json and not args.classification:
+            rows = convert(inputs[0], args.output, args.mode, columns, args.compress)
+            print(f"✅ Conversion complete! {rows} rows saved as: {args.output}")
+        else:
+            export_parallel(inputs, args.output, args.output_json, args.mode, columns, args.compress,
+                            args.classification, setting(args, config, "workers", 0))
+    elif args.command == "keywords":
+        counter = count_file(args.input)
+        log(f"🔑 Counted {counter.records} classified titles from {args.input}")
+        write_keywords(counter, args.include_file, args.exclude_file, args.top)
+    elif args.command == "leads":
+        if store is None:
+            raise SystemExit("❌ leads needs a lead store; pass --store or set LEADGEN_STORE.")
+        count = export_leads(store, args.output_json, args.output_csv, org_ids=args.org_ids, company=args.company,
+                             country=args.country, since=args.since, until=args.until)
+        log(f"✅ {count} RELEVANT leads saved to {args.output_json} and {args.output_csv}")
+        log(store.summary())
+    elif args.command == "run":
+        summary = run_manifest(
+            args.manifest,
+            require(setting(args, config, "apollo_api_key"), "apollo_api_key"),
+            require(setting(args, config, "gemini_api_key"), "gemini_api_key"),
+            workdir=setting(args, config, "workdir", DEFAULT_WORKDIR),
+            default_country=setting(args, config, "country", ""),
+            only_one_page=setting(args, config, "only_one_page", False),
+            incremental=setting(args, config, "incremental", False),
+            resume=setting(args, config, "resume", False),
+            use_async=setting(args, config, "use_async", False),
+            concurrency=setting(args, config, "concurrency", 0),
+            stop_on_error=setting(args, config, "stop_on_error", False),
+            use_rules=setting(args, config, "use_rules", True),
+            use_neighbors=setting(args, config, "use_neighbors", True),
+            columnar=setting(args, config, "columnar", False),
+            bulk=setting(args, config, "bulk", False),
+            poll_interval=setting(args, config, "poll_interval", POLL_INTERVAL),
+            pipelined=setting(args, config, "pipelined", False),
+            lead_store=store,
+            ttl=cache_ttl(args, config),
+        )
+        return 0 if all(r["status"] == "ok" for r in summary) else 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
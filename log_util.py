@@ -0,0 +1,5 @@
+from datetime import datetime
+
+# === LOG FUNCTION ===
+def log(msg):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
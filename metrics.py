@@ -0,0 +1,168 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+# === CONFIGURATION ===
+METRICS_ENV = "LEADGEN_METRICS_FILE"  # .prom / .txt -> Prometheus text, anything else -> JSON lines
+PREFIX = "leadgen_"
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+COUNT_BUCKETS = (1, 5, 10, 25, 50, 100, 200, 500)
+RATIO_BUCKETS = (0.1, 0.25, 0.5, 0.75, 0.9, 1.0)
+PROMETHEUS_EXTENSIONS = (".prom", ".txt")
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+# === REGISTRY ===
+class Metrics:
+    # Counters and histograms keyed by (name, labels); cheap enough to leave on
+    # everywhere, and only written out when a metrics file is configured
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.run_id = uuid.uuid4().hex[:8]
+        self.started = time.time()
+        self.counters = {}
+        self.histograms = {}
+        self.path = None
+
+    def inc(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = _key(name, labels)
+        with self.lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = {"buckets": buckets, "counts": [0] * (len(buckets) + 1),
+                                               "count": 0, "sum": 0.0, "min": value, "max": value}
+            position = len(buckets)
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    position = i
+                    break
+            hist["counts"][position] += 1
+            hist["count"] += 1
+            hist["sum"] += value
+            hist["min"] = min(hist["min"], value)
+            hist["max"] = max(hist["max"], value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    @contextmanager
+    def stage(self, stage):
+        # Wall and CPU seconds of one pipeline stage; the gap between them is time spent waiting
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.observe("stage_seconds", time.perf_counter() - wall, stage=stage)
+            self.inc("stage_cpu_seconds_total", time.process_time() - cpu, stage=stage)
+            self.inc("stage_runs_total", stage=stage)
+
+    def staged(self, stage):
+        # Decorator form of stage()
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.stage(stage):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    # === EXPORT ===
+    def snapshot(self):
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = {key: dict(hist, counts=list(hist["counts"])) for key, hist in self.histograms.items()}
+        series = []
+        for (name, labels), value in sorted(counters.items()):
+            series.append({"metric": PREFIX + name, "type": "counter", "labels": dict(labels), "value": round(value, 6)})
+        for (name, labels), hist in sorted(histograms.items()):
+            cumulative, buckets = 0, {}
+            for bound, count in zip(list(hist["buckets"]) + ["+Inf"], hist["counts"]):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            series.append({"metric": PREFIX + name, "type": "histogram", "labels": dict(labels),
+                           "count": hist["count"], "sum": round(hist["sum"], 6), "min": hist["min"],
+                           "max": hist["max"], "buckets": buckets})
+        return series
+
+    def to_json_lines(self):
+        stamp = {"ts": datetime.now().isoformat(timespec="seconds"), "run": self.run_id,
+                 "uptime_seconds": round(time.time() - self.started, 3)}
+        return "".join(json.dumps({**stamp, **series}, ensure_ascii=False) + "\n" for series in self.snapshot())
+
+    def to_prometheus(self):
+        lines, typed = [], set()
+        for series in self.snapshot():
+            name = series["metric"]
+            if name not in typed:
+                lines.append(f"# TYPE {name} {series['type']}")
+                typed.add(name)
+            if series["type"] == "counter":
+                lines.append(f"{name}{_labels(series['labels'])} {series['value']}")
+                continue
+            for bound, count in series["buckets"].items():
+                lines.append(f"{name}_bucket{_labels({**series['labels'], 'le': bound})} {count}")
+            lines.append(f"{name}_sum{_labels(series['labels'])} {series['sum']}")
+            lines.append(f"{name}_count{_labels(series['labels'])} {series['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path=None):
+        # JSON lines are appended so runs accumulate; the Prometheus file is replaced
+        # atomically, as node_exporter's textfile collector expects
+        path = path or self.path
+        if not path:
+            return None
+        if path.endswith(PROMETHEUS_EXTENSIONS):
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(self.to_prometheus())
+            os.replace(tmp, path)
+        else:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(self.to_json_lines())
+        return path
+
+    def enable(self, path):
+        # Writes the metrics file when the process exits
+        if path and not self.path:
+            atexit.register(self.write)
+        self.path = path or self.path
+        return self.path
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+# === PROCESS-WIDE REGISTRY ===
+REGISTRY = Metrics()
+inc = REGISTRY.inc
+observe = REGISTRY.observe
+timer = REGISTRY.timer
+stage = REGISTRY.stage
+staged = REGISTRY.staged
+write = REGISTRY.write
+enable = REGISTRY.enable
+
+def enable_from_env():
+    return enable(os.environ.get(METRICS_ENV))
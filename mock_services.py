@@ -0,0 +1,266 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from apollo_fetcher import ORG_SEARCH_PATH, PEOPLE_SEARCH_PATH
+from rule_classifier import RuleClassifier
+
+# === CONFIGURATION ===
+MOCK_API_PREFIX = "/v1"
+SENIORITIES = ["Manager", "Senior Manager", "Head of", "Director", "VP", "Assistant", "Intern", "Engineer",
+               "Technician", "Lead", "Deputy General Manager", "Trainee"]
+DEPARTMENTS = ["Maintenance", "Production", "Process Engineering", "Procurement", "Plant Operations", "Safety",
+               "Quality", "HR", "Finance", "Marketing", "Sales", "Legal", "Digital Transformation", "Melt Shop",
+               "Electrical", "Mechanical", "Supply Chain", "Accounts", "Talent Acquisition", "Instrumentation"]
+LOCALIZED_TITLES = ["Gerente de Producción", "Jefe de Mantenimiento", "Directeur d'usine", "Responsable Achats",
+                    "Leiter Instandhaltung", "Gerente de Recursos Humanos", "Analista Financeiro"]
+
+def synthetic_title(rng):
+    if rng.random() < 0.05:
+        return rng.choice(LOCALIZED_TITLES)
+    seniority, department = rng.choice(SENIORITIES), rng.choice(DEPARTMENTS)
+    return f"{seniority} {department}" if seniority == "Head of" or rng.random() < 0.5 else f"{department} {seniority}"
+
+class FaultInjector:
+    # Shared latency / 429 / 504 behavior for both stand-ins; seeded so runs are repeatable
+    def __init__(self, latency=0.0, jitter=0.0, rate_429=0.0, rate_504=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.rate_504 = rate_504
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.injected = {"429": 0, "504": 0}
+
+    def next_call(self):
+        # Returns (delay_seconds, fault) where fault is None, "429" or "504"
+        with self.lock:
+            self.calls += 1
+            roll = self.rng.random()
+            delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+            fault = "429" if roll < self.rate_429 else "504" if roll < self.rate_429 + self.rate_504 else None
+            if fault:
+                self.injected[fault] += 1
+        return delay, fault
+
+# === APOLLO STAND-IN (HTTP) ===
+class MockApolloServer:
+    # Serves /v1/organizations/search and /v1/mixed_people/search on localhost with
+    # real pagination, so ApolloSync(base_url=server.url) runs unmodified against it
+    def __init__(self, orgs=5, people_per_org=500, latency=0.05, jitter=0.0, rate_429=0.0, rate_504=0.0,
+                 retry_after=1.0, seed=0, host="127.0.0.1", port=0):
+        self.orgs = orgs
+        self.people_per_org = people_per_org
+        self.retry_after = retry_after
+        self.seed = seed
+        self.faults = FaultInjector(latency, jitter, rate_429, rate_504, seed)
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}{MOCK_API_PREFIX}"
+
+    @property
+    def calls(self):
+        return self.faults.calls
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # === RESPONSES ===
+    def org_id(self, n):
+        return f"{n + 1:024x}"
+
+    def search_organizations(self, payload):
+        name = payload.get("q_organization_name") or "Mock Co"
+        per_page = payload.get("per_page", 10)
+        return {"organizations": [{"id": self.org_id(n), "name": f"{name} {n}", "website_url": f"https://org{n}.example",
+                                   "location_country": "India"} for n in range(min(self.orgs, per_page))]}
+
+    def person(self, org_id, k):
+        rng = random.Random(f"{self.seed}:{org_id}:{k}")
+        title = synthetic_title(rng)
+        history = [{"title": title, "organization_name": f"Org {org_id[-4:]}", "start_date": "2020-01-01",
+                    "end_date": None, "current": True}]
+        for _ in range(rng.randint(0, 2)):
+            history.append({"title": synthetic_title(rng), "organization_name": f"Prior Co {rng.randint(1, 500)}",
+                            "start_date": "2015-01-01", "end_date": "2019-12-31", "current": False})
+        return {"id": f"{org_id[-8:]}{k:016x}", "first_name": f"First{k}", "last_name": f"Last{k}",
+                "name": f"First{k} Last{k}", "title": title, "linkedin_url": f"http://www.linkedin.com/in/mock-{org_id[-4:]}-{k}",
+                "city": "Pune", "state": "Maharashtra", "country": "India", "organization_id": org_id,
+                "employment_history": history}
+
+    def search_people(self, payload):
+        page, per_page = payload.get("page", 1), payload.get("per_page", 100)
+        people = []
+        for org_id in payload.get("organization_ids", []):
+            start = (page - 1) * per_page
+            people.extend(self.person(org_id, k) for k in range(start, min(start + per_page, self.people_per_org)))
+        total = self.people_per_org * len(payload.get("organization_ids", []))
+        return {"people": people, "pagination": {"page": page, "per_page": per_page, "total_entries": total,
+                                                 "total_pages": -(-total // per_page)}}
+
+    def _handler_class(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                delay, fault = service.faults.next_call()
+                time.sleep(delay)
+                if fault == "429":
+                    return self._reply(429, {"error": "rate limited (mock)"}, {"Retry-After": str(service.retry_after)})
+                if fault == "504":
+                    return self._reply(504, {"error": "gateway timeout (mock)"})
+                payload = json.loads(body or b"{}")
+                if self.path == MOCK_API_PREFIX + ORG_SEARCH_PATH:
+                    return self._reply(200, service.search_organizations(payload))
+                if self.path == MOCK_API_PREFIX + PEOPLE_SEARCH_PATH:
+                    return self._reply(200, service.search_people(payload))
+                return self._reply(404, {"error": f"unknown path {self.path}"})
+
+            def _reply(self, status, body, headers=None):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+# === GEMINI STAND-IN (IN-PROCESS) ===
+class MockGeminiError(Exception):
+    pass
+
+class MockUsage:
+    def __init__(self, prompt, text):
+        # Same rough 4-chars-per-token estimate the batcher uses
+        self.prompt_token_count = len(prompt) // 4
+        self.candidates_token_count = len(text) // 4
+
+class MockResponse:
+    def __init__(self, text, prompt=""):
+        self.text = text
+        self.usage_metadata = MockUsage(prompt, text)
+
+class MockGeminiModel:
+    # Drop-in for genai.GenerativeModel: answers the index/title prompt with one item per
+    # title, judged by the local rule classifier (unclear titles default to NOT RELEVANT).
+    # rate_truncate cuts that share of replies off mid-item, like a response hitting its token limit.
+    def __init__(self, latency=0.2, jitter=0.0, rate_429=0.0, rate_504=0.0, seed=0, rate_truncate=0.0):
+        self.faults = FaultInjector(latency, jitter, rate_429, rate_504, seed)
+        self.rules = RuleClassifier()
+        self.titles_seen = 0
+        self.rate_truncate = rate_truncate
+        self.truncated = 0
+        self.rng = random.Random(f"truncate:{seed}")
+
+    @property
+    def calls(self):
+        return self.faults.calls
+
+    def _answer(self, prompt, fault):
+        if fault == "429":
+            raise MockGeminiError("429 Resource has been exhausted (mock)")
+        if fault == "504":
+            raise MockGeminiError("504 Deadline Exceeded (mock)")
+        items = prompt_items(prompt)
+        self.titles_seen += len(items)
+        results = [{"index": item["index"], "original_title": item["title"], "translated_title": item["title"],
+                    "verdict": self.rules.classify(item["title"]) or "NOT RELEVANT"} for item in items]
+        text = "```json\n" + json.dumps(results, ensure_ascii=False) + "\n```"
+        if self.rate_truncate and self.rng.random() < self.rate_truncate:
+            self.truncated += 1
+            text = text[:self.rng.randint(len(text) // 3, len(text) - 5)]
+        return MockResponse(text, prompt)
+
+    def generate_content(self, prompt, **kwargs):
+        delay, fault = self.faults.next_call()
+        time.sleep(delay)
+        return self._answer(prompt, fault)
+
+    async def generate_content_async(self, prompt, **kwargs):
+        delay, fault = self.faults.next_call()
+        await asyncio.sleep(delay)
+        return self._answer(prompt, fault)
+
+# === GEMINI BATCH STAND-IN ===
+class MockBatchBackend:
+    # Drop-in for gemini_batch.GenaiBatchBackend: a job stays RUNNING for `polls` status
+    # checks, then ends as final_state; each request is answered like MockGeminiModel,
+    # with injected faults turned into per-request error lines
+    def __init__(self, polls=2, final_state="JOB_STATE_SUCCEEDED", rate_error=0.0, seed=0):
+        self.polls = polls
+        self.final_state = final_state
+        self.model = MockGeminiModel(latency=0.0, rate_504=rate_error, seed=seed)
+        self.jobs = {}
+
+    @property
+    def calls(self):
+        return self.model.calls
+
+    def submit(self, requests_file, display_name):
+        with open(requests_file, "r", encoding="utf-8") as f:
+            requests = [json.loads(line) for line in f if line.strip()]
+        name = f"batches/mock-{len(self.jobs) + 1}-{display_name}"
+        self.jobs[name] = {"requests": requests, "polls": 0}
+        return name
+
+    def state(self, job_name):
+        job = self.jobs[job_name]
+        job["polls"] += 1
+        return "JOB_STATE_RUNNING" if job["polls"] <= self.polls else self.final_state
+
+    def download(self, job_name, results_file):
+        with open(results_file, "w", encoding="utf-8") as f:
+            for request in self.jobs[job_name]["requests"]:
+                prompt = request["request"]["contents"][0]["parts"][0]["text"]
+                _, fault = self.model.faults.next_call()
+                try:
+                    response = self.model._answer(prompt, fault)
+                except MockGeminiError as e:
+                    line = {"key": request["key"], "error": {"code": 504, "message": str(e)}}
+                else:
+                    line = {"key": request["key"], "response": {
+                        "candidates": [{"content": {"role": "model", "parts": [{"text": response.text}]}}],
+                        "usageMetadata": {"promptTokenCount": response.usage_metadata.prompt_token_count,
+                                          "candidatesTokenCount": response.usage_metadata.candidates_token_count}}}
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+
+def prompt_items(prompt):
+    # The titles are the last line of the prompt that parses as a JSON list of {index, title}
+    for line in reversed(prompt.strip().splitlines()):
+        line = line.strip()
+        if line.startswith("["):
+            try:
+                items = json.loads(line)
+            except ValueError:
+                continue
+            if all(isinstance(item, dict) and "index" in item for item in items):
+                return items
+    raise MockGeminiError("no titles found in prompt (mock)")
@@ -0,0 +1,184 @@
+import csv
+import glob
+import gzip
+import io
+import json
+import os
+import tempfile
+from array import array
+
+import metrics
+from log_util import log
+from columnar_store import PEOPLE_COLUMNS, PEOPLE_DERIVED, PEOPLE_JSON_COLUMNS
+from final_filteration_mapping import compact_id, load_relevant_ids
+from json_to_csv_convertor import DEFAULT_MODE, PERSON_COLUMNS, resolve_columns, row_builder
+from stream_io import iter_records, open_writer
+
+# === CONFIGURATION ===
+COPY_CHUNK = 1 << 20  # Bytes copied at a time from a shard into the merged CSV
+
+def expand_inputs(patterns):
+    # Globs (e.g. "runs/*/full_people_data.ndjson") in the order given, each sorted; a
+    # pattern that matches nothing is kept as-is so the missing file is reported
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    files = [path for pattern in patterns for path in sorted(glob.glob(pattern)) or [pattern]]
+    return list(dict.fromkeys(files))
+
+# === WORKER: ONE INPUT FILE -> ONE SHARD ===
+_relevant_ids = None
+
+def _init_worker(classification_file):
+    # Runs once per worker process; each one keeps its own RELEVANT id set
+    global _relevant_ids
+    _relevant_ids = load_relevant_ids(classification_file) if classification_file else None
+
+def _export_file(task):
+    # Parses and flattens one people file into a CSV shard (and an NDJSON shard when
+    # JSON output is wanted). Duplicates are left in: the parent drops them while merging,
+    # using the per-person id, CSV byte size and row count recorded here.
+    n, path, shard_dir, mode, fieldnames, with_json = task
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"File '{path}' not found.")
+    csv_shard = os.path.join(shard_dir, f"{n:05d}.csv")
+    json_shard = os.path.join(shard_dir, f"{n:05d}.ndjson") if with_json else None
+    # Full records only when they are copied to the JSON output; otherwise just what the rows need
+    source_columns = None if with_json else list(PERSON_COLUMNS.values()) + ["employment_history"]
+    rows_for = row_builder(mode, fieldnames)
+    keys, sizes, rows = [], array("Q"), array("I")
+    scanned = 0
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    json_out = open(json_shard, "w", encoding="utf-8") if with_json else None
+    try:
+        with open(csv_shard, "wb") as csv_out:
+            for person in iter_records(path, source_columns):
+                scanned += 1
+                person_id = person.get("id")
+                key = compact_id(person_id) if person_id else None  # People without an id are never deduplicated
+                if _relevant_ids is not None and key not in _relevant_ids:
+                    continue
+                person_rows = rows_for(person)
+                writer.writerows(person_rows)
+                data = buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+                csv_out.write(data)
+                keys.append(key)
+                sizes.append(len(data))
+                rows.append(len(person_rows))
+                if json_out:
+                    json_out.write(json.dumps(person, ensure_ascii=False) + "\n")
+    finally:
+        if json_out:
+            json_out.close()
+    return {"path": path, "csv": csv_shard, "json": json_shard, "keys": keys, "sizes": sizes, "rows": rows,
+            "scanned": scanned}
+
+# === MERGE ===
+def _open_csv_output(output_file, compress=None):
+    # Binary counterpart of json_to_csv_convertor.open_output: shards are copied as bytes
+    if compress is None:
+        compress = output_file.endswith(".gz")
+    if compress:
+        return gzip.open(output_file, "wb", compresslevel=6)
+    return open(output_file, "wb")
+
+def _copy_range(src, dst, size):
+    while size > 0:
+        chunk = src.read(min(size, COPY_CHUNK))
+        if not chunk:
+            raise ValueError(f"{src.name}: shard ended early")
+        dst.write(chunk)
+        size -= len(chunk)
+
+def _merge_shard(shard, seen, csv_out, json_writer):
+    # Appends one shard's people, skipping ids already written from an earlier file
+    kept = rows = duplicates = 0
+    json_in = open(shard["json"], "r", encoding="utf-8") if shard["json"] else None
+    try:
+        with open(shard["csv"], "rb") as csv_in:
+            # Consecutive people that are all kept are copied as one run of bytes
+            pending = 0
+            for key, size, count in zip(shard["keys"], shard["sizes"], shard["rows"]):
+                line = json_in.readline().rstrip("\n") if json_in else None
+                if key is not None and key in seen:
+                    _copy_range(csv_in, csv_out, pending)
+                    pending = 0
+                    csv_in.seek(size, os.SEEK_CUR)
+                    duplicates += 1
+                    continue
+                if key is not None:
+                    seen.add(key)
+                pending += size
+                kept += 1
+                rows += count
+                if json_writer is not None:
+                    json_writer(line)
+            _copy_range(csv_in, csv_out, pending)
+    finally:
+        if json_in:
+            json_in.close()
+    return kept, rows, duplicates
+
+def _json_output(output_json):
+    # JSON / NDJSON outputs take the shard lines as they are; columnar ones decode them again
+    writer = open_writer(output_json, PEOPLE_COLUMNS, PEOPLE_JSON_COLUMNS, PEOPLE_DERIVED)
+    write = getattr(writer, "write_encoded", None) or (lambda text: writer.write(json.loads(text)))
+    return writer, write
+
+# === PARALLEL EXPORT (library entry point) ===
+@metrics.staged("export_parallel")
+def export_parallel(people_files, output_csv="output.csv", output_json=None, mode=DEFAULT_MODE, columns=None,
+                    compress=None, classification_file=None, workers=None):
+    # people_files: paths or globs. Each file is parsed and flattened in its own worker
+    # process; the shards are merged in input order into one CSV (and optionally one
+    # people JSON/NDJSON/Parquet file), keeping a person id only the first time it appears.
+    # classification_file limits both outputs to RELEVANT people, like final_filteration_mapping.
+    # Gzip output is compressed by the merging process, so it does not scale with workers.
+    files = expand_inputs(people_files)
+    fieldnames = resolve_columns(mode, columns)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(files)))
+    log(f"🧮 Exporting {len(files)} people files with {workers} worker process(es)")
+
+    summary = {"files": len(files), "scanned": 0, "people": 0, "duplicates": 0, "rows": 0}
+    seen = set()
+    with tempfile.TemporaryDirectory(prefix="leadgen_export_") as shard_dir:
+        tasks = [(n, path, shard_dir, mode, fieldnames, output_json is not None) for n, path in enumerate(files)]
+        pool = None
+        if workers > 1:
+            from concurrent.futures import ProcessPoolExecutor  # Pulls in multiprocessing; only needed here
+            pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(classification_file,))
+            shards = pool.map(_export_file, tasks)  # Yields in input order as the workers finish
+        else:
+            _init_worker(classification_file)
+            shards = map(_export_file, tasks)
+        json_writer = write_json = None
+        try:
+            if output_json:
+                json_writer, write_json = _json_output(output_json)
+            with _open_csv_output(output_csv, compress) as csv_out:
+                header = io.StringIO()
+                csv.writer(header).writerow(fieldnames)
+                csv_out.write(header.getvalue().encode("utf-8"))
+                for shard in shards:
+                    kept, rows, duplicates = _merge_shard(shard, seen, csv_out, write_json)
+                    summary["scanned"] += shard["scanned"]
+                    summary["people"] += kept
+                    summary["rows"] += rows
+                    summary["duplicates"] += duplicates
+                    os.remove(shard["csv"])
+                    if shard["json"]:
+                        os.remove(shard["json"])
+                    print(f"📄 {shard['path']}: {shard['scanned']} people, {kept} new, {duplicates} already exported")
+        finally:
+            if json_writer is not None:
+                json_writer.close()
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+    metrics.inc("export_rows_written_total", summary["rows"], mode=mode)
+    metrics.inc("export_duplicates_skipped_total", summary["duplicates"])
+    log(f"✅ {summary['people']} unique people ({summary['duplicates']} duplicates skipped), {summary['rows']} rows "
+        f"saved as {output_csv}" + (f" and {output_json}" if output_json else ""))
+    return summary
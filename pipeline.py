@@ -0,0 +1,199 @@
+import csv
+import os
+import queue
+import threading
+import time
+
+import metrics
+from log_util import log
+from LLM_calling_script import save_classified, save_keywords
+from apollo_lead_gen_automation import (ID_TITLE_FILE, ID_TITLE_PARQUET_FILE, PEOPLE_NDJSON_FILE, PEOPLE_PARQUET_FILE,
+                                        id_title, select_org_ids)
+from columnar_store import ID_TITLE_COLUMNS, PEOPLE_COLUMNS, PEOPLE_DERIVED, PEOPLE_JSON_COLUMNS
+from final_filteration_mapping import CSV_FIELDS, compact_id, relevant_row
+from journal import JOURNAL_FILE, Journal
+from json_to_csv_convertor import DEFAULT_MODE, flatten_people, open_output, resolve_columns
+from stream_io import open_writer
+
+# === CONFIGURATION ===
+QUEUE_PAGES = 8  # Pages buffered between stages; a full queue stalls the stage feeding it
+CHUNK_TITLES = 800  # Titles gathered before a classify pass, so Gemini batches stay full
+PUT_TIMEOUT = 0.5  # Seconds between checks for a failed stage while blocked on a full queue
+DONE = object()
+
+# === STAGE PLUMBING ===
+class PipelineStopped(RuntimeError):
+    # Raised in a stage that was waiting on a queue when another stage failed
+    pass
+
+class Stage(threading.Thread):
+    # Runs one pipeline stage in the background; the first error stops every stage
+    def __init__(self, name, target, stop):
+        super().__init__(name=name, daemon=True)
+        self.target_fn = target
+        self.stop = stop
+        self.error = None
+
+    def run(self):
+        try:
+            with metrics.timer("pipeline_stage_seconds", stage=self.name):
+                self.target_fn()
+        except BaseException as e:
+            self.error = e
+            self.stop.set()
+
+def put(q, item, stop):
+    # Blocking put that gives up once another stage has failed, so nothing deadlocks on a full queue
+    start = time.perf_counter()
+    while True:
+        try:
+            q.put(item, timeout=PUT_TIMEOUT)
+            break
+        except queue.Full:
+            if stop.is_set():
+                raise PipelineStopped("pipeline stopped")
+    metrics.inc("pipeline_backpressure_seconds_total", time.perf_counter() - start, queue=getattr(q, "label", ""))
+
+def get(q, stop, block=True):
+    while True:
+        try:
+            return q.get(block=block, timeout=PUT_TIMEOUT if block else None)
+        except queue.Empty:
+            if not block:
+                return None
+            if stop.is_set():
+                raise PipelineStopped("pipeline stopped")
+
+def bounded_queue(label, maxsize=QUEUE_PAGES):
+    q = queue.Queue(maxsize)
+    q.label = label
+    return q
+
+# === PIPELINED COMPANY RUN ===
+def run_pipelined(company, country, output_dir, sync, classifier, org_indices="", only_one_page=False,
+                  incremental=False, resume=False, use_async=False, columnar=False,
+                  queue_pages=QUEUE_PAGES, chunk_titles=CHUNK_TITLES, export_mode=DEFAULT_MODE):
+    # fetch -> classify -> filter + export with the stages running at the same time. Pages
+    # flow through bounded queues: the fetcher blocks when classification falls behind and
+    # the classifier blocks when the writers do, so memory stays bounded by the queues.
+    # Writes the same files as the stage-by-stage run and returns the same summary.
+    # Bulk (batch job) classification takes hours per job, so it only runs stage by stage.
+    os.makedirs(output_dir, exist_ok=True)
+    path = lambda name: os.path.join(output_dir, name)
+    ext = ".parquet" if columnar else ".json"
+    people_file = path(PEOPLE_PARQUET_FILE if columnar else PEOPLE_NDJSON_FILE)
+    id_title_file = path(ID_TITLE_PARQUET_FILE if columnar else ID_TITLE_FILE)
+    classified_file = path("classified_titles" + ext)
+
+    orgs = sync.search_organizations(company)
+    if not orgs:
+        raise LookupError(f"No organizations found for '{company}'")
+    org_ids = select_org_ids(orgs, org_indices)
+
+    stop = threading.Event()
+    pages = bounded_queue("pages", queue_pages)
+    classified_pages = bounded_queue("classified", queue_pages)
+    counts = {"people": 0, "relevant": 0, "exported_rows": 0}
+
+    # === STAGE 1: FETCH ===
+    def fetch():
+        people_writer = open_writer(people_file, PEOPLE_COLUMNS, PEOPLE_JSON_COLUMNS, PEOPLE_DERIVED)
+        id_title_writer = open_writer(id_title_file, ID_TITLE_COLUMNS)
+        try:
+            for org_id, page, people in sync.people_pages(org_ids, country, only_one_page, incremental):
+                if stop.is_set():
+                    break
+                people_writer.write_many(people)
+                id_title_writer.write_many(id_title(p) for p in people)
+                counts["people"] += len(people)
+                if people:
+                    put(pages, people, stop)
+        finally:
+            people_writer.close()
+            id_title_writer.close()
+        put(pages, DONE, stop)
+
+    # === STAGE 3: FILTER + EXPORT ===
+    def sink():
+        relevant_writer = open_writer(path("filtered_relevant_entries" + ext), CSV_FIELDS)
+        fieldnames = resolve_columns(export_mode)
+        written = set()
+        try:
+            with open(path("filtered_relevant_entries.csv"), "w", newline="", encoding="utf-8") as relevant_csv, \
+                    open_output(path("output.csv")) as export_csv:
+                relevant_rows = csv.DictWriter(relevant_csv, fieldnames=CSV_FIELDS)
+                relevant_rows.writeheader()
+                export_rows = csv.writer(export_csv)
+                export_rows.writerow(fieldnames)
+                while True:
+                    item = get(classified_pages, stop)
+                    if item is DONE:
+                        break
+                    people, relevant_ids = item
+                    rows = list(flatten_people(people, export_mode, fieldnames))
+                    export_rows.writerows(rows)
+                    counts["exported_rows"] += len(rows)
+                    for person in people:
+                        key = compact_id(person.get("id", ""))
+                        if key in relevant_ids and key not in written:
+                            written.add(key)
+                            row = relevant_row(person)
+                            relevant_writer.write(row)
+                            relevant_rows.writerow(row)
+        finally:
+            relevant_writer.close()
+            counts["relevant"] = len(written)
+
+    # === STAGE 2: CLASSIFY (this thread, which owns the classifier's SQLite cache) ===
+    fetcher, writer = Stage("fetch", fetch, stop), Stage("sink", sink, stop)
+    fetcher.start()
+    writer.start()
+    classified, error = [], None
+    journal = Journal(path(JOURNAL_FILE), resume=resume)
+    try:
+        finished = False
+        while not finished and not stop.is_set():
+            # Block for one page, then take whatever else is already waiting, up to a chunk
+            chunk = [get(pages, stop)]
+            while chunk[-1] is not DONE and sum(len(p) for p in chunk) < chunk_titles:
+                item = get(pages, stop, block=False)
+                if item is None:
+                    break
+                chunk.append(item)
+            finished = chunk[-1] is DONE
+            chunk = [people for people in chunk if people is not DONE]
+            if not chunk:
+                continue
+            entries = [id_title(p) for people in chunk for p in people]
+            results = classifier.classify(entries, resume=resume, use_async=use_async, journal=journal)
+            classified.extend(results)
+            relevant_ids = {compact_id(r["id"]) for r in results if r["classification"] == "RELEVANT"}
+            for people in chunk:
+                put(classified_pages, (people, relevant_ids), stop)
+            metrics.inc("pipeline_chunks_total")
+        if not stop.is_set():
+            put(classified_pages, DONE, stop)
+    except BaseException as e:
+        error = e
+        stop.set()
+    finally:
+        journal.close()
+    fetcher.join()
+    writer.join()
+    # Raise the root cause, not the PipelineStopped the other stages saw
+    failures = [e for e in (fetcher.error, writer.error, error) if e is not None]
+    if failures:
+        raise next((e for e in failures if not isinstance(e, PipelineStopped)), failures[0])
+
+    save_classified(classified, classified_file)
+    save_keywords(classified, path("include_keywords.txt"), path("exclude_keywords.txt"))
+    log(f"🚰 Pipelined {counts['people']} people: {len(classified)} classified, {counts['relevant']} RELEVANT, "
+        f"{counts['exported_rows']} rows exported")
+    return {
+        "company": company,
+        "country": country,
+        "people": counts["people"],
+        "classified": len(classified),
+        "relevant": counts["relevant"],
+        "exported_rows": counts["exported_rows"],
+    }
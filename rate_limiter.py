@@ -0,0 +1,88 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+
+# === CONFIGURATION ===
+WINDOW_SECONDS = 60
+BACKOFF_BASE = 2.0
+BACKOFF_CAP = 60.0
+RATE_LIMIT_BACKOFF_BASE = 8.0  # 429s need longer to clear than timeouts
+
+# === TOKEN BUCKET ===
+class RateLimiter:
+    # Sliding-window token bucket: the bucket holds max_rpm tokens and each token
+    # returns exactly WINDOW_SECONDS after it was taken, so no 60s window ever sees
+    # more than max_rpm requests. max_rpd tokens are available for the whole run.
+    def __init__(self, max_rpm, max_rpd, window=WINDOW_SECONDS, used_today=0, recent=()):
+        # used_today / recent (wall-clock times of the last window's requests) restore
+        # state saved by an earlier run, so a restart cannot overshoot either limit
+        self.max_rpm = max_rpm
+        self.max_rpd = max_rpd
+        self.window = window
+        offset = time.monotonic() - time.time()
+        self.issued = deque(sorted(t + offset for t in recent))
+        self.day_count = used_today
+        self.lock = threading.Lock()
+
+    def remaining_today(self):
+        return max(self.max_rpd - self.day_count, 0)
+
+    def reset_day(self):
+        with self.lock:
+            self.day_count = 0
+
+    def recent(self):
+        # Wall-clock times of the requests still inside the window, for persisting
+        offset = time.time() - time.monotonic()
+        with self.lock:
+            return [t + offset for t in self.issued]
+
+    def reserve(self):
+        # Returns 0 when a token was taken, the seconds to wait otherwise, or None when the day is spent
+        with self.lock:
+            if self.day_count >= self.max_rpd:
+                return None
+            now = time.monotonic()
+            while self.issued and now - self.issued[0] >= self.window:
+                self.issued.popleft()
+            if len(self.issued) < self.max_rpm:
+                self.issued.append(now)
+                self.day_count += 1
+                return 0
+            return self.window - (now - self.issued[0])
+
+    def wait(self):
+        while True:
+            delay = self.reserve()
+            if delay is None:
+                return False
+            if delay <= 0:
+                return True
+            time.sleep(delay)
+
+    async def acquire(self):
+        while True:
+            delay = self.reserve()
+            if delay is None:
+                return False
+            if delay <= 0:
+                return True
+            await asyncio.sleep(delay)
+
+# === RETRY CLASSIFICATION ===
+def retry_reason(error):
+    err = str(error)
+    if "429" in err or "Resource has been exhausted" in err:
+        return "429"
+    if "504" in err or "Deadline Exceeded" in err or "503" in err:
+        return "504"
+    return None
+
+# === EXPONENTIAL BACKOFF WITH JITTER ===
+def backoff_delay(attempt, reason=None, cap=BACKOFF_CAP):
+    base = RATE_LIMIT_BACKOFF_BASE if reason == "429" else BACKOFF_BASE
+    ceiling = min(cap, base * 2 ** attempt)
+    # Equal jitter: never retry immediately, but spread concurrent retries apart
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
@@ -0,0 +1,97 @@
+import json
+import re
+
+# === CONFIGURATION ===
+ITEM_KEY = "index"  # Objects carrying this key are result items; anything else is a wrapper or noise
+VERDICTS = ["RELEVANT", "NOT RELEVANT"]
+
+# Gemini structured-output schema for the classification reply (OpenAPI subset, as the API expects)
+RESPONSE_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "index": {"type": "INTEGER"},
+            "original_title": {"type": "STRING"},
+            "translated_title": {"type": "STRING"},
+            "verdict": {"type": "STRING", "enum": VERDICTS},
+        },
+        "required": ["index", "original_title", "translated_title", "verdict"],
+    },
+}
+
+_SPECIAL = re.compile(r'["\\{}]')
+_NESTED = -1
+
+def _object_end(text, start):
+    # End offset of the flat {...} opening at start, None while it is still incomplete,
+    # or _NESTED when another object opens inside it (a wrapper to look into instead)
+    depth, in_string, i = 0, False, start
+    while True:
+        match = _SPECIAL.search(text, i)
+        if match is None:
+            return None
+        ch, i = match.group(), match.end()
+        if in_string:
+            if ch == "\\":
+                i += 1
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+            if depth > 1:
+                return _NESTED
+        else:
+            depth -= 1
+            if depth == 0:
+                return i
+
+# === INCREMENTAL ITEM PARSER ===
+class ItemParser:
+    # feed() whole responses or streamed chunks and get back every complete item seen
+    # so far. Prose, code fences, stray brackets and malformed items are skipped instead
+    # of failing the batch; a cut-off tail just stays pending until more text arrives.
+    def __init__(self, key=ITEM_KEY):
+        self.key = key
+        self.buffer = ""
+        self.pos = 0
+        self.items = 0
+        self.malformed = 0  # Complete {...} spans that did not decode to an item
+
+    def feed(self, text):
+        self.buffer += text
+        found = []
+        while True:
+            start = self.buffer.find("{", self.pos)
+            if start == -1:
+                self.pos = len(self.buffer)
+                return found
+            end = _object_end(self.buffer, start)
+            if end is None:
+                self.pos = start  # Incomplete: resume from here on the next feed
+                return found
+            if end == _NESTED:
+                self.pos = start + 1
+                continue
+            try:
+                item = json.loads(self.buffer[start:end])
+            except ValueError:
+                item = None
+            if isinstance(item, dict) and self.key in item:
+                found.append(item)
+                self.items += 1
+            else:
+                self.malformed += 1
+            self.pos = end
+
+    @property
+    def truncated(self):
+        # True when the text ended inside an unfinished object
+        return self.buffer.find("{", self.pos) != -1
+
+def parse_items(raw, key=ITEM_KEY):
+    # Returns (items, parser) for a complete response; parser carries the malformed / truncated stats
+    parser = ItemParser(key)
+    return parser.feed(raw or ""), parser
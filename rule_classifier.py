@@ -0,0 +1,121 @@
+import os
+import re
+
+# === CONFIGURATION ===
+INCLUDE_KEYWORDS_FILE = "include_keywords.txt"
+EXCLUDE_KEYWORDS_FILE = "exclude_keywords.txt"
+
+# Mirrors the rules spelled out in the classify_batch prompt
+SENIORITY_TERMS = [
+    "manager", "mgr", "head", "director", "vp", "vice president", "president", "chief", "cxo",
+    "ceo", "coo", "cto", "cio", "cdo", "gm", "general manager", "superintendent", "avp", "dgm", "agm", "plant head", "works manager",
+]
+JUNIOR_TERMS = [
+    "intern", "internship", "trainee", "apprentice", "student", "graduate engineer trainee",
+    "operator", "technician", "helper", "fitter", "welder", "electrician", "worker", "assistant",
+    "associate", "junior", "jr", "clerk", "attendant",
+]
+# Left out on purpose: "Lead" / "Leader" ("Team Lead - Maintenance" is not middle management),
+# "Principal" / "Controller" (Principal Engineer, Instrumentation Controller are individual
+# contributors) and "GET" (also the ordinary word "get").
+# Domains of the plant-floor prompts (LLM_title_classifier.py); a rule pass for another
+# prompt must be given that prompt's own domain list.
+PLANT_DOMAIN_TERMS = [
+    "process", "production", "product development", "product engineering", "melt shop", "melting",
+    "steel shop", "sms", "furnace", "blast furnace", "kiln", "maintenance", "mechanical", "electrical",
+    "instrumentation", "reliability", "plant", "factory", "works", "site", "operations", "manufacturing",
+    "safety", "ehs", "hse", "digital", "digitization", "digitalization", "industry 4.0", "automation",
+    "engineering",
+]
+# LLM_calling_script's prompt adds Procurement / Sourcing / Vendor Management
+DOMAIN_TERMS = PLANT_DOMAIN_TERMS + ["procurement", "sourcing", "purchase", "purchasing", "vendor"]
+# Only the departments the prompt itself rules out (HR, Admin, Legal, Finance, Talent, Marketing);
+# anything else, sales included, is left to Gemini
+EXCLUDED_DEPARTMENT_TERMS = [
+    "hr", "human resources", "human resource", "talent", "recruitment", "recruiter", "payroll",
+    "admin", "administration", "administrative", "legal", "counsel", "finance", "financial",
+    "accounts", "accounting", "accountant", "treasury", "marketing",
+]
+# Words too generic to tell the classes apart when seeding from keyword files
+STOPWORDS = {"of", "and", "the", "&", "for", "in", "at", "de", "y", "a", "to", "senior", "sr", "sr."}
+
+# === KEYWORD FILE SEEDING ===
+def read_keywords(path):
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip().lower() for line in f if line.strip()]
+
+def _compile(terms):
+    # Longest terms first so "general manager" wins over "manager"; None for an empty list,
+    # which would otherwise compile to a pattern that matches everywhere
+    alternatives = sorted({t for t in terms if t}, key=len, reverse=True)
+    if not alternatives:
+        return None
+    return re.compile(r"(?<![\w])(?:" + "|".join(re.escape(t) for t in alternatives) + r")(?![\w])", re.IGNORECASE)
+
+def _matches(pattern, text):
+    return pattern is not None and pattern.search(text) is not None
+
+# === RULE-BASED PRE-CLASSIFIER ===
+class RuleClassifier:
+    def __init__(self, include_keywords=(), exclude_keywords=(), domain_terms=DOMAIN_TERMS):
+        # Only the vetted lists decide a verdict. Keywords learned from earlier Gemini runs
+        # are generic role words as often as departments ("executive", "officer", "engineer"),
+        # so they can only send a title to Gemini: a learned exclude word vetoes a local
+        # RELEVANT, a learned include word vetoes a local NOT RELEVANT.
+        vetted = set(SENIORITY_TERMS) | set(JUNIOR_TERMS) | set(domain_terms) | set(EXCLUDED_DEPARTMENT_TERMS)
+        include = {k for k in include_keywords if k not in STOPWORDS} - vetted
+        exclude = {k for k in exclude_keywords if k not in STOPWORDS} - vetted
+        shared = include & exclude
+        self.seniority_re = _compile(SENIORITY_TERMS)
+        self.junior_re = _compile(JUNIOR_TERMS)
+        self.domain_re = _compile(domain_terms)
+        self.excluded_re = _compile(EXCLUDED_DEPARTMENT_TERMS)
+        self.learned_include_re = _compile(include - shared)
+        self.learned_exclude_re = _compile(exclude - shared)
+
+    @classmethod
+    def from_keyword_files(cls, include_file=INCLUDE_KEYWORDS_FILE, exclude_file=EXCLUDE_KEYWORDS_FILE,
+                           domain_terms=DOMAIN_TERMS):
+        return cls(read_keywords(include_file), read_keywords(exclude_file), domain_terms)
+
+    def classify(self, title):
+        # Returns "RELEVANT" / "NOT RELEVANT" for clear-cut titles, None when only the LLM can tell
+        text = (title or "").replace("/", " ").replace("-", " ").replace("_", " ")
+        if not text.strip():
+            return None
+        senior = _matches(self.seniority_re, text)
+        junior = _matches(self.junior_re, text)
+        domain = _matches(self.domain_re, text)
+        excluded = _matches(self.excluded_re, text)
+
+        if (excluded and not domain) or (junior and not senior):
+            verdict = "NOT RELEVANT"
+        elif senior and domain and not excluded and not junior:
+            verdict = "RELEVANT"
+        else:
+            return None
+        learned = self.learned_exclude_re if verdict == "RELEVANT" else self.learned_include_re
+        return None if _matches(learned, text) else verdict
+
+    def split(self, titles):
+        # Returns (resolved, ambiguous): resolved maps position -> verdict
+        resolved = {}
+        ambiguous = []
+        for idx, title in enumerate(titles):
+            verdict = self.classify(title)
+            if verdict is None:
+                ambiguous.append(idx)
+            else:
+                resolved[idx] = verdict
+        return resolved, ambiguous
+
+# === TITLE SIGNALS ===
+SIGNAL_RE = _compile(SENIORITY_TERMS + JUNIOR_TERMS + DOMAIN_TERMS + EXCLUDED_DEPARTMENT_TERMS)
+
+def title_signals(title):
+    # The seniority and department terms the rules look at, e.g. {"manager", "maintenance"};
+    # two titles with different signals can deserve different verdicts however alike they read
+    text = (title or "").replace("/", " ").replace("-", " ").replace("_", " ")
+    return frozenset(match.lower() for match in SIGNAL_RE.findall(text))
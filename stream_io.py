@@ -0,0 +1,136 @@
+import json
+import re
+
+import columnar_store
+
+READ_CHUNK = 1 << 16  # Characters read per refill by the incremental JSON list parser
+WHITESPACE = " \t\r\n"
+NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")  # Characters that could still belong to a number
+
+# === NDJSON WRITER ===
+class NDJSONWriter:
+    # One JSON document per line; safe to append to and to read back line by line
+    def __init__(self, path, mode="w"):
+        self.path = path
+        self.count = 0
+        self.file = open(path, mode, encoding="utf-8")
+
+    def write(self, record):
+        self.write_encoded(json.dumps(record, ensure_ascii=False))
+
+    def write_encoded(self, text):
+        # text: one already-encoded JSON document, e.g. a line copied from another NDJSON file
+        self.file.write(text + "\n")
+        self.count += 1
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+# === STREAMING JSON ARRAY WRITER ===
+class JSONArrayWriter:
+    # Writes a regular JSON list one item at a time, so readers that json.load the
+    # file keep working while the writer never holds the whole list in memory
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self.file = open(path, "w", encoding="utf-8")
+        self.file.write("[")
+
+    def write(self, record):
+        self.write_encoded(json.dumps(record, ensure_ascii=False))
+
+    def write_encoded(self, text):
+        self.file.write(",\n  " if self.count else "\n  ")
+        self.file.write(text)
+        self.count += 1
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+        self.file.flush()
+
+    def close(self):
+        self.file.write("\n]\n" if self.count else "]\n")
+        self.file.close()
+
+# === READERS ===
+def iter_ndjson(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+def iter_json_array(path, chunk_size=READ_CHUNK):
+    # Yields the items of a top-level JSON list one at a time; only the current
+    # item and one read chunk are held in memory, whatever the file size
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buffer, pos, eof = "", 0, False
+
+        def refill():
+            nonlocal buffer, pos, eof
+            chunk = f.read(chunk_size)
+            buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+
+        def next_char():
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in WHITESPACE:
+                    pos += 1
+                if pos < len(buffer):
+                    return buffer[pos]
+                if eof:
+                    raise ValueError(f"{path}: truncated JSON list")
+                refill()
+
+        if next_char() != "[":
+            raise ValueError(f"{path}: expected a JSON list")
+        pos += 1
+        if next_char() == "]":
+            return
+        while True:
+            next_char()
+            while True:
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                    # A number cut at the buffer edge decodes as a shorter one ("1." as 1,
+                    # "-2.5e" as -2.5), so it is only accepted once something follows it
+                    number = isinstance(item, (int, float)) and not isinstance(item, bool)
+                    if eof or not (number and NUMBER_TAIL.match(buffer, end).end() == len(buffer)):
+                        break
+                except ValueError:
+                    if eof:
+                        raise
+                refill()
+            pos = end
+            yield item
+            separator = next_char()
+            pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise ValueError(f"{path}: expected ',' or ']' between list items")
+
+def iter_records(path, columns=None):
+    # .ndjson/.jsonl files stream line by line, .parquet/.arrow files read only the
+    # requested columns; anything else is a JSON list, parsed incrementally.
+    # columns is a hint: JSON sources still yield whole records.
+    if columnar_store.is_columnar(path):
+        return columnar_store.iter_columnar(path, columns)
+    if path.endswith((".ndjson", ".jsonl")):
+        return iter_ndjson(path)
+    return iter_json_array(path)
+
+def open_writer(path, columns=None, json_columns=(), derived=None):
+    # Picks the writer from the file extension; the column arguments only matter for columnar files
+    if columnar_store.is_columnar(path):
+        return columnar_store.ColumnarWriter(path, columns, json_columns, derived)
+    if path.endswith((".ndjson", ".jsonl")):
+        return NDJSONWriter(path)
+    return JSONArrayWriter(path)
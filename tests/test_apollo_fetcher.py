@@ -0,0 +1,70 @@
+import pytest
+import requests
+
+import apollo_fetcher
+from apollo_fetcher import ApolloFetcher
+from mock_services import MockApolloServer
+
+class FakeResponse:
+    def __init__(self, status_code, body=None, text=""):
+        self.status_code = status_code
+        self.headers = {}
+        self.body = body
+        self.text = text
+
+    def json(self):
+        if self.body is None:
+            raise requests.JSONDecodeError("Expecting value", self.text, 0)
+        return self.body
+
+class FakeSession:
+    # Plays back one outcome per request: an exception to raise or a response to return
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def post(self, url, data=None, timeout=None):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def fetcher(monkeypatch):
+    monkeypatch.setattr(apollo_fetcher, "backoff_delay", lambda attempt, reason=None: 0.0)
+    fetcher = ApolloFetcher("test-key", base_url="http://apollo.invalid/v1")
+    fetcher.session.close()
+    yield fetcher
+    fetcher.close()
+
+def test_connection_errors_and_timeouts_are_retried(fetcher):
+    fetcher.session = FakeSession([requests.ConnectionError("reset"), requests.Timeout("slow"),
+                                   FakeResponse(200, {"organizations": [{"id": "o1"}]})])
+    assert fetcher.search_organizations("Acme") == [{"id": "o1"}]
+    assert fetcher.session.calls == 3
+
+def test_unreadable_body_is_retried(fetcher):
+    fetcher.session = FakeSession([FakeResponse(502, text="<html>Bad gateway</html>"), FakeResponse(200, text=""),
+                                   FakeResponse(200, {"organizations": []})])
+    assert fetcher.search_organizations("Acme") == []
+    assert fetcher.session.calls == 3
+
+def test_gives_up_after_max_retries(fetcher):
+    fetcher.session = FakeSession([requests.ConnectionError("down")] * apollo_fetcher.MAX_RETRIES)
+    with pytest.raises(RuntimeError):
+        fetcher.search_organizations("Acme")
+
+def test_pages_every_org_against_mock_apollo():
+    with MockApolloServer(orgs=2, people_per_org=250, latency=0) as server:
+        fetcher = ApolloFetcher("test-key", base_url=server.url)
+        try:
+            org_ids = [org["id"] for org in fetcher.search_organizations("Acme")]
+            pages = list(fetcher.iter_people_pages(org_ids, "India"))
+        finally:
+            fetcher.close()
+    assert sorted((org_id, page) for org_id, page, _ in pages) == [(o, p) for o in sorted(org_ids) for p in (1, 2, 3)]
+    assert sum(len(people) for _, _, people in pages) == 500
@@ -0,0 +1,48 @@
+import pytest
+
+from apollo_lead_gen_automation import ApolloSync
+from mock_services import MockApolloServer
+
+class TurnoverApollo(MockApolloServer):
+    # shift people out of the front of the roster and as many new ones in at the back
+    shift = 0
+
+    def person(self, org_id, k):
+        return super().person(org_id, k + self.shift)
+
+@pytest.fixture
+def apollo():
+    with TurnoverApollo(orgs=1, people_per_org=250, latency=0) as server:
+        yield server
+
+@pytest.fixture
+def sync(apollo, tmp_path):
+    sync = ApolloSync("test-key", cache_file=str(tmp_path / "apollo_cache.sqlite3"), base_url=apollo.url)
+    yield sync
+    sync.close()
+
+def fetch(sync, apollo, incremental):
+    org_ids = [apollo.org_id(0)]
+    return [p["id"] for _, _, people in sync.people_pages(org_ids, "India", incremental=incremental) for p in people]
+
+def test_incremental_skips_an_unchanged_org(sync, apollo):
+    assert len(fetch(sync, apollo, False)) == 250
+    calls = apollo.calls
+    assert fetch(sync, apollo, True) == []
+    assert apollo.calls == calls + 1  # Page 1 only, asked fresh
+
+def test_incremental_finds_newcomers_when_the_total_is_unchanged(sync, apollo):
+    before = set(fetch(sync, apollo, False))
+    apollo.shift = 10
+    new = fetch(sync, apollo, True)
+    assert len(new) == 10
+    assert not before & set(new)
+
+def test_plain_fetch_is_served_from_cache_until_refresh(sync, apollo, tmp_path):
+    fetch(sync, apollo, False)
+    calls = apollo.calls
+    fetch(sync, apollo, False)
+    assert apollo.calls == calls
+    sync.response_cache.ttl = 0  # What --refresh passes
+    fetch(sync, apollo, False)
+    assert apollo.calls == calls + 3
@@ -0,0 +1,46 @@
+from batching import BatchQueue, item_cost
+
+def verdict(index, value="RELEVANT"):
+    return {"index": index, "original_title": "", "translated_title": "", "verdict": value}
+
+def test_batches_stay_within_token_budget():
+    titles = [f"Maintenance Manager {n}" for n in range(20)]
+    budget = 3 * item_cost(titles[0])
+    queue = BatchQueue(titles, token_budget=budget, max_batch_size=100)
+    sizes = []
+    while queue:
+        sizes.append(len(queue.next_batch()))
+    assert sizes == [3, 3, 3, 3, 3, 3, 2]
+
+def test_oversized_title_still_goes_out_alone():
+    queue = BatchQueue(["x" * 10_000, "Plant Head"], token_budget=10)
+    assert [item["index"] for item in queue.next_batch()] == [0]
+    assert [item["index"] for item in queue.next_batch()] == [1]
+
+def test_settle_matches_by_index_and_requeues_the_rest():
+    queue = BatchQueue(["A", "B", "C", "D"])
+    batch = queue.next_batch()
+    results = [verdict(2), verdict("0", "NOT RELEVANT"), verdict(1, "MAYBE"), verdict(9), verdict(2, "NOT RELEVANT")]
+    matched, failed = queue.settle(batch, results)
+    assert matched == {0: verdict("0", "NOT RELEVANT"), 2: verdict(2)}  # First answer per index wins
+    assert failed == []
+    assert [item["index"] for item in queue.next_batch()] == [1, 3]
+
+def test_gives_up_after_max_requeues():
+    queue = BatchQueue(["A", "B"], max_requeues=2)
+    assert queue.settle(queue.next_batch(), [verdict(0)])[1] == []
+    assert queue.settle(queue.next_batch(), [])[1] == []
+    # Index 1 has now been missed twice; the third miss exhausts it
+    batch = queue.next_batch()
+    assert [item["index"] for item in batch] == [1]
+    matched, failed = queue.settle(batch, "not a list")
+    assert matched == {}
+    assert failed == [1]
+    assert not queue
+
+def test_restore_puts_unsent_batch_back_in_front_without_counting():
+    queue = BatchQueue(["A", "B", "C"], max_batch_size=2)
+    batch = queue.next_batch()
+    queue.restore(batch)
+    assert [item["index"] for item in queue.next_batch()] == [0, 1]
+    assert queue.requeues == {}
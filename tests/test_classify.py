@@ -0,0 +1,33 @@
+from LLM_calling_script import GeminiTitleClassifier
+from mock_services import MockGeminiModel
+
+TITLES = ["Data Analyst", "Plant Head", "HR Manager", "Chief Storyteller", "Plant Head", "Maintenance Manager",
+          "Brand Ambassador", "Works Manager", "Data Analyst", "Intern"]
+
+def make_classifier(tmp_path, **options):
+    return GeminiTitleClassifier(
+        "test-key", model=MockGeminiModel(latency=0), max_rpm=1000, cache_file=str(tmp_path / "title_cache.sqlite3"),
+        usage_file=str(tmp_path / "key_usage.sqlite3"), include_file=str(tmp_path / "include.txt"),
+        exclude_file=str(tmp_path / "exclude.txt"), index_file=str(tmp_path / "title_index.npz"), **options)
+
+def test_results_follow_input_order(tmp_path):
+    data = [{"id": f"p{n}", "title": title} for n, title in enumerate(TITLES)]
+    classifier = make_classifier(tmp_path)
+    try:
+        # Warm the cache with a few titles so results come from cache, rules and Gemini
+        classifier.classify(data[3:6], journal_file=str(tmp_path / "warm.jsonl"))
+        results = classifier.classify(data, journal_file=str(tmp_path / "journal.jsonl"))
+    finally:
+        classifier.close()
+    assert [r["id"] for r in results] == [entry["id"] for entry in data]
+    assert [r["title"] for r in results] == TITLES
+
+def test_rule_verdicts_claim_no_translation(tmp_path):
+    data = [{"id": "a", "title": "Plant Head"}, {"id": "b", "title": "Chief Storyteller"}]
+    classifier = make_classifier(tmp_path)
+    try:
+        by_id = {r["id"]: r for r in classifier.classify(data, journal_file=str(tmp_path / "journal.jsonl"))}
+    finally:
+        classifier.close()
+    assert by_id["a"]["translated_title"] == ""  # Settled by the local rules
+    assert by_id["b"]["translated_title"] == "Chief Storyteller"  # Gemini's own answer
@@ -0,0 +1,47 @@
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from columnar_store import (CLASSIFIED_COLUMNS, PEOPLE_COLUMNS, PEOPLE_DERIVED, PEOPLE_JSON_COLUMNS,
+                            ColumnarWriter, iter_columnar, read_table)
+
+PEOPLE = [
+    {"id": "p1", "first_name": "Asha", "title": "Plant Head", "seniority": "head", "phone_numbers": [],
+     "employment_history": [{"organization_name": "Acme", "current": True}, {"organization_name": "Beta"}]},
+    # Non-string and null values for plain columns stay in the record column
+    {"id": "p2", "title": None, "city": 42, "organization_id": "o2", "employment_history": []},
+    {"id": "p3", "organization_name": "Set by Apollo"},
+]
+
+def write_people(path, row_group_size=2):
+    writer = ColumnarWriter(str(path), PEOPLE_COLUMNS, PEOPLE_JSON_COLUMNS, PEOPLE_DERIVED, row_group_size)
+    writer.write_many(PEOPLE)
+    writer.close()
+    return writer
+
+@pytest.mark.parametrize("name", ["people.parquet", "people.arrow"])
+def test_whole_records_round_trip(tmp_path, name):
+    writer = write_people(tmp_path / name)
+    assert writer.count == 3
+    assert list(iter_columnar(str(tmp_path / name))) == PEOPLE
+
+@pytest.mark.parametrize("name", ["people.parquet", "people.arrow"])
+def test_projection_decodes_json_and_derives_organization_name(tmp_path, name):
+    write_people(tmp_path / name)
+    rows = list(iter_columnar(str(tmp_path / name), ["id", "organization_name", "employment_history", "classification"]))
+    assert [row["organization_name"] for row in rows] == ["Acme", None, None]
+    assert rows[0]["employment_history"] == PEOPLE[0]["employment_history"]
+    assert rows[1]["employment_history"] == []
+    assert all(row["classification"] is None for row in rows)
+    # Values the plain columns cannot hold exactly are not duplicated there
+    assert [row["title"] for row in iter_columnar(str(tmp_path / name), ["title"])] == ["Plant Head", None, None]
+
+def test_files_without_record_column(tmp_path):
+    path = str(tmp_path / "classified.parquet")
+    records = [{"id": "p1", "title": "Plant Head", "translated_title": "Plant Head", "classification": "RELEVANT"},
+               {"id": "p2", "title": "HR", "classification": "NOT RELEVANT"}]
+    writer = ColumnarWriter(path, CLASSIFIED_COLUMNS)
+    writer.write_many(records)
+    writer.close()
+    assert list(iter_columnar(path)) == [records[0], dict(records[1], translated_title=None)]
+    assert read_table(path, ["id"]).column("id").to_pylist() == ["p1", "p2"]
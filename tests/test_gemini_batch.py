@@ -0,0 +1,61 @@
+import json
+import os
+
+import pytest
+
+from gemini_batch import BatchJobRunner, _remap
+from mock_services import MockBatchBackend
+from response_parser import parse_items
+
+def build_prompt(batch):
+    return "Classify these titles:\n" + json.dumps(batch)
+
+def make_runner(tmp_path, backend, **options):
+    return BatchJobRunner(backend, build_prompt, job_file=str(tmp_path / "job.json"), poll_interval=0, **options)
+
+def verdicts(pairs):
+    out = {}
+    for batch, text in pairs:
+        items, _ = parse_items(text)
+        out.update({item["index"]: item["verdict"] for item in items})
+    return out
+
+def test_fresh_run_returns_every_batch(tmp_path):
+    backend = MockBatchBackend(polls=1)
+    batches = [[{"index": 0, "title": "Maintenance Head"}, {"index": 1, "title": "HR Manager"}],
+               [{"index": 2, "title": "Plant Head"}]]
+    pairs, unsent = make_runner(tmp_path, backend).run(batches)
+    assert [batch for batch, _ in pairs] == batches and unsent == []
+    assert verdicts(pairs) == {0: "RELEVANT", 1: "NOT RELEVANT", 2: "RELEVANT"}
+    assert not os.path.exists(tmp_path / "job.json")
+
+def test_resume_remaps_the_recorded_job_onto_this_runs_indices(tmp_path):
+    backend = MockBatchBackend(polls=0)
+    # An earlier run submitted the job and was interrupted before it finished
+    make_runner(tmp_path, backend).submit([[{"index": 0, "title": "Maintenance Head"},
+                                            {"index": 1, "title": "HR Manager"},
+                                            {"index": 2, "title": "Plant Head"}]])
+    # This run still needs two of those titles, under new indices, plus one the job never had
+    pending = [[{"index": 7, "title": "plant head"}, {"index": 8, "title": "Maintenance  Head"},
+                {"index": 9, "title": "Works Manager"}]]
+    pairs, unsent = make_runner(tmp_path, backend).run(pending)
+    assert len(backend.jobs) == 1
+    assert [item["index"] for batch, _ in pairs for item in batch] == [8, 7]
+    assert verdicts(pairs) == {8: "RELEVANT", 7: "RELEVANT"}
+    assert unsent == [{"index": 9, "title": "Works Manager"}]
+
+def test_remap_normalizes_string_indices_and_drops_unmapped_items():
+    batch = [{"index": 0, "title": "Plant Head"}, {"index": 1, "title": "HR Manager"}]
+    text = json.dumps([{"index": "0", "verdict": "RELEVANT"}, {"index": 1, "verdict": "NOT RELEVANT"},
+                       {"index": 5, "verdict": "RELEVANT"}, {"index": "one", "verdict": "RELEVANT"},
+                       {"index": True, "verdict": "RELEVANT"}])
+    remapped, remapped_text = _remap(batch, text, {"plant head": 10})
+    assert remapped == [{"index": 10, "title": "Plant Head"}]
+    assert json.loads(remapped_text) == [{"index": 10, "verdict": "RELEVANT"}]
+    assert _remap(batch, None, {"plant head": 10}) == (remapped, None)
+
+def test_failed_job_raises_and_forgets_the_job(tmp_path):
+    runner = make_runner(tmp_path, MockBatchBackend(polls=0, final_state="JOB_STATE_FAILED"))
+    with pytest.raises(RuntimeError):
+        runner.run([[{"index": 0, "title": "Plant Head"}]])
+    assert not os.path.exists(tmp_path / "job.json")
@@ -0,0 +1,47 @@
+import json
+import os
+
+from journal import Journal, read_journal
+
+def write_lines(path, lines):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("".join(lines))
+
+def record(id_, verdict):
+    return json.dumps({"id": id_, "title": "t", "translated_title": "t", "classification": verdict}) + "\n"
+
+def test_resume_skips_torn_last_line(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    write_lines(path, [record("a", "RELEVANT"), record("b", "NOT RELEVANT"), '{"id": "c", "classif'])
+    journal = Journal(path, resume=True)
+    assert set(journal.completed) == {"a", "b"}
+    journal.append({"id": "c", "classification": "RELEVANT"})
+    journal.close()
+    # The torn line is terminated before appending, so the new record reads back whole
+    assert [r["id"] for r in read_journal(path)] == ["a", "b", "c"]
+
+def test_resume_retries_errors_and_keeps_latest_verdict(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    write_lines(path, [record("a", "ERROR"), record("b", "RELEVANT"), record("b", "NOT RELEVANT"),
+                       record("c", "RELEVANT"), record("c", "ERROR")])
+    journal = Journal(path, resume=True)
+    journal.close()
+    assert journal.completed == {"b": json.loads(record("b", "NOT RELEVANT"))}
+
+def test_fresh_run_moves_old_journal_aside(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    write_lines(path, [record("a", "RELEVANT")])
+    journal = Journal(path)
+    journal.append({"id": "z", "classification": "RELEVANT"})
+    journal.close()
+    assert journal.completed == {}
+    assert [r["id"] for r in read_journal(journal.rotated)] == ["a"]
+    assert [r["id"] for r in read_journal(path)] == ["z"]
+    assert sorted(os.listdir(tmp_path)) == sorted(["journal.jsonl", os.path.basename(journal.rotated)])
+
+def test_fresh_run_over_empty_journal_rotates_nothing(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    write_lines(path, [])
+    journal = Journal(path)
+    journal.close()
+    assert journal.rotated is None
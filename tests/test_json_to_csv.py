@@ -0,0 +1,61 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+from json_to_csv_convertor import PERSON_COLUMNS, convert, flatten_people, resolve_columns
+
+PEOPLE = [
+    {"id": "p1", "first_name": "Asha", "title": "Plant Head", "country": "India",
+     "employment_history": [
+         {"title": "Plant Head", "organization_name": "Acme", "start_date": "2020-01-01", "current": True},
+         {"title": "Engineer", "organization_name": "Beta", "end_date": "2019-12-31", "current": False},
+         {"title": "Trainee", "organization_name": "Acme", "current": False},
+     ]},
+    {"id": "p2", "first_name": "Ravi", "title": "HR Manager"},
+]
+
+def rows(mode, columns=None):
+    return [dict(zip(resolve_columns(mode, columns), row)) for row in flatten_people(PEOPLE, mode, columns)]
+
+def test_job_mode_has_a_row_per_job_and_one_for_people_without_history():
+    result = rows("job")
+    assert [(r["id"], r["employment_org"]) for r in result] == [("p1", "Acme"), ("p1", "Beta"), ("p1", "Acme"), ("p2", None)]
+    assert result[1]["end_date"] == "2019-12-31"
+
+def test_current_mode_keeps_only_the_current_job():
+    result = rows("current")
+    assert [(r["id"], r["employment_title"], r["is_current"]) for r in result] == [("p1", "Plant Head", True), ("p2", None, None)]
+
+def test_person_mode_summarizes_history():
+    result = rows("person")
+    assert [(r["id"], r["employment_count"], r["employment_orgs"]) for r in result] == [("p1", 3, "Acme; Beta"), ("p2", 0, "")]
+    assert "employment_title" not in result[0]
+
+def test_column_projection_follows_the_requested_order():
+    assert list(flatten_people(PEOPLE, "current", ["employment_org", "id"])) == [("Acme", "p1"), (None, "p2")]
+    assert list(flatten_people(PEOPLE, "person", ["first_name"])) == [("Asha",), ("Ravi",)]
+
+def test_unknown_mode_or_column_raises():
+    with pytest.raises(ValueError):
+        resolve_columns("company")
+    with pytest.raises(ValueError):
+        resolve_columns("person", ["employment_title"])
+    assert resolve_columns("job") == list(PERSON_COLUMNS) + ["employment_title", "employment_org", "start_date", "end_date", "is_current"]
+
+@pytest.mark.parametrize("output_name", ["out.csv", "out.csv.gz"])
+def test_convert_streams_ndjson_to_csv(tmp_path, output_name):
+    source = tmp_path / "people.ndjson"
+    source.write_text("".join(json.dumps(p) + "\n" for p in PEOPLE), encoding="utf-8")
+    output = tmp_path / output_name
+    assert convert(str(source), str(output), mode="current", columns=["id", "employment_org"]) == 2
+    raw = output.read_bytes()
+    if output_name.endswith(".gz"):
+        raw = gzip.decompress(raw)
+    assert list(csv.reader(io.StringIO(raw.decode("utf-8")))) == [["id", "employment_org"], ["p1", "Acme"], ["p2", ""]]
+
+def test_convert_missing_file_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        convert(str(tmp_path / "missing.json"), str(tmp_path / "out.csv"))
@@ -0,0 +1,53 @@
+import sqlite3
+
+import metrics
+from key_pool import KeyPool, parse_keys
+
+KEYS = ["AIzaSyAAAA1111", "AIzaSyBBBB2222", "AIzaSyCCCC3333"]
+
+def test_parse_keys_splits_and_drops_duplicates():
+    assert parse_keys(" a, b ,,a ") == ["a", "b"]
+    assert parse_keys(["a", "", "a", "c"]) == ["a", "c"]
+
+def test_labels_and_storage_never_contain_key_characters(tmp_path):
+    usage_file = str(tmp_path / "usage.sqlite3")
+    pool = KeyPool(KEYS, max_rpm=10, max_rpd=10, usage_file=usage_file)
+    slot = pool.wait()
+    pool.throttle(slot, 30)
+    pool.close()
+    assert [s.label for s in pool.slots] == ["key-1", "key-2", "key-3"]
+    stored = sqlite3.connect(usage_file).execute("SELECT key_id FROM key_usage").fetchall()
+    for text in [pool.summary(), str(list(metrics.REGISTRY.counters)), *(row[0] for row in stored)]:
+        assert not any(key[-4:] in text for key in KEYS)
+
+def test_requests_go_to_the_key_with_most_headroom():
+    pool = KeyPool(KEYS[:2], max_rpm=10, max_rpd=3, usage_file=None)
+    picked = [pool.wait().label for _ in range(6)]
+    assert picked.count("key-1") == 3 and picked.count("key-2") == 3
+    assert picked[:2] == ["key-1", "key-2"]
+    # Every key spent for the day
+    assert pool.wait() is None
+    assert pool.remaining_today() == 0 and pool.day_count == 6
+
+def test_throttled_key_sits_out_while_another_takes_over():
+    pool = KeyPool(KEYS[:2], max_rpm=10, max_rpd=10, usage_file=None)
+    first = pool.wait()
+    assert pool.throttle(first, 60) is True
+    assert {pool.wait().label for _ in range(3)} == {"key-2"}
+    other = pool.slots[1]
+    assert pool.throttle(other, 60) is False
+    slot, delay = pool.reserve()
+    assert slot is None and 0 < delay <= 60
+
+def test_usage_carries_across_instances(tmp_path):
+    usage_file = str(tmp_path / "usage.sqlite3")
+    pool = KeyPool(KEYS[:1], max_rpm=10, max_rpd=5, usage_file=usage_file)
+    for _ in range(3):
+        pool.wait()
+    pool.throttle(pool.slots[0], 1)
+    pool.close()
+
+    restarted = KeyPool(KEYS[:1], max_rpm=10, max_rpd=5, usage_file=usage_file)
+    assert restarted.day_count == 3 and restarted.slots[0].throttled == 1
+    assert restarted.remaining_today() == 2
+    restarted.close()
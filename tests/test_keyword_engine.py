@@ -0,0 +1,50 @@
+import json
+
+from keyword_engine import KeywordCounter, count_file, terms, tokenize, write_keywords
+
+def sample_counter():
+    counter = KeywordCounter()
+    for title in ["Plant Maintenance Manager", "Maintenance Head", "Plant Head", "Maintenance Engineer"]:
+        counter.add(title, "RELEVANT")
+    for title in ["HR Manager", "HR Executive", "Sales Executive", "Sales Manager"]:
+        counter.add(title, "NOT RELEVANT")
+    return counter
+
+def test_tokenize_folds_case_and_keeps_inner_dots():
+    assert tokenize("Sr.Mgr – MAINTENANCE") == ["sr.mgr", "maintenance"]
+    assert list(terms("Plant Head")) == ["plant", "head", "plant head"]
+
+def test_errors_and_unknown_labels_are_not_counted():
+    counter = KeywordCounter()
+    counter.update([{"title": "Plant Head", "classification": "ERROR"}, {"title": "Plant Head"}])
+    assert counter.records == 0
+    assert counter.log_odds() == {}
+
+def test_ranked_splits_terms_by_class():
+    include, exclude = sample_counter().ranked()
+    include_terms = [term for term, *_ in include]
+    exclude_terms = [term for term, *_ in exclude]
+    assert include_terms[0] == "maintenance"
+    assert {"plant", "head"} <= set(include_terms)
+    assert {"hr", "sales", "executive"} <= set(exclude_terms)
+    # "manager" appears once on each side, so it separates the classes least
+    assert exclude_terms[-1] == "manager"
+    # Singletons fall under MIN_COUNT
+    assert "engineer" not in include_terms
+    assert all(z > 0 for _, z, _, _ in include) and all(z < 0 for _, z, _, _ in exclude)
+
+def test_count_file_reads_journals_and_write_keywords(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    rows = [{"title": "Maintenance Head", "classification": "RELEVANT"},
+            {"title": "Maintenance Manager", "classification": "RELEVANT"},
+            {"title": "HR Head", "classification": "NOT RELEVANT"},
+            {"title": "HR Manager", "classification": "NOT RELEVANT"}]
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows) + '{"title": "torn', encoding="utf-8")
+    counter = count_file(str(path))
+    assert counter.records == 4
+
+    include_file, exclude_file = tmp_path / "include.txt", tmp_path / "exclude.txt"
+    include, exclude = write_keywords(counter, str(include_file), str(exclude_file), top_k=1)
+    assert include == ["maintenance"] and exclude == ["hr"]
+    assert include_file.read_text(encoding="utf-8") == "maintenance"
+    assert exclude_file.read_text(encoding="utf-8") == "hr"
@@ -0,0 +1,57 @@
+import pytest
+
+import lead_store
+from lead_store import LeadStore
+
+ORGS = [{"id": "o1", "name": "Acme Steel", "location_country": "India"},
+        {"id": "o2", "name": "Beta Foods", "location_country": "Germany"}]
+
+def person(id_, org_id, title, country="India", **fields):
+    return dict({"id": id_, "organization_id": org_id, "title": title, "country": country,
+                 "employment_history": [{"organization_name": "Acme Steel"}]}, **fields)
+
+def verdict(id_, classification):
+    return {"id": id_, "title": "t", "translated_title": "t", "classification": classification}
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    clock = iter(["2026-01-01T09:00:00", "2026-02-01T09:00:00", "2026-03-01T09:00:00", "2026-04-01T09:00:00"])
+    monkeypatch.setattr(lead_store, "_now", lambda: next(clock))
+    store = LeadStore(str(tmp_path / "leads.sqlite3"))
+    store.upsert_orgs(ORGS)  # 2026-01
+    store.upsert_people([person("a", "o1", "Plant Head"), person("b", "o1", "HR Manager"),
+                         person("c", "o2", "Works Manager", country="Germany")])  # 2026-02
+    yield store
+    store.close()
+
+def test_people_upsert_refreshes_fields_but_keeps_first_seen(store):
+    store.upsert_people([person("a", "o1", "Maintenance Head", first_name="Asha")])  # 2026-03
+    row = store.conn.execute("SELECT title, title_key, first_name, organization_name, first_seen, last_seen "
+                             "FROM people WHERE person_id = 'a'").fetchone()
+    assert row == ("Maintenance Head", "maintenance head", "Asha", "Acme Steel",
+                   "2026-02-01T09:00:00", "2026-03-01T09:00:00")
+    assert store.conn.execute("SELECT COUNT(*) FROM people").fetchone()[0] == 3
+
+def test_error_never_overwrites_a_verdict(store):
+    store.upsert_classifications([verdict("a", "RELEVANT"), verdict("b", "ERROR")])
+    store.upsert_classifications([verdict("a", "ERROR"), verdict("b", "NOT RELEVANT")])
+    verdicts = dict(store.conn.execute("SELECT person_id, classification FROM classifications").fetchall())
+    assert verdicts == {"a": "RELEVANT", "b": "NOT RELEVANT"}
+
+def test_relevant_leads_filters(store):
+    store.upsert_classifications([verdict("a", "RELEVANT"), verdict("b", "NOT RELEVANT"), verdict("c", "RELEVANT")])
+    ids = lambda **filters: [lead["id"] for lead in store.relevant_leads(**filters)]
+    assert ids() == ["a", "c"]
+    assert ids(org_ids=["o2"]) == ["c"]
+    assert ids(company="acme") == ["a"]
+    assert ids(country="india") == ["a"]
+    assert ids(since="2026-02-01") == ["a", "c"]
+    assert ids(until="2026-02-01") == []
+    lead = next(store.relevant_leads(org_ids=["o1"]))
+    assert lead["organization_name"] == "Acme Steel" and lead["last_seen"] == "2026-02-01T09:00:00"
+
+def test_id_titles_returns_people_still_to_classify(store):
+    store.upsert_classifications([verdict("a", "RELEVANT"), verdict("b", "ERROR")])
+    assert store.id_titles() == [{"id": "b", "title": "HR Manager"}, {"id": "c", "title": "Works Manager"}]
+    assert store.id_titles(country="Germany") == [{"id": "c", "title": "Works Manager"}]
+    assert [r["id"] for r in store.id_titles(unclassified=False)] == ["a", "b", "c"]
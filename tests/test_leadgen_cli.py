@@ -0,0 +1,27 @@
+import argparse
+import json
+
+import leadgen_cli
+from leadgen_cli import cache_ttl, setting
+
+def test_settings_resolve_flag_then_env_then_config(monkeypatch):
+    config = {"concurrency": "3", "incremental": "yes"}
+    args = argparse.Namespace(concurrency=None, incremental=None)
+    assert setting(args, config, "concurrency", 0) == 3
+    monkeypatch.setenv("LEADGEN_CONCURRENCY", "5")
+    assert setting(args, config, "concurrency", 0) == 5
+    args.concurrency = 7
+    assert setting(args, config, "concurrency", 0) == 7
+    assert setting(args, config, "incremental", False) is True
+
+def test_refresh_overrides_cache_ttl():
+    args = argparse.Namespace(refresh=None, cache_ttl=600)
+    assert cache_ttl(args, {}) == 600
+    args.refresh = True
+    assert cache_ttl(args, {}) == 0
+
+def test_file_commands_leave_the_lead_store_alone(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "people.json").write_text(json.dumps([{"id": "a", "title": "Plant Head"}]), encoding="utf-8")
+    assert leadgen_cli.main(["export", "--input", "people.json", "--output", "out.csv"]) == 0
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["out.csv", "people.json"]
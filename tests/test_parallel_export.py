@@ -0,0 +1,69 @@
+import csv
+import json
+
+import pytest
+
+from parallel_export import expand_inputs, export_parallel
+
+def person(id_, title, *orgs):
+    return {"id": id_, "first_name": id_.upper(), "title": title,
+            "employment_history": [{"title": title, "organization_name": org, "current": n == 0} for n, org in enumerate(orgs)]}
+
+FILES = {
+    "run1/people.ndjson": [person("a", "Plant Head", "Acme", "Beta"), person("b", "HR Manager", "Acme")],
+    "run2/people.ndjson": [person("b", "HR Manager", "Acme"), person("c", "Works Manager", "Gamma"),
+                           {"title": "No id"}],
+    "run3/people.json": [person("a", "Plant Head", "Acme", "Beta"), person("d", "Maintenance Head")],
+}
+
+@pytest.fixture
+def inputs(tmp_path):
+    for name, people in FILES.items():
+        path = tmp_path / name
+        path.parent.mkdir(exist_ok=True)
+        if name.endswith(".ndjson"):
+            path.write_text("".join(json.dumps(p) + "\n" for p in people), encoding="utf-8")
+        else:
+            path.write_text(json.dumps(people), encoding="utf-8")
+    return tmp_path
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+def test_expand_inputs_keeps_pattern_order_and_missing_files(inputs):
+    files = expand_inputs([str(inputs / "run3/*.json"), str(inputs / "run*/people.ndjson"), str(inputs / "gone.json")])
+    assert [f.replace(str(inputs) + "/", "") for f in files] == ["run3/people.json", "run1/people.ndjson",
+                                                                 "run2/people.ndjson", "gone.json"]
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_merge_keeps_input_order_and_first_copy_of_each_person(inputs, workers):
+    output = inputs / "out.csv"
+    output_json = inputs / "out.ndjson"
+    summary = export_parallel(str(inputs / "run*/people.*"), str(output), str(output_json), workers=workers)
+    assert summary == {"files": 3, "scanned": 7, "people": 5, "duplicates": 2, "rows": 6}
+    rows = read_csv(output)
+    assert rows[0][0] == "id"
+    assert [(row[0], row[-4]) for row in rows[1:]] == [("a", "Acme"), ("a", "Beta"), ("b", "Acme"), ("c", "Gamma"),
+                                                       ("", ""), ("d", "")]
+    people = [json.loads(line) for line in output_json.read_text(encoding="utf-8").splitlines()]
+    assert [p.get("id") for p in people] == ["a", "b", "c", None, "d"]
+    assert people[0] == FILES["run1/people.ndjson"][0]
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_classification_file_limits_output_to_relevant_people(inputs, workers):
+    classification = inputs / "classified_titles.json"
+    classification.write_text(json.dumps([{"id": "a", "classification": "RELEVANT"},
+                                          {"id": "c", "classification": "NOT RELEVANT"},
+                                          {"id": "d", "classification": "RELEVANT"}]), encoding="utf-8")
+    output = inputs / "out.csv"
+    summary = export_parallel(str(inputs / "run*/people.*"), str(output), mode="person",
+                              columns=["id", "employment_count"], classification_file=str(classification),
+                              workers=workers)
+    assert read_csv(output) == [["id", "employment_count"], ["a", "2"], ["d", "0"]]
+    assert summary["people"] == 2 and summary["duplicates"] == 1
+
+def test_missing_input_raises(inputs):
+    with pytest.raises(FileNotFoundError):
+        export_parallel([str(inputs / "run1/people.ndjson"), str(inputs / "gone.json")], str(inputs / "out.csv"),
+                        workers=1)
@@ -0,0 +1,60 @@
+import threading
+
+import pytest
+
+from pipeline import run_pipelined
+
+class FakeSync:
+    def __init__(self, pages=20, per_page=5, fail_at=None):
+        self.pages = pages
+        self.per_page = per_page
+        self.fail_at = fail_at
+
+    def search_organizations(self, company):
+        return [{"id": "org-1", "name": company}]
+
+    def people_pages(self, org_ids, country, only_one_page=False, incremental=False):
+        for page in range(1, self.pages + 1):
+            if page == self.fail_at:
+                raise ConnectionError("Apollo went away")
+            people = [{"id": f"p{page}-{k}", "title": "Plant Head" if k == 0 else "HR Manager",
+                       "employment_history": [{"organization_name": "Acme", "current": True}]}
+                      for k in range(self.per_page)]
+            yield org_ids[0], page, people
+
+class FakeClassifier:
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    def classify(self, entries, resume=False, use_async=False, journal=None):
+        if self.fail:
+            raise ValueError("Gemini is down")
+        return [{"id": e["id"], "title": e["title"], "translated_title": e["title"],
+                 "classification": "RELEVANT" if e["title"] == "Plant Head" else "NOT RELEVANT"} for e in entries]
+
+def run(tmp_path, sync, classifier, **options):
+    return run_pipelined("Acme", "India", str(tmp_path), sync, classifier, queue_pages=1, chunk_titles=5, **options)
+
+def test_pipeline_writes_every_stage(tmp_path):
+    summary = run(tmp_path, FakeSync(pages=4), FakeClassifier())
+    assert summary["people"] == 20 and summary["classified"] == 20
+    assert summary["relevant"] == 4 and summary["exported_rows"] == 20
+    lines = (tmp_path / "filtered_relevant_entries.csv").read_text(encoding="utf-8").splitlines()
+    assert [line.split(",")[0] for line in lines[1:]] == ["p1-0", "p2-0", "p3-0", "p4-0"]
+
+@pytest.mark.parametrize("sync, classifier, options, error", [
+    (FakeSync(fail_at=3), FakeClassifier(), {}, ConnectionError),
+    (FakeSync(), FakeClassifier(fail=True), {}, ValueError),
+    (FakeSync(), FakeClassifier(), {"export_mode": "company"}, ValueError),
+], ids=["fetch", "classify", "sink"])
+def test_a_failing_stage_stops_the_others_and_raises_its_error(tmp_path, sync, classifier, options, error):
+    # Small queues keep the healthy stages blocked on puts when one fails; none may hang
+    with pytest.raises(error):
+        run(tmp_path, sync, classifier, **options)
+    assert not [t for t in threading.enumerate() if t.name in ("fetch", "sink")]
+
+def test_no_organizations_raises(tmp_path):
+    sync = FakeSync()
+    sync.search_organizations = lambda company: []
+    with pytest.raises(LookupError):
+        run(tmp_path, sync, FakeClassifier())
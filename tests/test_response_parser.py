@@ -0,0 +1,43 @@
+from batching import BatchQueue
+from response_parser import ItemParser, parse_items
+
+ITEM_0 = '{"index": 0, "original_title": "Plant Head", "translated_title": "Plant Head", "verdict": "RELEVANT"}'
+ITEM_1 = '{"index": 1, "original_title": "HR Manager", "translated_title": "HR Manager", "verdict": "NOT RELEVANT"}'
+
+def test_truncated_reply_keeps_complete_items():
+    items, parser = parse_items(f'[{ITEM_0}, {{"index": 1, "original_title": "HR Man')
+    assert [item["index"] for item in items] == [0]
+    assert parser.truncated
+    assert parser.malformed == 0
+
+def test_noisy_reply_skips_prose_fences_and_garbled_items():
+    raw = (f"Sure! Here are the verdicts:\n```json\n[{ITEM_0},\n{{\"index\": 2, verdict: RELEVANT}},\n"
+           f"{ITEM_1}]\n```\nLet me know if you need anything else {{sic}}.")
+    items, parser = parse_items(raw)
+    assert [item["index"] for item in items] == [0, 1]
+    assert parser.malformed == 2  # The unquoted item and the trailing "{sic}"
+    assert not parser.truncated
+
+def test_wrapped_reply_yields_inner_items():
+    items, _ = parse_items(f'{{"results": [{ITEM_0}, {ITEM_1}]}}')
+    assert [item["index"] for item in items] == [0, 1]
+
+def test_braces_inside_strings_do_not_split_items():
+    item = '{"index": 0, "original_title": "Head {Ops} \\"Plant\\"", "translated_title": "", "verdict": "RELEVANT"}'
+    items, _ = parse_items(item)
+    assert items[0]["original_title"] == 'Head {Ops} "Plant"'
+
+def test_streamed_chunks_match_whole_reply():
+    raw = f"noise [{ITEM_0}, {ITEM_1}] tail"
+    parser = ItemParser()
+    streamed = [item for ch in raw for item in parser.feed(ch)]
+    assert streamed == parse_items(raw)[0]
+
+def test_missing_items_are_requeued_not_failed():
+    queue = BatchQueue(["Plant Head", "HR Manager", "Works Manager"])
+    batch = queue.next_batch()
+    items, _ = parse_items(f"[{ITEM_0}, {ITEM_1}, {{\"index\": 2, \"orig")
+    matched, failed = queue.settle(batch, items)
+    assert sorted(matched) == [0, 1]
+    assert failed == []
+    assert [item["index"] for item in queue.next_batch()] == [2]
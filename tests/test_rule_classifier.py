@@ -0,0 +1,43 @@
+import pytest
+
+from rule_classifier import PLANT_DOMAIN_TERMS, RuleClassifier
+
+@pytest.fixture
+def rules():
+    return RuleClassifier()
+
+@pytest.mark.parametrize("title", ["Plant Manager", "Head of Maintenance", "Director - Procurement",
+                                   "Sr. Manager Electrical", "VP Manufacturing Operations"])
+def test_senior_in_domain_is_relevant(rules, title):
+    assert rules.classify(title) == "RELEVANT"
+
+@pytest.mark.parametrize("title", ["HR Manager", "Finance Director", "Head of Talent Acquisition", "Legal Counsel",
+                                   "Maintenance Technician", "Production Intern", "Graduate Engineer Trainee"])
+def test_excluded_department_or_junior_is_not_relevant(rules, title):
+    assert rules.classify(title) == "NOT RELEVANT"
+
+@pytest.mark.parametrize("title", [
+    "CEO", "Team Lead - Maintenance",                        # No department / not management
+    "Sales Manager", "Customer Service Head", "Compliance Director", "Head of Communications",  # Not in the prompt's exclusions
+    "Principal Engineer", "Instrumentation Controller",      # Individual contributors
+    "Get Well Coordinator", "Jefe de Mantenimiento", "", None,
+])
+def test_unclear_titles_go_to_gemini(rules, title):
+    assert rules.classify(title) is None
+
+def test_learned_keywords_only_veto(tmp_path):
+    rules = RuleClassifier(include_keywords=["officer"], exclude_keywords=["executive", "senior"])
+    assert rules.classify("Executive Plant Manager") is None      # Learned exclude word vetoes RELEVANT
+    assert rules.classify("HR Officer") is None                   # Learned include word vetoes NOT RELEVANT
+    assert rules.classify("Senior Plant Manager") == "RELEVANT"   # Stopwords are never learned
+    assert rules.classify("Executive Assistant") == "NOT RELEVANT"  # Learned words never decide on their own
+
+def test_domains_follow_the_prompt():
+    plant = RuleClassifier(domain_terms=PLANT_DOMAIN_TERMS)
+    assert plant.classify("Procurement Manager") is None
+    assert RuleClassifier().classify("Procurement Manager") == "RELEVANT"
+
+def test_split_keeps_positions(rules):
+    resolved, ambiguous = rules.split(["Plant Manager", "CEO", "HR Manager"])
+    assert resolved == {0: "RELEVANT", 2: "NOT RELEVANT"}
+    assert ambiguous == [1]
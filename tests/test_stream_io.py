@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+from stream_io import JSONArrayWriter, iter_json_array
+
+LISTS = [
+    "[1.5, 2]",
+    "[-2.5e10]",
+    '[0, -0.25E-3, 1e5, true, false, null, "12.5", {"n": [1.5, -7]}, 123456789]',
+    "[ 7 ]",
+    "[]",
+    '[{"title": "Plant Head, \\"Ops\\" ]"}]',
+]
+
+def write(tmp_path, text):
+    path = tmp_path / "items.json"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+@pytest.mark.parametrize("text", LISTS)
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 4, 5, 7, 64])
+def test_items_survive_every_chunk_boundary(tmp_path, text, chunk_size):
+    assert list(iter_json_array(write(tmp_path, text), chunk_size)) == json.loads(text)
+
+@pytest.mark.parametrize("text", ["[1, 2", "[1.5,", "[1 2]", "{}"])
+@pytest.mark.parametrize("chunk_size", [1, 3, 64])
+def test_malformed_lists_raise(tmp_path, text, chunk_size):
+    with pytest.raises(ValueError):
+        list(iter_json_array(write(tmp_path, text), chunk_size))
+
+def test_writer_output_reads_back(tmp_path):
+    path = str(tmp_path / "people.json")
+    records = [{"id": str(n), "score": n / 3} for n in range(50)]
+    writer = JSONArrayWriter(path)
+    writer.write_many(records)
+    writer.close()
+    assert list(iter_json_array(path, 5)) == records
@@ -0,0 +1,76 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from title_cache import TitleCache
+from title_index import TitleIndex, signature
+
+VERDICTS = [
+    ("Maintenance Manager", "RELEVANT"),
+    ("Senior Mechanical Manager", "RELEVANT"),
+    ("HR Manager", "NOT RELEVANT"),
+]
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = TitleCache("fingerprint", str(tmp_path / "title_cache.sqlite3"))
+    cache.put_many((title, {"translated_title": title, "verdict": verdict}) for title, verdict in VERDICTS)
+    yield cache
+    cache.close()
+
+@pytest.fixture
+def index(cache, tmp_path):
+    return TitleIndex.from_title_cache(cache, str(tmp_path / "title_index.npz"))
+
+def matched_title(index, title, threshold=0.5):
+    pos, _ = index.query([title], threshold)[0]
+    return None if pos is None else index.titles[pos]
+
+def test_abbreviations_share_signals():
+    assert signature("Sr. Mgr (Mech.)") == signature("Senior Mechanical Manager")
+
+def test_reuses_verdict_of_same_role(index):
+    assert matched_title(index, "Maintenance Manager.") == "Maintenance Manager"
+    assert matched_title(index, "Sr. Mgr (Mech.)") == "Senior Mechanical Manager"
+
+def test_different_seniority_is_not_reused(index):
+    # Close in characters, but a technician is not a manager
+    assert matched_title(index, "Maintenance Technician") is None
+
+def test_different_department_is_not_reused(index):
+    assert matched_title(index, "Maintenance HR Manager") is None
+
+def test_below_threshold_is_not_reused(index):
+    assert matched_title(index, "Maintenance Manager", threshold=1.01) is None
+
+def test_only_gemini_verdicts_are_indexed(cache, tmp_path):
+    cache.put_many([("Plant Head", {"verdict": "ERROR"})])
+    index = TitleIndex.from_title_cache(cache, str(tmp_path / "title_index.npz"))
+    assert sorted(index.titles) == sorted(title for title, _ in VERDICTS)
+
+def test_saved_index_is_rebuilt_when_cache_grows(cache, index, tmp_path):
+    path = str(tmp_path / "title_index.npz")
+    assert TitleIndex.from_title_cache(cache, path).stamp == index.stamp
+    cache.put_many([("Works Manager", {"verdict": "RELEVANT"})])
+    rebuilt = TitleIndex.from_title_cache(cache, path)
+    assert "Works Manager" in rebuilt.titles
+    assert rebuilt.stamp != index.stamp
+
+def test_shared_classifier_reuses_earlier_verdicts(tmp_path):
+    from LLM_calling_script import GeminiTitleClassifier
+    from mock_services import MockGeminiModel
+    model = MockGeminiModel(latency=0)
+    classifier = GeminiTitleClassifier(
+        "test-key", model=model, max_rpm=1000, use_rules=False, similarity_threshold=0.8,
+        cache_file=str(tmp_path / "title_cache.sqlite3"), usage_file=str(tmp_path / "key_usage.sqlite3"),
+        index_file=str(tmp_path / "title_index.npz"))
+    try:
+        classifier.classify([{"id": "a", "title": "Maintenance Manager"}], journal_file=str(tmp_path / "a.jsonl"))
+        calls = model.calls
+        # A later company in the same run: close enough to reuse, so Gemini is not asked again
+        results = classifier.classify([{"id": "b", "title": "Maintenance Mgr"}],
+                                      journal_file=str(tmp_path / "b.jsonl"))
+    finally:
+        classifier.close()
+    assert model.calls == calls
+    assert results[0]["classification"] == "RELEVANT"
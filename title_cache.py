@@ -0,0 +1,100 @@
+import hashlib
+import re
+import sqlite3
+import unicodedata
+from datetime import datetime
+
+# === CONFIGURATION ===
+CACHE_DB_FILE = "title_cache.sqlite3"
+CACHEABLE_VERDICTS = {"RELEVANT", "NOT RELEVANT"}
+
+# === TITLE NORMALIZATION ===
+def normalize_title(title):
+    if not title:
+        return ""
+    title = unicodedata.normalize("NFKC", str(title)).casefold()
+    return re.sub(r"\s+", " ", title).strip()
+
+# === GROUP ENTRIES BY NORMALIZED TITLE ===
+def group_by_title(entries):
+    # Preserves first-seen order; each group's first entry carries the title sent to the LLM
+    groups = {}
+    for entry in entries:
+        groups.setdefault(normalize_title(entry.get("title")), []).append(entry)
+    return groups
+
+# === PROMPT / MODEL FINGERPRINT ===
+def prompt_fingerprint(prompt_template, model_name):
+    # Any change to the prompt wording or the model invalidates old verdicts
+    digest = hashlib.sha256(f"{model_name}\n{prompt_template}".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+# === SQLITE-BACKED VERDICT CACHE ===
+class TitleCache:
+    def __init__(self, fingerprint, path=CACHE_DB_FILE):
+        self.fingerprint = fingerprint
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS title_verdicts (
+                title_key TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                original_title TEXT,
+                translated_title TEXT,
+                verdict TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (title_key, fingerprint)
+            )
+        """)
+        self.conn.commit()
+
+    def get(self, title):
+        row = self.conn.execute(
+            "SELECT translated_title, verdict FROM title_verdicts WHERE title_key = ? AND fingerprint = ?",
+            (normalize_title(title), self.fingerprint),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {"original_title": title, "translated_title": row[0] or "", "verdict": row[1]}
+
+    def put_many(self, pairs):
+        # pairs: iterable of (title, result) as returned by classify_batch
+        rows = []
+        now = datetime.now().isoformat(timespec="seconds")
+        for title, result in pairs:
+            verdict = result.get("verdict")
+            key = normalize_title(title)
+            if not key or verdict not in CACHEABLE_VERDICTS:
+                continue
+            rows.append((key, self.fingerprint, title, result.get("translated_title", ""), verdict, now))
+        if rows:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO title_verdicts VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            self.conn.commit()
+        return len(rows)
+
+    def verdicts(self):
+        # (title, translated_title, verdict) of every Gemini verdict under this fingerprint
+        return self.conn.execute(
+            "SELECT original_title, translated_title, verdict FROM title_verdicts WHERE fingerprint = ?",
+            (self.fingerprint,),
+        ).fetchall()
+
+    def stamp(self):
+        # Changes whenever a verdict is added or replaced under this fingerprint
+        count, latest = self.conn.execute(
+            "SELECT COUNT(*), MAX(created_at) FROM title_verdicts WHERE fingerprint = ?", (self.fingerprint,)
+        ).fetchone()
+        return f"{self.fingerprint}:{count}:{latest or ''}"
+
+    def summary(self, batch_size):
+        saved_requests = -(-self.hits // batch_size) if batch_size else 0
+        return f"🗃️ Title cache: {self.hits} hits / {self.misses} misses (~{saved_requests} API requests saved)"
+
+    def close(self):
+        self.conn.close()
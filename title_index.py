@@ -0,0 +1,155 @@
+import os
+import re
+import zlib
+
+from lazy_import import LazyModule
+from rule_classifier import title_signals
+from title_cache import normalize_title
+
+np = LazyModule("numpy")  # Optional: without NumPy the classifier simply skips neighbor reuse
+
+# === CONFIGURATION ===
+TITLE_INDEX_FILE = "title_index.npz"
+HASH_DIM = 2048  # Hashed character n-gram buckets per title vector
+NGRAM_SIZES = (3, 4)
+SIMILARITY_THRESHOLD = 0.9  # Cosine similarity needed to inherit a verdict
+QUERY_CHUNK = 1024  # Query rows scored per matrix multiply, bounds peak memory
+VALID_VERDICTS = {"RELEVANT", "NOT RELEVANT"}
+
+# Common title abbreviations, expanded so "Sr. Mgr (Mech.)" lands near "Senior Mechanical Manager"
+ABBREVIATIONS = {
+    "sr": "senior", "snr": "senior", "jr": "junior", "mgr": "manager", "mngr": "manager",
+    "asst": "assistant", "dy": "deputy", "dep": "deputy", "gm": "general manager",
+    "agm": "assistant general manager", "dgm": "deputy general manager", "vp": "vice president",
+    "avp": "assistant vice president", "mech": "mechanical", "elec": "electrical", "engg": "engineering",
+    "eng": "engineering", "engr": "engineer", "ops": "operations", "maint": "maintenance",
+    "mfg": "manufacturing", "prod": "production", "qa": "quality assurance", "qc": "quality control",
+    "hr": "human resources", "it": "information technology", "instr": "instrumentation",
+}
+
+def available():
+    return np.available()
+
+# === FEATURES ===
+def title_tokens(title):
+    tokens = []
+    for token in re.findall(r"\w+", normalize_title(title)):
+        tokens.extend(ABBREVIATIONS.get(token, token).split())
+    return tokens
+
+def feature_buckets(title, dim=HASH_DIM):
+    # Character n-grams of each token (order-insensitive), hashed with a stable CRC
+    buckets = []
+    for token in title_tokens(title):
+        padded = f"<{token}>"
+        buckets.append(zlib.crc32(padded.encode("utf-8")) % dim)
+        for n in NGRAM_SIZES:
+            for i in range(len(padded) - n + 1):
+                buckets.append(zlib.crc32(padded[i:i + n].encode("utf-8")) % dim)
+    return buckets
+
+def signature(title):
+    # Rule signals of the expanded title, so "Sr. Mgr (Mech.)" and "Senior Mechanical Manager" agree
+    return "|".join(sorted(title_signals(" ".join(title_tokens(title)))))
+
+def term_matrix(titles, dim=HASH_DIM):
+    matrix = np.zeros((len(titles), dim), dtype=np.float32)
+    for row, title in enumerate(titles):
+        buckets = feature_buckets(title, dim)
+        if buckets:
+            matrix[row] = np.bincount(buckets, minlength=dim)
+    return matrix
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+# === NEAREST-NEIGHBOR INDEX ===
+class TitleIndex:
+    # Built from Gemini's own verdicts only (the title cache), never from rule or
+    # neighbor verdicts, so a guess is never copied onward as if it were an answer
+    def __init__(self, titles, translated, verdicts, vectors, idf, signatures=None, stamp=""):
+        self.titles = list(titles)
+        self.translated = list(translated)
+        self.verdicts = list(verdicts)
+        self.vectors = vectors
+        self.idf = idf
+        self.signatures = list(signatures) if signatures is not None else [signature(t) for t in self.titles]
+        self.stamp = stamp  # Identifies the cache contents the index was built from
+
+    def __len__(self):
+        return len(self.titles)
+
+    @classmethod
+    def build(cls, records, dim=HASH_DIM, stamp=""):
+        # records: (title, translated_title, verdict); one vector per unique normalized title
+        seen = {}
+        for title, translated, verdict in records:
+            if verdict not in VALID_VERDICTS:
+                continue
+            key = normalize_title(title)
+            if key and key not in seen:
+                seen[key] = (title, translated or "", verdict)
+        titles = [r[0] for r in seen.values()]
+        tf = term_matrix(titles, dim)
+        df = np.count_nonzero(tf, axis=0)
+        idf = (np.log((1 + len(titles)) / (1 + df)) + 1).astype(np.float32)
+        vectors = _normalize_rows(tf * idf)
+        return cls(titles, [r[1] for r in seen.values()], [r[2] for r in seen.values()], vectors, idf, stamp=stamp)
+
+    @classmethod
+    def from_title_cache(cls, title_cache, index_file=TITLE_INDEX_FILE, dim=HASH_DIM):
+        # Reuse the saved index unless the cache has gained verdicts (or changed prompt) since
+        stamp = title_cache.stamp()
+        if index_file and os.path.exists(index_file):
+            index = cls.load(index_file)
+            if index is not None and index.stamp == stamp and index.vectors.shape[1] == dim:
+                return index
+        index = cls.build(title_cache.verdicts(), dim, stamp)
+        if index_file:
+            index.save(index_file)
+        return index
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            np.savez(f, vectors=self.vectors, idf=self.idf,
+                     titles=np.array(self.titles, dtype=str), translated=np.array(self.translated, dtype=str),
+                     verdicts=np.array(self.verdicts, dtype=str), signatures=np.array(self.signatures, dtype=str),
+                     stamp=np.array(self.stamp))
+
+    @classmethod
+    def load(cls, path):
+        # Fixed-width string arrays: no pickling, so loading is a straight memory read
+        with np.load(path) as data:
+            if "stamp" not in data.files:
+                return None  # Saved before the index was built from the title cache
+            return cls(data["titles"].tolist(), data["translated"].tolist(), data["verdicts"].tolist(),
+                       data["vectors"], data["idf"], data["signatures"].tolist(), str(data["stamp"]))
+
+    def query(self, titles, threshold=SIMILARITY_THRESHOLD):
+        # Returns one (position, score) per title: the most similar indexed title at or above
+        # the threshold whose seniority and department signals are the same. "Maintenance
+        # Manager" and "Maintenance Technician" read alike but are not the same verdict.
+        if not titles:
+            return []
+        if not len(self):
+            return [(None, 0.0)] * len(titles)
+        queries = _normalize_rows(term_matrix(titles, self.vectors.shape[1]) * self.idf)
+        matches = []
+        for start in range(0, len(titles), QUERY_CHUNK):
+            scores = queries[start:start + QUERY_CHUNK] @ self.vectors.T
+            for offset, row in enumerate(scores):
+                candidates = np.flatnonzero(row >= threshold)
+                match = (None, float(row.max()))
+                if len(candidates):
+                    wanted = signature(titles[start + offset])
+                    for pos in candidates[np.argsort(-row[candidates])].tolist():
+                        if self.signatures[pos] == wanted:
+                            match = (pos, float(row[pos]))
+                            break
+                matches.append(match)
+        return matches
+
+    def neighbor_result(self, pos):
+        return {"translated_title": self.translated[pos], "verdict": self.verdicts[pos]}